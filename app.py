@@ -2,17 +2,31 @@
 Main Flask Application
 Commodity Deal Tracker
 """
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, make_response, Response, stream_with_context, g
 from flask_cors import CORS
+from functools import wraps
 from config import Config
 from models.deal import Deal
+from services.response_cache import ResponseCache, MemoryBackend, SQLiteBackend
+from services.job_queue import JobQueue, make_scoring_handler, make_async_scoring_handler
+from services.rate_limiter import RateLimiter
+from services.pre_scorer import PreScorer
+from services.ai_telemetry import AITelemetry
+from services.circuit_breaker import CircuitBreaker
+from services.rescore_scheduler import RescoreScheduler
 from datetime import datetime
 import os
 import json
 import io
+import concurrent.futures
+import threading
+import time
 # Import services at top level
 try:
-    from services.ai_scorer import AIScorer
+    from services.ai_scorer import AIScorer, input_hash
+    from services.anthropic_client import create_client, create_async_client, ConnectionStats
+    from services.async_scorer import AsyncAIScorer, AsyncScoringService
+    from services.recording import wrap_client
 except ImportError:
     AIScorer = None
 try:
@@ -26,7 +40,282 @@ app.config.from_object(Config)
 CORS(app)
 
 # Initialize Deal model
-deal_model = Deal(app.config['DATABASE_PATH'])
+deal_model = Deal(
+    app.config['DATABASE_PATH'],
+    compression=app.config['BLOB_COMPRESSION'],
+    compress_min_bytes=app.config['BLOB_COMPRESSION_MIN_BYTES'],
+    pool_size=app.config['DB_POOL_SIZE'],
+    busy_timeout=app.config['SQLITE_BUSY_TIMEOUT_MS'],
+    synchronous=app.config['SQLITE_SYNCHRONOUS'],
+    cache_size=app.config['SQLITE_CACHE_SIZE'],
+    mmap_size=app.config['SQLITE_MMAP_SIZE']
+)
+deal_model.ensure_schema()
+
+# Response cache for hot read endpoints, invalidated by deal writes
+if app.config['RESPONSE_CACHE_BACKEND'] == 'sqlite':
+    cache_backend = SQLiteBackend(app.config['RESPONSE_CACHE_PATH'],
+                                  max_entries=app.config['RESPONSE_CACHE_MAX_ENTRIES'])
+else:
+    cache_backend = MemoryBackend(max_entries=app.config['RESPONSE_CACHE_MAX_ENTRIES'])
+response_cache = ResponseCache(cache_backend, ttl=app.config['RESPONSE_CACHE_TTL'])
+deal_model.add_change_listener(response_cache.invalidate)
+
+# Parsed AI results, shared with scoring_worker.py through a SQLite file
+ai_result_cache = None
+if app.config['AI_RESULT_CACHE_MAX_ENTRIES'] > 0:
+    ai_result_cache = ResponseCache(
+        SQLiteBackend(app.config['AI_RESULT_CACHE_PATH'],
+                      max_entries=app.config['AI_RESULT_CACHE_MAX_ENTRIES']),
+        ttl=app.config['AI_RESULT_CACHE_TTL']
+    )
+
+# One API budget for every scoring worker in this process
+ai_rate_limiter = RateLimiter(
+    requests_per_minute=app.config['AI_REQUESTS_PER_MINUTE'],
+    tokens_per_minute=app.config['AI_TOKENS_PER_MINUTE']
+)
+
+# Fail fast with a degraded result while the API keeps failing
+ai_breaker = CircuitBreaker(
+    failure_threshold=app.config['AI_BREAKER_FAILURES'],
+    reset_timeout=app.config['AI_BREAKER_RESET_SECONDS']
+)
+
+# Tokens, latency and cost of every AI call, for /api/metrics/ai
+ai_telemetry = AITelemetry(deal_model.pool, retention_days=app.config['AI_TELEMETRY_RETENTION_DAYS'])
+ai_telemetry.prune()
+
+# One AIScorer (and one pooled API client) per process, built on first use
+_scorer = None
+_scorer_lock = threading.Lock()
+ai_connection_stats = ConnectionStats() if AIScorer is not None else None
+
+def get_scorer():
+    """Get the process-wide AIScorer, creating it on first use"""
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            client = create_client(
+                app.config.get('ANTHROPIC_API_KEY'),
+                max_connections=app.config['AI_MAX_CONNECTIONS'],
+                keepalive_connections=app.config['AI_KEEPALIVE_CONNECTIONS'],
+                keepalive_expiry=app.config['AI_KEEPALIVE_EXPIRY'],
+                timeout=app.config['AI_TIMEOUT_SECONDS'],
+                connect_timeout=app.config['AI_CONNECT_TIMEOUT_SECONDS'],
+                stats=ai_connection_stats,
+                base_url=app.config['ANTHROPIC_BASE_URL']
+            )
+            client = wrap_client(client, app.config['AI_RECORDING_MODE'], app.config['AI_RECORDINGS_DIR'])
+            _scorer = AIScorer(
+                app.config.get('ANTHROPIC_API_KEY'),
+                cache=ai_result_cache,
+                limiter=ai_rate_limiter,
+                max_retries=app.config['AI_MAX_RETRIES'],
+                backoff_base=app.config['AI_BACKOFF_BASE'],
+                backoff_max=app.config['AI_BACKOFF_MAX'],
+                client=client,
+                telemetry=ai_telemetry,
+                deadline=app.config['AI_CALL_DEADLINE_SECONDS'],
+                breaker=ai_breaker
+            )
+        return _scorer
+
+# SCORING_MODE=async: one AsyncAIScorer on the scoring service's event loop
+_async_scorer = None
+
+def get_async_scorer():
+    """Get the process-wide AsyncAIScorer, creating it on first use"""
+    global _async_scorer
+    with _scorer_lock:
+        if _async_scorer is None:
+            concurrency = app.config['AI_ASYNC_CONCURRENCY']
+            client = create_async_client(
+                app.config.get('ANTHROPIC_API_KEY'),
+                max_connections=concurrency,
+                keepalive_connections=app.config['AI_KEEPALIVE_CONNECTIONS'],
+                keepalive_expiry=app.config['AI_KEEPALIVE_EXPIRY'],
+                timeout=app.config['AI_TIMEOUT_SECONDS'],
+                connect_timeout=app.config['AI_CONNECT_TIMEOUT_SECONDS'],
+                stats=ai_connection_stats,
+                base_url=app.config['ANTHROPIC_BASE_URL']
+            )
+            _async_scorer = AsyncAIScorer(
+                app.config.get('ANTHROPIC_API_KEY'),
+                cache=ai_result_cache,
+                limiter=ai_rate_limiter,
+                max_retries=app.config['AI_MAX_RETRIES'],
+                backoff_base=app.config['AI_BACKOFF_BASE'],
+                backoff_max=app.config['AI_BACKOFF_MAX'],
+                client=client,
+                telemetry=ai_telemetry,
+                deadline=app.config['AI_CALL_DEADLINE_SECONDS'],
+                breaker=ai_breaker
+            )
+        return _async_scorer
+
+# Local rule-based screen run before each AI scoring job
+pre_scorer = PreScorer(reject_below=app.config['PRE_SCORE_REJECT_BELOW'])
+
+# Background AI scoring: POST /api/deals/<id>/score only enqueues a job
+job_queue = JobQueue(
+    deal_model.pool,
+    make_scoring_handler(deal_model, get_scorer, pre_scorer=pre_scorer,
+                         reject_mode=app.config['PRE_SCORE_REJECT_MODE']),
+    workers=app.config['SCORING_WORKERS'],
+    lease_seconds=app.config['SCORING_JOB_LEASE_SECONDS'],
+    max_attempts=app.config['SCORING_JOB_MAX_ATTEMPTS']
+)
+scoring_service = None
+if AIScorer is not None:
+    async_scoring = app.config['SCORING_MODE'] == 'async'
+    if async_scoring and app.config['AI_RECORDING_MODE'] != 'off':
+        # Recording wraps the sync client only
+        print("SCORING_MODE=async does not support AI_RECORDING_MODE; using worker threads")
+        async_scoring = False
+    if not async_scoring:
+        job_queue.start()
+    elif app.config['SCORING_WORKERS'] > 0:
+        scoring_service = AsyncScoringService(
+            job_queue,
+            make_async_scoring_handler(deal_model, get_async_scorer, pre_scorer=pre_scorer,
+                                       reject_mode=app.config['PRE_SCORE_REJECT_MODE']),
+            concurrency=app.config['AI_ASYNC_CONCURRENCY']
+        )
+        scoring_service.start()
+
+# Scheduled re-scoring runs in scoring_worker.py; the app only reports on it
+rescore_scheduler = RescoreScheduler(
+    deal_model.pool, job_queue,
+    max_age_days=app.config['RESCORE_MAX_AGE_DAYS'],
+    daily_tokens=app.config['RESCORE_DAILY_TOKENS'],
+    concurrency=app.config['RESCORE_CONCURRENCY'],
+    hours=app.config['RESCORE_HOURS']
+)
+
+# ============================================
+# Helpers
+# ============================================
+
+REQUIRED_DEAL_FIELDS = ['commodity_type', 'source_name', 'date_received']
+LME_FIELDS = ['gross_discount', 'commission', 'net_discount']
+# Longest POST /api/deals/<id>/score?wait= may hold the request
+MAX_SCORE_WAIT_SECONDS = 300
+# Job event streams poll the job this often, backing off while nothing changes
+EVENTS_POLL_MIN_SECONDS = 0.25
+EVENTS_POLL_MAX_SECONDS = 2.0
+# Reconnect delay suggested to EventSource clients when a stream ends
+EVENTS_RETRY_MS = 1000
+
+def prepare_deal_data(data):
+    """
+    Validate a new deal payload and normalise its LME pricing fields in place
+    
+    Returns:
+        Error message, or None if the deal is valid
+    """
+    if not isinstance(data, dict):
+        return 'Deal must be a JSON object'
+    
+    # Handle LME pricing fields
+    for field in LME_FIELDS:
+        if data.get(field):
+            try:
+                data[field] = float(data[field])
+            except (TypeError, ValueError):
+                return f'Invalid number for field: {field}'
+    
+    # Validate required fields
+    for field in REQUIRED_DEAL_FIELDS:
+        if field not in data:
+            return f'Missing required field: {field}'
+    
+    return None
+
+def check_bulk_items(items, key):
+    """
+    Check the list in a bulk request body
+    
+    Returns:
+        Error message, or None if the list is usable
+    """
+    if not isinstance(items, list) or not items:
+        return f'Request body must contain a non-empty "{key}" list'
+    if len(items) > app.config['BULK_MAX_ITEMS']:
+        return f'Too many items: {len(items)} (max {app.config["BULK_MAX_ITEMS"]})'
+    return None
+
+def conditional_get(make_etag):
+    """
+    Decorator adding ETag / If-None-Match handling to a GET route
+    
+    make_etag receives the route's kwargs and returns the ETag value. When
+    the client already holds it, a 304 is returned without calling the
+    view, so nothing is queried or serialized.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            etag = make_etag(**kwargs)
+            
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            # Let browsers keep the body but revalidate on every fetch
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+def current_data_version():
+    """
+    Global change counter, read once per request
+    
+    Memoized in flask.g, so the ETag and the cache key share one
+    single-row lookup. Cache hits still make that one SQLite read: it is
+    how this process sees deals written by scoring_worker.py and other
+    processes, which cannot reach a memory cache backend. Keeping the
+    version in memory instead would make hits free but serve those
+    writes stale until the entries expire.
+    """
+    if 'data_version' not in g:
+        g.data_version = deal_model.get_data_version()
+    return g.data_version
+
+def cached_response(*tags):
+    """
+    Decorator caching a GET route's successful JSON responses
+    
+    The key is the path plus the sorted query string and the current
+    data version, so a write from any process retires older entries.
+    Tags may use the route's kwargs, e.g. 'deal:{deal_id}'. Deal writes
+    in this process (or one sharing the SQLite backend) also invalidate
+    the matching entries through the model's change listener.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            query = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+            key = f'{request.path}?{query}#{current_data_version()}'
+            
+            cached = response_cache.get(key)
+            if cached is not None:
+                return app.response_class(cached, mimetype='application/json')
+            
+            generation = response_cache.generation
+            response = make_response(view(**kwargs))
+            if response.status_code == 200:
+                response_cache.set(key, response.get_data(as_text=True),
+                                   [tag.format(**kwargs) for tag in tags],
+                                   generation=generation)
+            return response
+        return wrapper
+    return decorator
 
 # ============================================
 # Web Routes (HTML pages)
@@ -66,6 +355,8 @@ def ai_score_page(deal_id):
 # ============================================
 
 @app.route('/api/deals', methods=['GET'])
+@conditional_get(lambda: f"deals-{current_data_version()}")
+@cached_response('deals')
 def get_deals():
     """
     Get all deals with optional filters
@@ -74,23 +365,80 @@ def get_deals():
         status: Filter by status
         commodity_type: Filter by commodity
         limit: Max results (default 100)
+        cursor: next_cursor from a previous response to fetch the next page
+        fields: 'summary' (default), 'all', or comma-separated column names
     """
     status = request.args.get('status')
     commodity_type = request.args.get('commodity_type')
     limit = int(request.args.get('limit', 100))
+    cursor = request.args.get('cursor')
+    fields = request.args.get('fields')
     
-    deals = deal_model.get_all(status=status, commodity_type=commodity_type, limit=limit)
+    try:
+        page = deal_model.get_page(status=status, commodity_type=commodity_type,
+                                   limit=limit, cursor=cursor, fields=fields)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     
     return jsonify({
         'success': True,
+        'count': len(page['deals']),
+        'deals': page['deals'],
+        'next_cursor': page['next_cursor']
+    })
+
+@app.route('/api/deals/search', methods=['GET'])
+def search_deals():
+    """
+    Full-text search across deal text, notes, source and AI analysis
+    
+    Query params:
+        q: Search words (all must match; end a word with * for prefix match)
+        status: Filter by status
+        commodity_type: Filter by commodity
+        limit: Max results (default 20)
+        offset: Skip this many ranked results (default 0)
+        fields: 'summary' (default), 'all', or comma-separated column names
+    """
+    q = request.args.get('q', '')
+    
+    try:
+        deals = deal_model.search(
+            q,
+            status=request.args.get('status'),
+            commodity_type=request.args.get('commodity_type'),
+            limit=int(request.args.get('limit', 20)),
+            offset=int(request.args.get('offset', 0)),
+            fields=request.args.get('fields')
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'query': q,
         'count': len(deals),
         'deals': deals
     })
 
 @app.route('/api/deals/<int:deal_id>', methods=['GET'])
+@conditional_get(lambda deal_id: f"deal-{deal_id}-{current_data_version()}")
+@cached_response('deal:{deal_id}')
 def get_deal(deal_id):
-    """Get a single deal by ID"""
-    deal = deal_model.get_by_id(deal_id)
+    """
+    Get a single deal by ID
+    
+    Query params:
+        include: 'analysis' to also return the latest AI analysis
+    """
+    include_analysis = request.args.get('include') == 'analysis'
+    deal = deal_model.get_by_id(deal_id, include_analysis=include_analysis)
     
     if deal:
         return jsonify({
@@ -103,6 +451,74 @@ def get_deal(deal_id):
             'error': 'Deal not found'
         }), 404
 
+@app.route('/api/deals/<int:deal_id>/analysis', methods=['GET'])
+@conditional_get(lambda deal_id: f"analysis-{deal_id}-{current_data_version()}")
+@cached_response('deal:{deal_id}')
+def get_deal_analysis(deal_id):
+    """
+    Get the latest AI analysis for a deal
+    
+    Query params:
+        history: 'true' to also list every previous scoring run
+    """
+    analysis = deal_model.get_analysis(deal_id)
+    
+    if analysis is None:
+        return jsonify({
+            'success': False,
+            'error': 'No AI analysis found for this deal'
+        }), 404
+    
+    response = {
+        'success': True,
+        'analysis': analysis
+    }
+    if request.args.get('history') == 'true':
+        response['history'] = deal_model.get_analysis_history(deal_id)
+    
+    return jsonify(response)
+
+@app.route('/api/deals/<int:deal_id>/pre-score', methods=['GET'])
+def get_deal_pre_score(deal_id):
+    """
+    Score a deal with the local rules (no API call)
+    
+    Returns the preliminary score, risk level, red flags, strengths and
+    points per category, and whether the deal is a clear reject. Nothing
+    is stored; POST to the same path to save the result on the deal.
+    """
+    deal = deal_model.get_by_id(deal_id)
+    if not deal:
+        return jsonify({
+            'success': False,
+            'error': 'Deal not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'pre_score': pre_scorer.score(deal)
+    })
+
+@app.route('/api/deals/<int:deal_id>/pre-score', methods=['POST'])
+def save_deal_pre_score(deal_id):
+    """
+    Score a deal with the local rules and store the result on the deal
+    """
+    deal = deal_model.get_by_id(deal_id)
+    if not deal:
+        return jsonify({
+            'success': False,
+            'error': 'Deal not found'
+        }), 404
+    
+    result = pre_scorer.score(deal)
+    deal_model.save_pre_score(deal_id, result)
+    
+    return jsonify({
+        'success': True,
+        'pre_score': result
+    })
+
 @app.route('/api/deals', methods=['POST'])
 def create_deal():
     """
@@ -112,23 +528,12 @@ def create_deal():
     """
     data = request.get_json()
     
-    # Handle LME pricing fields
-    if data.get('gross_discount'):
-        data['gross_discount'] = float(data['gross_discount'])
-    if data.get('commission'):
-        data['commission'] = float(data['commission'])
-    if data.get('net_discount'):
-        data['net_discount'] = float(data['net_discount'])
-    
-    # Validate required fields
-    # Validate required fields
-    required = ['commodity_type', 'source_name', 'date_received']
-    for field in required:
-        if field not in data:
-            return jsonify({
-                'success': False,
-                'error': f'Missing required field: {field}'
-            }), 400
+    error = prepare_deal_data(data)
+    if error:
+        return jsonify({
+            'success': False,
+            'error': error
+        }), 400
     
     # Create the deal
     deal_id = deal_model.create(data)
@@ -139,6 +544,151 @@ def create_deal():
         'message': 'Deal created successfully'
     }), 201
 
+@app.route('/api/deals/bulk', methods=['POST'])
+def bulk_create_deals():
+    """
+    Create many deals in one transaction
+    
+    Request body: {"deals": [{...}, ...]}
+    Invalid items are reported per index and skipped; the rest are inserted.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('deals')
+    
+    error = check_bulk_items(items, 'deals')
+    if error:
+        return jsonify({
+            'success': False,
+            'error': error
+        }), 400
+    
+    results = []
+    valid = []
+    for index, item in enumerate(items):
+        item_error = prepare_deal_data(item)
+        if item_error:
+            results.append({'index': index, 'success': False, 'error': item_error})
+        else:
+            results.append({'index': index, 'success': True})
+            valid.append((index, item))
+    
+    try:
+        deal_ids = deal_model.create_many([item for _, item in valid])
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Bulk create failed, no deals were created: {str(e)}'
+        }), 400
+    
+    for (index, _), deal_id in zip(valid, deal_ids):
+        results[index]['deal_id'] = deal_id
+    
+    return jsonify({
+        'success': len(valid) == len(items),
+        'created': len(deal_ids),
+        'failed': len(items) - len(valid),
+        'results': results
+    }), 201 if deal_ids else 200
+
+@app.route('/api/deals/bulk', methods=['PATCH'])
+def bulk_update_deals():
+    """
+    Apply partial updates to many deals in one transaction
+    
+    Request body: {"updates": [{"id": 1, "status": "done"}, ...]}
+    Invalid items (no id, no fields, unknown fields) are reported per
+    index and skipped; the rest are applied.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('updates')
+    
+    error = check_bulk_items(items, 'updates')
+    if error:
+        return jsonify({
+            'success': False,
+            'error': error
+        }), 400
+    
+    columns = deal_model.get_columns()
+    results = []
+    valid = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('id'), int):
+            results.append({'index': index, 'success': False, 'error': 'Each update needs an integer id'})
+            continue
+        unknown = [field for field in item if field != 'id' and field not in columns]
+        if len(item) < 2:
+            results.append({'index': index, 'id': item['id'], 'success': False, 'error': 'No fields to update'})
+        elif unknown:
+            results.append({'index': index, 'id': item['id'], 'success': False,
+                            'error': f"Unknown field(s): {', '.join(unknown)}"})
+        else:
+            results.append({'index': index, 'id': item['id'], 'success': True})
+            valid.append(item)
+    
+    try:
+        updated = deal_model.update_many(valid)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Bulk update failed, no deals were changed: {str(e)}'
+        }), 400
+    
+    for result in results:
+        if result['success'] and not updated.get(result['id']):
+            result['success'] = False
+            result['error'] = 'Deal not found'
+    
+    succeeded = sum(1 for result in results if result['success'])
+    return jsonify({
+        'success': succeeded == len(items),
+        'updated': succeeded,
+        'failed': len(items) - succeeded,
+        'results': results
+    })
+
+@app.route('/api/deals/bulk', methods=['DELETE'])
+def bulk_delete_deals():
+    """
+    Delete many deals in one transaction
+    
+    Request body: {"ids": [1, 2, 3]}
+    """
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    
+    error = check_bulk_items(ids, 'ids')
+    if error:
+        return jsonify({
+            'success': False,
+            'error': error
+        }), 400
+    if not all(isinstance(deal_id, int) for deal_id in ids):
+        return jsonify({
+            'success': False,
+            'error': 'ids must be integers'
+        }), 400
+    
+    deleted = deal_model.delete_many(ids)
+    results = [
+        {'id': deal_id, 'success': True} if deleted[deal_id]
+        else {'id': deal_id, 'success': False, 'error': 'Deal not found'}
+        for deal_id in ids
+    ]
+    
+    succeeded = sum(1 for result in results if result['success'])
+    return jsonify({
+        'success': succeeded == len(ids),
+        'deleted': succeeded,
+        'failed': len(ids) - succeeded,
+        'results': results
+    })
+
 @app.route('/api/deals/<int:deal_id>', methods=['PUT'])
 def update_deal(deal_id):
     """Update an existing deal"""
@@ -174,6 +724,8 @@ def delete_deal(deal_id):
         }), 404
 
 @app.route('/api/statistics', methods=['GET'])
+@conditional_get(lambda: f"stats-{current_data_version()}")
+@cached_response('stats')
 def get_statistics():
     """Get dashboard statistics"""
     stats = deal_model.get_statistics()
@@ -185,12 +737,22 @@ def get_statistics():
 @app.route('/api/deals/<int:deal_id>/score', methods=['POST'])
 def score_deal(deal_id):
     """
-    Score a deal using AI
-    """
-    """
-    Score a deal using AI
+    Queue a deal for AI scoring
+    
+    Returns 202 with a job id straight away; poll /api/jobs/<job_id> (or
+    follow /api/jobs/<job_id>/events for sections as they are written) and
+    read the analysis from /api/deals/<id>/analysis once done. A request
+    for a deal that already has an identical job pending gets that job
+    back ('coalesced': true) rather than a duplicate API call.
+    
+    Query params:
+        force: 'true' to ignore cached AI results for identical input
+        wait: Seconds (at most MAX_SCORE_WAIT_SECONDS) to hold the request
+            for the job to finish; a finished job comes back with 200 and
+            its result under 'job', otherwise 202 as usual. With
+            SCORING_MODE=async the wait runs on the scoring event loop and
+            ends as soon as the job is recorded
     """
-
     # Get the deal
     deal = deal_model.get_by_id(deal_id)
     if not deal:
@@ -206,66 +768,309 @@ def score_deal(deal_id):
             'error': 'API key not configured'
         }), 400
 
-    try:
-        if AIScorer is None:
-             raise ImportError("AI Scorer service is not available (missing dependencies?)")
-
-        # Initialize AI scorer
-        scorer = AIScorer(app.config.get('ANTHROPIC_API_KEY'))
-
-        # Score the deal
-        result = scorer.score_deal(deal)
-
-        if result['success']:
-            # Update deal with AI score and reasoning
-
-            deal_model.update(deal_id, {
-    'ai_score': result['score'],
-    'ai_reasoning': json.dumps(result['reasoning']),
-    'ai_analysis': json.dumps({
-        'executive_summary': result.get('executive_summary'),
-        'market_analysis': result.get('market_analysis'),
-        'origin_analysis': result.get('origin_analysis'),
-        'buyer_profile': result.get('buyer_profile'),
-        'price_analysis': result.get('price_analysis'),
-        'payment_logistics': result.get('payment_logistics'),
-        'red_flags': result.get('red_flags', []),
-        'unusual_patterns': result.get('unusual_patterns', []),
-        'strengths': result.get('strengths', []),
-        'next_steps': result.get('next_steps', []),
-        'recommendation': result.get('recommendation', ''),
-        'risk_level': result.get('risk_level', 'medium')
-    })
-})
+    if AIScorer is None:
+        return jsonify({
+            'success': False,
+            'error': 'AI Scorer service is not available (missing dependencies?)'
+        }), 500
 
-            return jsonify({
-       'success': True,
-    'score': result['score'],
-    'reasoning': result['reasoning'],
-    'recommendation': result.get('recommendation', ''),
-    'risk_level': result.get('risk_level', 'medium'),
-    'executive_summary': result.get('executive_summary'),
-    'market_analysis': result.get('market_analysis'),
-    'origin_analysis': result.get('origin_analysis'),
-    'buyer_profile': result.get('buyer_profile'),
-    'price_analysis': result.get('price_analysis'),
-    'payment_logistics': result.get('payment_logistics'),
-    'red_flags': result.get('red_flags', []),
-    'unusual_patterns': result.get('unusual_patterns', []),
-    'strengths': result.get('strengths', []),
-    'next_steps': result.get('next_steps', [])
-            })
+    if request.args.get('force') == 'true':
+        job_id, coalesced = job_queue.enqueue_coalesced(deal_id, input_hash(deal), force=True)
+    else:
+        job_id, coalesced = job_queue.enqueue_coalesced(deal_id, input_hash(deal))
+    
+    response = {
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'coalesced': coalesced,
+        'status_url': f'/api/jobs/{job_id}',
+        'events_url': f'/api/jobs/{job_id}/events'
+    }
+    
+    wait = min(request.args.get('wait', 0, type=float), MAX_SCORE_WAIT_SECONDS)
+    if wait > 0:
+        if scoring_service is not None:
+            try:
+                job = scoring_service.run(job_queue.wait_async(job_id, wait), timeout=wait + 5)
+            except concurrent.futures.TimeoutError:
+                job = None
         else:
+            job = job_queue.wait(job_id, wait)
+        if job is not None and job['status'] in ('done', 'failed'):
+            return jsonify({**response, 'success': job['status'] == 'done',
+                            'status': job['status'], 'job': job})
+    
+    return jsonify(response), 202
+
+@app.route('/api/deals/score-batch', methods=['POST'])
+def score_batch():
+    """
+    Queue many deals for AI scoring
+    
+    Request body, either:
+        {"ids": [1, 2, 3]}
+        {"filter": {"status": "unassigned", "commodity_type": "Gold", "unscored": true}}
+    plus optional "limit", "concurrency" (jobs of this batch running at
+    once) and "force" (ignore cached results).
+    
+    Returns 202 with a batch id; poll /api/deals/score-batch/<batch_id>.
+    """
+    if not app.config.get('ANTHROPIC_API_KEY'):
+        return jsonify({
+            'success': False,
+            'error': 'API key not configured'
+        }), 400
+
+    if AIScorer is None:
+        return jsonify({
+            'success': False,
+            'error': 'AI Scorer service is not available (missing dependencies?)'
+        }), 500
+
+    data = request.get_json(silent=True) or {}
+    
+    if 'ids' in data:
+        error = check_bulk_items(data['ids'], 'ids')
+        if error:
             return jsonify({
                 'success': False,
-                'error': result.get('error', 'Unknown error')
-            }), 500
+                'error': error
+            }), 400
+        if not all(isinstance(deal_id, int) for deal_id in data['ids']):
+            return jsonify({
+                'success': False,
+                'error': 'ids must be integers'
+            }), 400
+        deal_ids = list(dict.fromkeys(data['ids']))
+        missing = set(deal_ids) - deal_model.existing_ids(deal_ids)
+        if missing:
+            return jsonify({
+                'success': False,
+                'error': f'Deal(s) not found: {", ".join(map(str, sorted(missing)))}'
+            }), 404
+    elif isinstance(data.get('filter'), dict):
+        filters = data['filter']
+        limit = min(int(data.get('limit') or app.config['BULK_MAX_ITEMS'] + 1),
+                    app.config['BULK_MAX_ITEMS'] + 1)
+        deal_ids = deal_model.find_ids(
+            status=filters.get('status'),
+            commodity_type=filters.get('commodity_type'),
+            unscored=bool(filters.get('unscored')),
+            limit=limit
+        )
+        if len(deal_ids) > app.config['BULK_MAX_ITEMS']:
+            return jsonify({
+                'success': False,
+                'error': f'Filter matches more than {app.config["BULK_MAX_ITEMS"]} deals; '
+                         f'narrow it or pass a limit'
+            }), 400
+    else:
+        return jsonify({
+            'success': False,
+            'error': 'Request body must contain "ids" or "filter"'
+        }), 400
 
-    except Exception as e:
+    if data.get('limit'):
+        deal_ids = deal_ids[:int(data['limit'])]
+    if not deal_ids:
         return jsonify({
             'success': False,
-            'error': str(e)
-        }), 500
+            'error': 'No deals to score'
+        }), 400
+
+    concurrency = int(data.get('concurrency') or app.config['SCORING_BATCH_CONCURRENCY'])
+    concurrency = max(1, min(concurrency, max(app.config['SCORING_WORKERS'], 1)))
+    
+    if data.get('force'):
+        batch_id = job_queue.enqueue_batch(deal_ids, concurrency, force=True)
+    else:
+        batch_id = job_queue.enqueue_batch(deal_ids, concurrency)
+    
+    return jsonify({
+        'success': True,
+        'batch_id': batch_id,
+        'total': len(deal_ids),
+        'concurrency': concurrency,
+        'status_url': f'/api/deals/score-batch/{batch_id}'
+    }), 202
+
+@app.route('/api/deals/score-batch/<int:batch_id>', methods=['GET'])
+def get_score_batch(batch_id):
+    """Get per-deal progress of a scoring batch"""
+    batch = job_queue.get_batch(batch_id)
+    if batch is None:
+        return jsonify({
+            'success': False,
+            'error': 'Batch not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'batch': batch
+    })
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get the status of a scoring job
+    
+    status is one of queued, running, done or failed. Done jobs carry a
+    short result (score, risk_level, recommendation, analysis_id).
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+@app.route('/api/jobs/<int:job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """
+    Stream a scoring job's progress as server-sent events
+    
+    Events:
+        status: {"status", "position"} whenever the job's status changes
+        section: {"key", "value"} for each analysis section as the model
+            finishes writing it
+        done: the job's result
+        error: {"error"} if the job failed
+    
+    The job is polled every EVENTS_POLL_MIN_SECONDS, backing off to
+    EVENTS_POLL_MAX_SECONDS while nothing changes. A stream still open
+    after JOB_EVENTS_MAX_SECONDS ends so it frees its request thread; the
+    client reconnects after the retry hint and, via Last-Event-ID, only
+    gets the sections it has not seen.
+    """
+    if job_queue.get(job_id) is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+
+    # Sections already received on an earlier connection
+    resume_from = request.headers.get('Last-Event-ID', 0, type=int)
+    max_seconds = app.config['JOB_EVENTS_MAX_SECONDS']
+
+    def event(name, data, event_id=None):
+        prefix = f"id: {event_id}\n" if event_id is not None else ''
+        return f"{prefix}event: {name}\ndata: {json.dumps(data)}\n\n"
+
+    def generate():
+        sent = resume_from
+        last_status = None
+        started = last_beat = time.monotonic()
+        interval = EVENTS_POLL_MIN_SECONDS
+        yield f"retry: {EVENTS_RETRY_MS}\n\n"
+        while True:
+            job = job_queue.get(job_id, include_partial=True)
+            if job is None:
+                yield event('error', {'error': 'Job not found'})
+                return
+
+            changed = False
+            if (job['status'], job.get('position')) != last_status:
+                last_status = (job['status'], job.get('position'))
+                changed = True
+                yield event('status', {'status': job['status'], 'position': job.get('position')})
+
+            for key, value in list(job['partial'].items())[sent:]:
+                sent += 1
+                changed = True
+                yield event('section', {'key': key, 'value': value}, sent)
+
+            if job['status'] == 'done':
+                yield event('done', job['result'])
+                return
+            if job['status'] == 'failed':
+                yield event('error', {'error': job['error'] or 'Scoring failed'})
+                return
+            if time.monotonic() - started >= max_seconds:
+                # The client reconnects after the retry hint
+                return
+
+            # Comment line keeps proxies from closing an idle stream
+            if time.monotonic() - last_beat > 15:
+                last_beat = time.monotonic()
+                yield ": keep-alive\n\n"
+            interval = EVENTS_POLL_MIN_SECONDS if changed else min(interval * 2, EVENTS_POLL_MAX_SECONDS)
+            time.sleep(interval)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/jobs/stats', methods=['GET'])
+def get_job_stats():
+    """Get scoring queue depth, worker counters, rate limiter, circuit breaker and API connection reuse"""
+    return jsonify({
+        'success': True,
+        'queue': job_queue.get_stats(),
+        'scoring_mode': 'async' if scoring_service is not None else 'threads',
+        'circuit_breaker': ai_breaker.get_stats(),
+        'rate_limiter': ai_rate_limiter.get_stats(),
+        'connections': ai_connection_stats.get_stats() if ai_connection_stats else None
+    })
+
+@app.route('/api/metrics/ai', methods=['GET'])
+def get_ai_metrics():
+    """
+    Aggregate AI call telemetry for capacity planning
+    
+    Query params:
+        hours: Window to aggregate (default 24)
+    
+    Returns latency and time-to-first-token percentiles, token totals and
+    tokens per deal, cache read share, truncation, parse failure and retry
+    rates, and estimated cost.
+    """
+    try:
+        hours = float(request.args.get('hours', 24))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'hours must be a number'
+        }), 400
+    if hours <= 0:
+        return jsonify({
+            'success': False,
+            'error': 'hours must be positive'
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'metrics': ai_telemetry.summary(hours)
+    })
+
+@app.route('/api/rescore/runs', methods=['GET'])
+def get_rescore_runs():
+    """
+    Report on scheduled re-scoring
+    
+    Query params:
+        limit: Number of recent runs (default 20)
+        preview: 1 or true to include what the scheduler would queue next
+    
+    Returns recent runs with job progress and tokens used. With preview,
+    'next' holds a dry run that ignores the hours window; it selects
+    candidates across the whole deals table, so it is left out by default.
+    """
+    limit = min(request.args.get('limit', 20, type=int) or 20, 200)
+    response = {
+        'success': True,
+        'enabled': app.config['RESCORE_ENABLED'],
+        'runs': rescore_scheduler.get_runs(limit)
+    }
+    if request.args.get('preview') in ('1', 'true'):
+        response['next'] = rescore_scheduler.run_once(dry_run=True, ignore_hours=True)
+    return jsonify(response)
 
 @app.route('/api/deals/<int:deal_id>/download-analysis', methods=['GET'])
 def download_analysis(deal_id):
@@ -278,7 +1083,7 @@ def download_analysis(deal_id):
     try:
 
         # Get the deal
-        deal = deal_model.get_by_id(deal_id)
+        deal = deal_model.get_by_id(deal_id, include_analysis=True)
         if not deal:
             return jsonify({
                 'success': False,
@@ -345,24 +1150,39 @@ def internal_error(error):
     }), 500
 
 @app.route('/api/sources', methods=['GET'])
+@cached_response('sources')
 def get_sources():
     """Get all sources"""
-    conn = deal_model.get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT id, name, reliability_rating, total_deals, successful_deals
-        FROM sources
-        ORDER BY name
-    """)
-
-    sources = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    with deal_model.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, name, reliability_rating, total_deals, successful_deals
+            FROM sources
+            ORDER BY name
+        """)
+        sources = [dict(row) for row in cursor.fetchall()]
     
     return jsonify({
         'success': True,
         'sources': sources
     })
+
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Get response cache and AI result cache hit/miss counters"""
+    return jsonify({
+        'success': True,
+        'cache': response_cache.get_stats(),
+        'ai_results': ai_result_cache.get_stats() if ai_result_cache else None
+    })
+
+@app.route('/api/db/pool', methods=['GET'])
+def get_pool_stats():
+    """Get database connection pool statistics"""
+    return jsonify({
+        'success': True,
+        'pool': deal_model.get_pool_stats()
+    })
 # ============================================
 # Run the app
 # ============================================
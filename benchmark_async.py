@@ -0,0 +1,223 @@
+"""
+Benchmark thread-pool against asyncio AI scoring
+
+Scores the same deals at high concurrency twice against mock_anthropic.py
+(started as a separate process, so its threads are not counted): once
+with the sync AIScorer on a thread pool, as the scoring workers do, and
+once with AsyncAIScorer on one event loop (SCORING_MODE=async). Reports
+wall time, throughput, latency percentiles, the peak number of threads
+each needed and the CPU time this process used. Nothing is stored and no real API calls are made.
+
+Usage:
+  python benchmark_async.py [--deals 400] [--concurrency 200] [--keepalive 50]
+                            [--latency 1.0] [--tokens-per-second 2000]
+                            [--mode both|threads|async]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from services.ai_scorer import AIScorer
+from services.ai_telemetry import percentile
+from services.anthropic_client import create_client, create_async_client
+from services.async_scorer import AsyncAIScorer
+
+COMMODITIES = ['Gold', 'Copper', 'Aluminum', 'Iron Ore', 'Wheat', 'Soybean', 'Oil']
+ORIGINS = ['Ghana', 'Mali', 'Chile', 'Peru', 'Brazil', 'Guinea', 'Kazakhstan']
+PAYMENTS = ['SBLC', 'LC', 'DLC', 'BCL', 'Wire Transfer']
+
+
+def sample_deals(count, rng):
+    """Deals with distinct prompts, shaped like rows of the deals table"""
+    return [{
+        'id': i + 1,
+        'commodity_type': rng.choice(COMMODITIES),
+        'source_name': f"Benchmark source {i % 10}",
+        'source_reliability': rng.randint(3, 10),
+        'origin_country': rng.choice(ORIGINS),
+        'payment_method': rng.choice(PAYMENTS),
+        'shipping_terms': 'CIF Rotterdam',
+        'price_type': 'lme_discount',
+        'gross_discount': -rng.randint(4, 16),
+        'commission': 1,
+        'deal_text': f"Benchmark deal {i}: offer of {rng.randint(10, 500)} MT, documents on request.",
+        'date_received': '2025-06-01',
+    } for i in range(count)]
+
+
+def start_mock(args):
+    """
+    Run mock_anthropic.py in a child process
+
+    Returns:
+        (process, base URL)
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    process = subprocess.Popen(
+        [sys.executable, 'mock_anthropic.py', '--port', str(port),
+         '--latency', str(args.latency), '--tokens-per-second', str(args.tokens_per_second)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + '/stats', timeout=1).close()
+            return process, url
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit('mock_anthropic.py did not start')
+
+
+class ThreadSampler:
+    """Tracks the most threads alive in this process while running"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopping.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stopping.is_set():
+            # Not counting this sampler thread
+            self.peak = max(self.peak, threading.active_count() - 1)
+            self._stopping.wait(self.interval)
+
+
+def warm_up_deal(deals):
+    """
+    Untimed first call: the async client looks up platform details on
+    its first requests in worker threads, which would count as the
+    event loop's own threads
+    """
+    return {**deals[0], 'id': 0, 'deal_text': 'Warm-up deal'}
+
+
+def scorer_settings(args):
+    # No cache, limiter or telemetry: only the calls themselves are measured
+    return dict(max_retries=2, backoff_base=0.5, deadline=args.deadline or None)
+
+
+def client_settings(args, url):
+    return dict(max_connections=args.concurrency, keepalive_connections=args.keepalive,
+                timeout=args.deadline or 300, base_url=url)
+
+
+def run_threads(args, url, deals, on_section):
+    """Score every deal on a pool of args.concurrency threads"""
+    scorer = AIScorer('benchmark', client=create_client('benchmark', **client_settings(args, url)),
+                      **scorer_settings(args))
+
+    def score(deal):
+        started = time.perf_counter()
+        result = scorer.score_deal(deal, on_section=on_section)
+        return time.perf_counter() - started, result['success']
+
+    score(warm_up_deal(deals))
+    with ThreadSampler() as sampler:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            outcomes = list(pool.map(score, deals))
+        wall = time.perf_counter() - started
+    scorer.client.close()
+    return wall, outcomes, sampler.peak
+
+
+def run_async(args, url, deals, on_section):
+    """Score every deal on one event loop, args.concurrency at a time"""
+    async def main():
+        scorer = AsyncAIScorer('benchmark',
+                               client=create_async_client('benchmark', **client_settings(args, url)),
+                               **scorer_settings(args))
+        slots = asyncio.Semaphore(args.concurrency)
+
+        async def score(deal):
+            async with slots:
+                started = time.perf_counter()
+                result = await scorer.score_deal(deal, on_section=on_section)
+                return time.perf_counter() - started, result['success']
+
+        try:
+            await score(warm_up_deal(deals))
+            with ThreadSampler() as sampler:
+                started = time.perf_counter()
+                outcomes = await asyncio.gather(*(score(deal) for deal in deals))
+                return time.perf_counter() - started, outcomes, sampler.peak
+        finally:
+            await scorer.client.close()
+
+    return asyncio.run(main())
+
+
+def report(name, wall, outcomes, peak_threads, cpu):
+    latencies = [seconds * 1000 for seconds, ok in outcomes if ok]
+    failed = sum(not ok for _, ok in outcomes)
+    print(f"{name:<8} {wall:8.2f}s {len(latencies) / wall:9.1f}/s "
+          f"{percentile(latencies, 50) or 0:9.0f} {percentile(latencies, 95) or 0:9.0f} "
+          f"{peak_threads:8} {cpu:7.1f}s {failed:7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--deals', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=1.0, help='Mock seconds to first token')
+    parser.add_argument('--tokens-per-second', type=float, default=2000, help='Mock generation speed')
+    # httpcore rescans every idle connection on each request, which gets
+    # slow when hundreds of them are kept open
+    parser.add_argument('--keepalive', type=int, default=50, help='Idle connections kept open')
+    parser.add_argument('--deadline', type=float, default=120, help='Per-call deadline (0 = none)')
+    parser.add_argument('--no-stream', action='store_true', help='Wait for whole responses instead')
+    parser.add_argument('--mode', choices=['both', 'threads', 'async'], default='both')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    deals = sample_deals(args.deals, random.Random(args.seed))
+    on_section = None if args.no_stream else (lambda key, value: None)
+    modes = [(name, run) for name, run in (('threads', run_threads), ('async', run_async))
+             if args.mode in ('both', name)]
+
+    process, url = start_mock(args)
+    print("=" * 60)
+    print(f"{args.deals} deals, {args.concurrency} at once, mock latency {args.latency}s "
+          f"at {args.tokens_per_second:g} tokens/s ({'whole responses' if args.no_stream else 'streaming'})")
+    print("=" * 60)
+    print(f"{'mode':<8} {'wall':>9} {'throughput':>11} {'p50 ms':>9} {'p95 ms':>9} {'threads':>8} {'cpu':>8} {'failed':>7}")
+    try:
+        for name, run in modes:
+            # The scorers log every call; keep the table readable
+            cpu = time.process_time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                wall, outcomes, peak_threads = run(args, url, deals, on_section)
+            report(name, wall, outcomes, peak_threads, time.process_time() - cpu)
+    finally:
+        process.terminate()
+        process.wait()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,131 @@
+"""
+Benchmark the Deal model's connection handling
+
+Compares the old behaviour (a fresh sqlite3.connect() per call, default
+rollback journal, no pragmas) against the pooled WAL connections and
+reports requests/sec for a mixed read/write workload.
+
+Usage:
+  python benchmark_database.py [--deals 2000] [--requests 4000] [--threads 8]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from database.init_db import create_schema
+from models.deal import Deal
+
+COMMODITIES = ['Gold', 'Copper', 'Aluminum', 'Iron Ore', 'Wheat', 'Soybean', 'Oil']
+STATUSES = ['unassigned', 'under_review', 'in_progress', 'done', 'on_hold']
+
+
+class UnpooledDeal(Deal):
+    """Deal model with the original connect-per-call behaviour"""
+
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+def seed_database(db_path, count):
+    """Create the schema and insert sample deals"""
+    conn = sqlite3.connect(db_path)
+    create_schema(conn)
+    rows = []
+    for i in range(count):
+        rows.append((
+            random.choice(COMMODITIES),
+            f"Source {i % 25}",
+            random.randint(1, 10),
+            "Sample deal text " * 40,
+            round(random.uniform(100, 90000), 2),
+            random.uniform(1, 1000),
+            'MT',
+            f"2025-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}",
+            random.choice(STATUSES),
+        ))
+    conn.executemany("""
+        INSERT INTO deals (
+            commodity_type, source_name, source_reliability, deal_text,
+            price, quantity, quantity_unit, date_received, status
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+    conn.commit()
+    conn.close()
+
+
+def run_workload(model, deal_count, total_requests, threads):
+    """
+    Run a mixed workload across threads
+
+    Returns:
+        Tuple of (requests/sec, error count)
+    """
+    per_thread = total_requests // threads
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(per_thread):
+            op = rng.random()
+            try:
+                if op < 0.45:
+                    model.get_by_id(rng.randint(1, deal_count))
+                elif op < 0.75:
+                    model.get_all(status=rng.choice(STATUSES), limit=50)
+                elif op < 0.90:
+                    model.get_statistics()
+                else:
+                    model.update(rng.randint(1, deal_count), {'status': rng.choice(STATUSES)})
+            except sqlite3.Error as e:
+                errors.append(str(e))
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return (per_thread * threads) / elapsed, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--deals', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, 'before.db')
+        after_path = os.path.join(tmp, 'after.db')
+        seed_database(before_path, args.deals)
+        seed_database(after_path, args.deals)
+
+        before = UnpooledDeal(before_path)
+        after = Deal(after_path, pool_size=args.threads)
+
+        print("=" * 60)
+        print(f"Deals: {args.deals} | Requests: {args.requests} | Threads: {args.threads}")
+        print("=" * 60)
+
+        rps, errs = run_workload(before, args.deals, args.requests, args.threads)
+        print(f"Before (connect per call): {rps:10.1f} req/s  errors={errs}")
+
+        rps_after, errs = run_workload(after, args.deals, args.requests, args.threads)
+        print(f"After  (pooled + WAL):     {rps_after:10.1f} req/s  errors={errs}")
+        print(f"Speedup: {rps_after / rps:.2f}x")
+        print(f"Pool stats: {after.get_pool_stats()}")
+
+        after.pool.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Fuzz and benchmark the scoring response parser
+
+Cuts every response at many points (as max_tokens would), wraps it in
+fences and preambles and streams it in random chunks, checking that
+parse_score_response never fails, never invents a value and keeps
+everything that finished before the cut. Then compares recovery and
+speed against the old regex parser.
+
+Responses come from --responses (a directory of raw response .txt files
+or of recordings saved with AI_RECORDING_MODE=record) or, by default,
+from generated samples.
+
+Usage:
+  python benchmark_parser.py [--responses DIR] [--samples 20] [--cuts 200] [--repeat 200]
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import time
+
+from models.analysis import TEXT_FIELDS, LIST_FIELDS
+from services.json_stream import SectionStreamParser
+from services.score_parser import parse_score_response
+
+WORDS = ('gold dore refinery assay LME discount buyer seller escrow SBLC MT103 '
+         'Ghana Dubai shipment customs export licence "quoted" price\\path commission').split()
+
+
+def sample_response(rng):
+    """Generate a realistic scoring response"""
+    def sentence():
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 30))).capitalize() + '.'
+
+    data = {'score': rng.randint(0, 100), 'risk_level': rng.choice(['low', 'medium', 'high'])}
+    for field in TEXT_FIELDS:
+        data[field] = '\n\n'.join(' '.join(sentence() for _ in range(rng.randint(2, 5)))
+                                  for _ in range(rng.randint(1, 3)))
+    for field in LIST_FIELDS:
+        data[field] = [sentence() for _ in range(rng.randint(0, 6))]
+    data['recommendation'] = sentence()
+
+    keys = list(data)
+    rng.shuffle(keys)
+    body = json.dumps({key: data[key] for key in keys}, indent=rng.choice([None, 2]), ensure_ascii=rng.random() < 0.5)
+    return rng.choice([
+        body,
+        f"```json\n{body}\n```",
+        f"Here is the analysis {{as requested}}:\n\n```json\n{body}\n```\n\nLet me know if you need more.",
+    ])
+
+
+def legacy_parse(text):
+    """The previous parser: strip fences, greedy regex, regex score fallback"""
+    cleaned = text.strip()
+    if cleaned.startswith('```json'):
+        cleaned = cleaned[7:]
+    elif cleaned.startswith('```'):
+        cleaned = cleaned[3:]
+    if cleaned.endswith('```'):
+        cleaned = cleaned[:-3]
+    match = re.search(r'\{[\s\S]*\}', cleaned.strip())
+    try:
+        return json.loads(match.group(0) if match else cleaned)
+    except ValueError:
+        score = re.search(r'"score"\s*:\s*(\d+)', text)
+        return {'score': int(score.group(1))} if score else {}
+
+
+def load_responses(args, rng):
+    if args.responses:
+        responses = []
+        for path in sorted(glob.glob(os.path.join(args.responses, '*.txt'))):
+            with open(path, encoding='utf-8') as f:
+                responses.append(f.read())
+        for path in sorted(glob.glob(os.path.join(args.responses, '*.json'))):
+            with open(path, encoding='utf-8') as f:
+                message = json.load(f)['message']
+            # Only responses that finished can serve as the reference
+            if message.get('stop_reason') != 'max_tokens':
+                responses.append(''.join(block.get('text', '') for block in message['content']))
+        return responses
+    return [sample_response(rng) for _ in range(args.samples)]
+
+
+def fuzz(responses, cuts, rng):
+    """Check the parser's guarantees; returns (cases, failures)"""
+    cases = 0
+    failures = []
+    for index, text in enumerate(responses):
+        full, report = parse_score_response(text)
+        if not report['complete']:
+            failures.append((index, len(text), 'full response not complete'))
+            continue
+
+        # Streaming in random chunks matches a one-shot parse
+        parser = SectionStreamParser()
+        pos = 0
+        while pos < len(text):
+            step = rng.randint(1, 40)
+            parser.feed(text[pos:pos + step])
+            pos += step
+        oneshot = SectionStreamParser()
+        oneshot.feed(text)
+        cases += 1
+        if parser.sections != oneshot.sections:
+            failures.append((index, len(text), 'chunked parse differs'))
+
+        previous = 0
+        points = sorted(rng.sample(range(len(text)), min(cuts, len(text))))
+        for cut in points:
+            cases += 1
+            try:
+                fields, report = parse_score_response(text[:cut], 'max_tokens')
+            except Exception as e:
+                failures.append((index, cut, f"raised {e!r}"))
+                continue
+
+            for key, value in fields.items():
+                if key == report['salvaged']:
+                    ok = value == full[key][:len(value)]
+                else:
+                    ok = value == full[key]
+                if not ok:
+                    failures.append((index, cut, f"wrong value for {key}"))
+
+            # Recovery only grows as more of the response arrives
+            complete_fields = len(fields) - (report['salvaged'] is not None)
+            if complete_fields < previous:
+                failures.append((index, cut, 'fewer fields than an earlier cut'))
+            previous = complete_fields
+    return cases, failures
+
+
+def compare(responses, repeat, rng):
+    """Recovery after truncation and parse speed, old parser against new"""
+    recovered_old = recovered_new = total = 0
+    for text in responses:
+        for _ in range(10):
+            cut = text[:rng.randint(len(text) // 4, len(text) - 1)]
+            total += 1
+            recovered_old += len([k for k in legacy_parse(cut) if k != 'score'])
+            recovered_new += len([k for k in parse_score_response(cut)[0] if k != 'score'])
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in responses:
+            legacy_parse(text)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in responses:
+            parse_score_response(text)
+    new_time = time.perf_counter() - start
+
+    parses = repeat * len(responses)
+    return {
+        'truncated_cases': total,
+        'sections_recovered_old': round(recovered_old / total, 2),
+        'sections_recovered_new': round(recovered_new / total, 2),
+        'legacy_us_per_parse': round(legacy_time / parses * 1e6, 1),
+        'new_us_per_parse': round(new_time / parses * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--responses', help='Directory of raw responses (*.txt) or recordings (*.json)')
+    parser.add_argument('--samples', type=int, default=20)
+    parser.add_argument('--cuts', type=int, default=200, help='Truncation points per response')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    responses = load_responses(args, rng)
+    if not responses:
+        print("No responses to test")
+        return 1
+
+    print(f"Fuzzing {len(responses)} responses...")
+    cases, failures = fuzz(responses, args.cuts, rng)
+    print(f"  {cases} cases, {len(failures)} failures")
+    for index, cut, reason in failures[:20]:
+        print(f"  response {index} cut at {cut}: {reason}")
+
+    print("\nOld vs new parser:")
+    for name, value in compare(responses, args.repeat, rng).items():
+        print(f"  {name:<26} {value}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+"""
+Compress large text already stored in the database
+
+New writes are compressed by the Deal model (see BLOB_COMPRESSION). This
+rewrites older rows the same way, one batch per transaction, and reports
+bytes per column before and after, the compression ratio, the cost of
+reading a compressed deal back, and the database file size.
+
+SQLite does not shrink the file on its own: freed pages are reused by
+later writes. Pass --vacuum to rebuild the file and return the space.
+
+Usage:
+  python compress_blobs.py [--batch-size 500] [--report-only] [--vacuum]
+"""
+import argparse
+import sqlite3
+import time
+
+from config import Config
+from models.deal import Deal, COMPRESSED_DEAL_FIELDS, COMPRESSED_ANALYSIS_FIELDS
+
+COLUMNS = [('deals', f) for f in COMPRESSED_DEAL_FIELDS] + \
+          [('deal_analyses', f) for f in COMPRESSED_ANALYSIS_FIELDS]
+
+
+def column_sizes(db_path):
+    """
+    Measure stored bytes per column and the database file size
+
+    Returns:
+        Tuple of ({(table, column): (bytes, compressed_rows)}, file_bytes)
+    """
+    conn = sqlite3.connect(str(db_path))
+    try:
+        sizes = {}
+        for table, column in COLUMNS:
+            sizes[(table, column)] = conn.execute(f"""
+                SELECT IFNULL(SUM(length(CAST({column} AS BLOB))), 0),
+                       SUM(typeof({column}) = 'blob')
+                FROM {table}
+            """).fetchone()
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        conn.close()
+    return sizes, page_count * page_size
+
+
+def read_latency(deal_model, samples=200):
+    """
+    Average milliseconds to load a deal with its analysis
+
+    Returns:
+        Milliseconds per get_by_id(include_analysis=True), or None if empty
+    """
+    with deal_model.connection() as conn:
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM deals ORDER BY RANDOM() LIMIT ?", (samples,)
+        ).fetchall()]
+    if not ids:
+        return None
+
+    start = time.perf_counter()
+    for deal_id in ids:
+        deal_model.get_by_id(deal_id, include_analysis=True)
+    return (time.perf_counter() - start) * 1000 / len(ids)
+
+
+def print_report(before, after):
+    """Print per-column byte counts and ratios"""
+    print(f"\n{'column':38} {'before':>12} {'after':>12} {'ratio':>7} {'blobs':>7}")
+    for key in COLUMNS:
+        old_bytes = before[key][0]
+        new_bytes, blobs = after[key]
+        ratio = f"{old_bytes / new_bytes:.2f}x" if new_bytes else '-'
+        print(f"{'.'.join(key):38} {old_bytes:12,} {new_bytes:12,} {ratio:>7} {blobs or 0:7,}")
+
+    total_before = sum(v[0] for v in before.values())
+    total_after = sum(v[0] for v in after.values())
+    ratio = f"{total_before / total_after:.2f}x" if total_after else '-'
+    print(f"{'total':38} {total_before:12,} {total_after:12,} {ratio:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compress large text columns in place')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--report-only', action='store_true', help='Measure without rewriting rows')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM afterwards to shrink the file')
+    args = parser.parse_args()
+
+    deal_model = Deal(Config.DATABASE_PATH,
+                      compression=Config.BLOB_COMPRESSION,
+                      compress_min_bytes=Config.BLOB_COMPRESSION_MIN_BYTES)
+    deal_model.ensure_schema()
+
+    print("=" * 60)
+    print(f"Compressing text columns (codec={deal_model.compression}, "
+          f"min={deal_model.compress_min_bytes} bytes)")
+    print("=" * 60)
+
+    before, file_before = column_sizes(Config.DATABASE_PATH)
+    latency_before = read_latency(deal_model)
+
+    if not args.report_only:
+        counts = deal_model.compress_existing(
+            batch_size=args.batch_size,
+            progress=lambda table, count: print(f"  {table}: {count} rows compressed...")
+        )
+        print(f"\n✅ Rewrote {counts['deals']} deal(s) and {counts['deal_analyses']} analysis row(s)")
+
+    after, file_after = column_sizes(Config.DATABASE_PATH)
+    latency_after = read_latency(deal_model)
+    print_report(before, after)
+
+    if latency_before is not None:
+        print(f"\nget_by_id with analysis: {latency_before:.3f} ms -> {latency_after:.3f} ms")
+
+    deal_model.pool.close_all()
+
+    if args.vacuum:
+        conn = sqlite3.connect(str(Config.DATABASE_PATH))
+        conn.execute("VACUUM")
+        conn.close()
+        _, file_after = column_sizes(Config.DATABASE_PATH)
+
+    print(f"Database file: {file_before:,} -> {file_after:,} bytes")
+    if not args.vacuum and file_after >= file_before:
+        print("Freed pages are reused by new writes; run with --vacuum to shrink the file now.")
+
+
+if __name__ == '__main__':
+    main()
@@ -21,9 +21,101 @@ class Config:
     
     # Database settings
     DATABASE_PATH = BASE_DIR / 'database' / 'deals.db'
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-20000'))  # negative = KiB
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '5000'))
+    
+    # Compression for large text columns ('zlib', 'zstd' or 'off')
+    BLOB_COMPRESSION = os.getenv('BLOB_COMPRESSION', 'zlib')
+    BLOB_COMPRESSION_MIN_BYTES = int(os.getenv('BLOB_COMPRESSION_MIN_BYTES', '1024'))
+    
+    # Response cache for hot read endpoints ('memory' or 'sqlite' for a
+    # file shared between worker processes)
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '30'))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+    RESPONSE_CACHE_PATH = BASE_DIR / 'database' / 'response_cache.db'
     
     # Anthropic API (for later - AI scoring)
     ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY', '')
+    # Point at mock_anthropic.py (e.g. http://127.0.0.1:8765) to test offline
+    ANTHROPIC_BASE_URL = os.getenv('ANTHROPIC_BASE_URL', '')
+    
+    # 'record' saves every API response to AI_RECORDINGS_DIR; 'replay'
+    # answers only from those files, with no network (any API key works)
+    AI_RECORDING_MODE = os.getenv('AI_RECORDING_MODE', 'off')
+    AI_RECORDINGS_DIR = Path(os.getenv('AI_RECORDINGS_DIR', str(BASE_DIR / 'recordings')))
+    
+    # Background scoring queue. Set SCORING_WORKERS=0 to run workers only
+    # in a separate process (python scoring_worker.py)
+    SCORING_WORKERS = int(os.getenv('SCORING_WORKERS', '4'))
+    SCORING_JOB_LEASE_SECONDS = int(os.getenv('SCORING_JOB_LEASE_SECONDS', '600'))
+    SCORING_JOB_MAX_ATTEMPTS = int(os.getenv('SCORING_JOB_MAX_ATTEMPTS', '2'))
+    # A job event stream holds a request thread, so it ends after this many
+    # seconds and the browser reconnects (resuming where it left off)
+    JOB_EVENTS_MAX_SECONDS = float(os.getenv('JOB_EVENTS_MAX_SECONDS', '30'))
+    # Default cap on how many jobs of one batch run at once; keep it below
+    # SCORING_WORKERS so single-deal scoring always has a free worker
+    SCORING_BATCH_CONCURRENCY = int(os.getenv('SCORING_BATCH_CONCURRENCY', '3'))
+    # 'async' runs scoring jobs on one event loop with the async API client
+    # instead of SCORING_WORKERS threads, up to AI_ASYNC_CONCURRENCY calls
+    # at once (also its connection pool size). Needs AI_RECORDING_MODE=off.
+    # Keep AI_KEEPALIVE_CONNECTIONS well below it: the HTTP pool rescans
+    # every idle connection on each request
+    SCORING_MODE = os.getenv('SCORING_MODE', 'threads')
+    AI_ASYNC_CONCURRENCY = int(os.getenv('AI_ASYNC_CONCURRENCY', '200'))
+    
+    # Per-process API budget (0 = unlimited) and 429/529 retry policy
+    AI_REQUESTS_PER_MINUTE = int(os.getenv('AI_REQUESTS_PER_MINUTE', '50'))
+    AI_TOKENS_PER_MINUTE = int(os.getenv('AI_TOKENS_PER_MINUTE', '0'))
+    AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', '5'))
+    AI_BACKOFF_BASE = float(os.getenv('AI_BACKOFF_BASE', '2'))
+    AI_BACKOFF_MAX = float(os.getenv('AI_BACKOFF_MAX', '60'))
+    
+    # HTTP connection pool of the shared Anthropic client
+    AI_MAX_CONNECTIONS = int(os.getenv('AI_MAX_CONNECTIONS', '10'))
+    AI_KEEPALIVE_CONNECTIONS = int(os.getenv('AI_KEEPALIVE_CONNECTIONS', '10'))
+    AI_KEEPALIVE_EXPIRY = float(os.getenv('AI_KEEPALIVE_EXPIRY', '120'))
+    AI_TIMEOUT_SECONDS = float(os.getenv('AI_TIMEOUT_SECONDS', '300'))
+    AI_CONNECT_TIMEOUT_SECONDS = float(os.getenv('AI_CONNECT_TIMEOUT_SECONDS', '10'))
+    
+    # Deadline for one scoring call, retries included (0 = none). After
+    # AI_BREAKER_FAILURES upstream failures in a row the breaker opens and
+    # jobs get a degraded result (last analysis or pre-score) at once for
+    # AI_BREAKER_RESET_SECONDS; 0 failures disables the breaker
+    AI_CALL_DEADLINE_SECONDS = float(os.getenv('AI_CALL_DEADLINE_SECONDS', '180'))
+    AI_BREAKER_FAILURES = int(os.getenv('AI_BREAKER_FAILURES', '5'))
+    AI_BREAKER_RESET_SECONDS = float(os.getenv('AI_BREAKER_RESET_SECONDS', '60'))
+    
+    # Cache of parsed AI results keyed by a hash of the exact prompt
+    # (0 entries disables it; POST .../score?force=true bypasses it)
+    AI_RESULT_CACHE_TTL = int(os.getenv('AI_RESULT_CACHE_TTL', str(7 * 24 * 3600)))
+    AI_RESULT_CACHE_MAX_ENTRIES = int(os.getenv('AI_RESULT_CACHE_MAX_ENTRIES', '5000'))
+    AI_RESULT_CACHE_PATH = BASE_DIR / 'database' / 'ai_result_cache.db'
+    
+    # Days of per-call AI telemetry (tokens, latency, cost) to keep; 0 keeps all
+    AI_TELEMETRY_RETENTION_DAYS = int(os.getenv('AI_TELEMETRY_RETENTION_DAYS', '30'))
+    
+    # Scheduled re-scoring of active deals whose analysis is older than
+    # RESCORE_MAX_AGE_DAYS, run by scoring_worker.py when RESCORE_ENABLED.
+    # Runs only within RESCORE_HOURS (local, e.g. '1-6' or '22-5'), using
+    # at most RESCORE_DAILY_TOKENS a day and RESCORE_CONCURRENCY workers
+    RESCORE_ENABLED = os.getenv('RESCORE_ENABLED', 'False').lower() == 'true'
+    RESCORE_MAX_AGE_DAYS = int(os.getenv('RESCORE_MAX_AGE_DAYS', '14'))
+    RESCORE_DAILY_TOKENS = int(os.getenv('RESCORE_DAILY_TOKENS', '500000'))
+    RESCORE_CONCURRENCY = int(os.getenv('RESCORE_CONCURRENCY', '1'))
+    RESCORE_HOURS = os.getenv('RESCORE_HOURS', '1-6')
+    RESCORE_INTERVAL_SECONDS = int(os.getenv('RESCORE_INTERVAL_SECONDS', '900'))
+    
+    # Local rule-based pre-screen run before every AI scoring job. Deals
+    # scoring under PRE_SCORE_REJECT_BELOW are a clear reject; with
+    # PRE_SCORE_REJECT_MODE 'skip' they never reach the API, with 'defer'
+    # they are scored after everything else ('off' scores them as usual)
+    PRE_SCORE_REJECT_BELOW = int(os.getenv('PRE_SCORE_REJECT_BELOW', '30'))
+    PRE_SCORE_REJECT_MODE = os.getenv('PRE_SCORE_REJECT_MODE', 'off')
     
     # Upload settings (for later - file upload)
     UPLOAD_FOLDER = BASE_DIR / 'static' / 'uploads'
@@ -12,34 +12,343 @@ SCRIPT_DIR = Path(__file__).parent
 DATABASE_PATH = SCRIPT_DIR / "deals.db"
 SCHEMA_PATH = SCRIPT_DIR / "schema.sql"
 
+# Text sections of an analysis that are worth searching
+ANALYSIS_SEARCH_SECTIONS = [
+    'executive_summary', 'market_analysis', 'origin_analysis', 'buyer_profile',
+    'price_analysis', 'payment_logistics', 'red_flags', 'unusual_patterns',
+    'strengths', 'next_steps', 'recommendation'
+]
 
-def init_database():
+SEARCH_TRIGGERS = [
+    'deals_fts_insert', 'deals_fts_update', 'deals_fts_delete', 'deal_analyses_fts_insert'
+]
+
+
+def legacy_analysis_text_sql(column):
+    """SQL expression that flattens the text sections of a legacy ai_analysis JSON column"""
+    parts = [f"COALESCE(json_extract({column}, '$.{section}'), '')"
+             for section in ANALYSIS_SEARCH_SECTIONS]
+    flattened = " || ' ' || ".join(parts)
+    return f"CASE WHEN json_valid({column}) THEN {flattened} ELSE COALESCE({column}, '') END"
+
+
+def plain_text_sql(column):
     """
-    Initialize the database by:
-    1. Creating the database file if it doesn't exist
-    2. Running the schema.sql file to create tables
-    3. Verifying the tables were created successfully
+    SQL expression for a column's searchable text
+
+    Compressed values are BLOBs that SQL can't read; they index as ''
+    here and the model writes their plain text into deals_fts itself.
     """
-    
-    print("=" * 50)
-    print("DATABASE INITIALIZATION")
-    print("=" * 50)
-    
-    # Check if database already exists
-    if os.path.exists(DATABASE_PATH):
-        print(f"WARN: Database already exists at: {DATABASE_PATH}")
-        response = input("Do you want to recreate it? (y/n): ")
-        if response.lower() != 'y':
-            print("Initialization cancelled.")
-            return
-        else:
-            os.remove(DATABASE_PATH)
-            print("Old database deleted.")
+    return f"CASE WHEN typeof({column}) = 'blob' THEN '' ELSE COALESCE({column}, '') END"
 
-    # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
-    
-    conn = sqlite3.connect(DATABASE_PATH)
+
+def analysis_row_text_sql(alias):
+    """SQL expression that flattens the text sections of a deal_analyses row"""
+    return " || ' ' || ".join(plain_text_sql(f"{alias}.{section}") for section in ANALYSIS_SEARCH_SECTIONS)
+
+
+def analysis_search_text_sql(deal_id, legacy_column):
+    """
+    SQL expression for the searchable analysis text of one deal
+
+    Uses the deal's latest deal_analyses row, falling back to the legacy
+    ai_analysis column for deals that have not been migrated yet.
+    """
+    latest = (f"(SELECT {analysis_row_text_sql('a')} FROM deal_analyses a "
+              f"WHERE a.deal_id = {deal_id} ORDER BY a.id DESC LIMIT 1)")
+    return f"COALESCE({latest}, {legacy_analysis_text_sql(legacy_column)})"
+
+
+def create_search_index(cursor):
+    """
+    Create the deals_fts full-text index and the triggers that keep it in sync
+
+    A new index is backfilled from the existing deals. Triggers are
+    recreated on every run so older databases pick up changes to them.
+    Does nothing if the SQLite build lacks FTS5.
+
+    Returns:
+        True if the index exists, False if FTS5 is unavailable
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'deals_fts'")
+    exists = cursor.fetchone() is not None
+
+    try:
+        cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS deals_fts USING fts5(
+            source_name, deal_text, additional_notes, analysis,
+            tokenize = 'porter unicode61'
+        )
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"WARN: Full-text search disabled ({e})")
+        return False
+
+    for trigger in SEARCH_TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+    cursor.execute(f"""
+    CREATE TRIGGER deals_fts_insert
+    AFTER INSERT ON deals
+    BEGIN
+        INSERT INTO deals_fts (rowid, source_name, deal_text, additional_notes, analysis)
+        VALUES (NEW.id, NEW.source_name, {plain_text_sql('NEW.deal_text')}, NEW.additional_notes,
+                {analysis_search_text_sql('NEW.id', 'NEW.ai_analysis')});
+    END
+    """)
+    # Only touch the columns that changed: an unchanged compressed
+    # deal_text and the analysis text keep what the model indexed
+    cursor.execute(f"""
+    CREATE TRIGGER deals_fts_update
+    AFTER UPDATE OF source_name, deal_text, additional_notes, ai_analysis ON deals
+    BEGIN
+        UPDATE deals_fts SET
+            source_name = NEW.source_name,
+            deal_text = CASE WHEN NEW.deal_text IS OLD.deal_text THEN deal_text
+                             ELSE {plain_text_sql('NEW.deal_text')} END,
+            additional_notes = NEW.additional_notes,
+            analysis = CASE WHEN NEW.ai_analysis IS NOT NULL
+                            THEN {legacy_analysis_text_sql('NEW.ai_analysis')}
+                            ELSE analysis END
+        WHERE rowid = NEW.id;
+    END
+    """)
+    cursor.execute("""
+    CREATE TRIGGER deals_fts_delete
+    AFTER DELETE ON deals
+    BEGIN
+        DELETE FROM deals_fts WHERE rowid = OLD.id;
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER deal_analyses_fts_insert
+    AFTER INSERT ON deal_analyses
+    BEGIN
+        UPDATE deals_fts SET analysis = {analysis_row_text_sql('NEW')}
+        WHERE rowid = NEW.deal_id;
+    END
+    """)
+
+    if not exists:
+        rebuild_search_index(cursor)
+
+    return True
+
+
+def rebuild_search_index(cursor):
+    """
+    Repopulate deals_fts from the deals and deal_analyses tables
+
+    Compressed values index as ''; Deal.rebuild_search_index fills them in.
+    """
+    cursor.execute("DELETE FROM deals_fts")
+    cursor.execute(f"""
+        INSERT INTO deals_fts (rowid, source_name, deal_text, additional_notes, analysis)
+        SELECT id, source_name, {plain_text_sql('deal_text')}, additional_notes,
+               {analysis_search_text_sql('deals.id', 'ai_analysis')}
+        FROM deals
+    """)
+
+
+def create_analyses_table(cursor):
+    """
+    Create deal_analyses, which holds one row per AI scoring run
+
+    Mirrors the deal_analyses table in Supabase. List sections are JSON
+    arrays; inputs is a JSON snapshot of the deal fields the analysis was
+    based on, used to re-score only the sections an edit affects.
+    Deleting a deal deletes its analyses.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS deal_analyses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        deal_id INTEGER NOT NULL,
+        score REAL,
+        risk_level TEXT,
+        recommendation TEXT,
+        executive_summary TEXT,
+        market_analysis TEXT,
+        origin_analysis TEXT,
+        buyer_profile TEXT,
+        price_analysis TEXT,
+        payment_logistics TEXT,
+        red_flags TEXT,
+        unusual_patterns TEXT,
+        strengths TEXT,
+        next_steps TEXT,
+        reasoning TEXT,
+        model TEXT,
+        inputs TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    ensure_columns(cursor, 'deal_analyses', {'inputs': 'TEXT'})
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_deal_analyses_deal
+    ON deal_analyses(deal_id, id DESC)
+    """)
+    cursor.execute("""
+    CREATE TRIGGER IF NOT EXISTS deal_analyses_cascade_delete
+    AFTER DELETE ON deals
+    BEGIN
+        DELETE FROM deal_analyses WHERE deal_id = OLD.id;
+    END
+    """)
+
+
+def create_jobs_table(cursor):
+    """
+    Create scoring_jobs, the persistent queue for background AI scoring
+
+    status moves queued -> running -> done | failed. A running job whose
+    lease_until (unix time) has passed belonged to a worker that died and
+    may be claimed again. options holds JSON keyword arguments for the
+    job handler (e.g. {"force": true}); partial holds the analysis
+    sections streamed so far by a running job. Jobs with a lower priority
+    (deferred jobs) run only once nothing else is waiting. input_hash
+    identifies the deal fields a job was queued for, so a second request
+    for the same unchanged deal can join the job instead of adding one.
+
+    Jobs created together by the batch endpoint share a scoring_batches
+    row, whose concurrency caps how many of them run at once.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS scoring_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        deal_id INTEGER NOT NULL,
+        batch_id INTEGER,
+        options TEXT,
+        priority INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        worker TEXT,
+        lease_until REAL,
+        partial TEXT,
+        input_hash TEXT,
+        result TEXT,
+        error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+    """)
+    ensure_columns(cursor, 'scoring_jobs', {
+        'options': 'TEXT',
+        'batch_id': 'INTEGER',
+        'partial': 'TEXT',
+        'priority': 'INTEGER NOT NULL DEFAULT 0',
+        'input_hash': 'TEXT',
+    })
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS scoring_batches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        concurrency INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_scoring_jobs_status
+    ON scoring_jobs(status, id)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_scoring_jobs_deal
+    ON scoring_jobs(deal_id, id DESC)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_scoring_jobs_batch
+    ON scoring_jobs(batch_id, status)
+    """)
+
+
+def create_telemetry_table(cursor):
+    """
+    Create ai_calls, which holds one row per AI scoring API call
+
+    Token counts, time to first token (streamed calls only) and total
+    latency in ms, stop reason, whether the response parsed completely
+    and which fields were recovered from it (JSON list), how many 429/529
+    retries it took and its estimated cost. Failed calls
+    keep their error. Not tied to deals, so history outlives deletions.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS ai_calls (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        deal_id INTEGER,
+        model TEXT,
+        streamed INTEGER NOT NULL DEFAULT 0,
+        partial INTEGER NOT NULL DEFAULT 0,
+        input_tokens INTEGER,
+        output_tokens INTEGER,
+        cache_creation_input_tokens INTEGER,
+        cache_read_input_tokens INTEGER,
+        cost_usd REAL,
+        ttft_ms REAL,
+        latency_ms REAL,
+        stop_reason TEXT,
+        parsed INTEGER,
+        recovered_fields TEXT,
+        retries INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    ensure_columns(cursor, 'ai_calls', {'recovered_fields': 'TEXT'})
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_ai_calls_created
+    ON ai_calls(created_at)
+    """)
+
+
+def create_rescore_table(cursor):
+    """
+    Create rescore_runs, one row per batch queued by the re-score scheduler
+
+    deal_ids is the JSON list of deals queued; the budget figures are the
+    ones the run was sized with. Progress and actual token use come from
+    the batch's scoring_jobs.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS rescore_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        batch_id INTEGER NOT NULL,
+        deal_ids TEXT,
+        token_budget INTEGER,
+        tokens_used_before INTEGER,
+        tokens_per_deal INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def ensure_columns(cursor, table, columns):
+    """
+    Add any missing columns to an existing table
+
+    Args:
+        cursor: sqlite3 cursor
+        table: Table name
+        columns: Dictionary of column name -> column definition
+    """
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def create_schema(conn):
+    """
+    Create all tables and indexes on an open connection
+
+    Every statement is idempotent, so this is safe to run against an
+    existing database to bring it up to date.
+
+    Args:
+        conn: sqlite3 connection
+
+    Returns:
+        List of table names that were ensured
+    """
     cursor = conn.cursor()
     
     # Enable foreign keys
@@ -80,18 +389,211 @@ def init_database():
         date_received TEXT NOT NULL,
         status TEXT DEFAULT 'unassigned',
         ai_score REAL,
+        ai_risk_level TEXT,
+        ai_recommendation TEXT,
         ai_reasoning TEXT,
         ai_analysis TEXT,
         price_type TEXT DEFAULT 'fixed_price',
         gross_discount REAL,
         commission REAL,
         net_discount REAL,
+        pre_score REAL,
+        pre_risk_level TEXT,
+        pre_analysis TEXT,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     """)
     tables.append("deals")
+
+    # Older databases predate the summary AI and pre-score columns
+    ensure_columns(cursor, 'deals', {
+        'ai_risk_level': 'TEXT',
+        'ai_recommendation': 'TEXT',
+        'pre_score': 'REAL',
+        'pre_risk_level': 'TEXT',
+        'pre_analysis': 'TEXT',
+    })
+
+    # One row per AI scoring run; deals only keep score/risk/recommendation
+    create_analyses_table(cursor)
+    tables.append("deal_analyses")
+
+    # Composite indexes for keyset pagination (newest first, id tiebreak)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_deals_date_id
+    ON deals(date_received DESC, id DESC)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_deals_status_date_id
+    ON deals(status, date_received DESC, id DESC)
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_deals_commodity_date_id
+    ON deals(commodity_type, date_received DESC, id DESC)
+    """)
+
+    # Full-text search over deal text, notes, source and AI analysis
+    create_search_index(cursor)
+
+    # Incrementally maintained dashboard statistics
+    create_statistics_table(cursor)
+    tables.append("deal_stats")
+
+    # Global change counter for ETags
+    create_change_counter(cursor)
+    tables.append("change_counter")
+
+    # Background AI scoring queue
+    create_jobs_table(cursor)
+    tables.append("scoring_jobs")
+
+    # Tokens, latency and cost of each AI scoring call
+    create_telemetry_table(cursor)
+    tables.append("ai_calls")
+
+    # Scheduled re-scoring of stale analyses
+    create_rescore_table(cursor)
+    tables.append("rescore_runs")
     
+    conn.commit()
+    return tables
+
+
+def _stats_upsert_sql(row, sign):
+    """Trigger statements that add (sign=1) or remove (sign=-1) one deal row from deal_stats"""
+    statements = []
+    for dimension, key in (('total', "''"),
+                           ('status', f"IFNULL({row}.status, '')"),
+                           ('commodity', f"IFNULL({row}.commodity_type, '')")):
+        statements.append(f"""
+        INSERT INTO deal_stats (dimension, key, deal_count, score_count, score_sum)
+        VALUES ('{dimension}', {key}, {sign},
+                {sign} * ({row}.ai_score IS NOT NULL), {sign} * IFNULL({row}.ai_score, 0))
+        ON CONFLICT (dimension, key) DO UPDATE SET
+            deal_count = deal_count + excluded.deal_count,
+            score_count = score_count + excluded.score_count,
+            score_sum = score_sum + excluded.score_sum;""")
+    return ''.join(statements)
+
+
+def create_statistics_table(cursor):
+    """
+    Create the deal_stats table and the triggers that keep it current
+
+    deal_stats holds one row per (dimension, key): the overall total, each
+    status and each commodity, with deal counts and running AI score sums.
+    A new table is backfilled from the existing deals.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'deal_stats'")
+    exists = cursor.fetchone() is not None
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS deal_stats (
+        dimension TEXT NOT NULL,
+        key TEXT NOT NULL,
+        deal_count INTEGER NOT NULL DEFAULT 0,
+        score_count INTEGER NOT NULL DEFAULT 0,
+        score_sum REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, key)
+    ) WITHOUT ROWID
+    """)
+
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS deal_stats_insert
+    AFTER INSERT ON deals
+    BEGIN
+        {_stats_upsert_sql('NEW', 1)}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS deal_stats_update
+    AFTER UPDATE OF status, commodity_type, ai_score ON deals
+    BEGIN
+        {_stats_upsert_sql('OLD', -1)}
+        {_stats_upsert_sql('NEW', 1)}
+    END
+    """)
+    cursor.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS deal_stats_delete
+    AFTER DELETE ON deals
+    BEGIN
+        {_stats_upsert_sql('OLD', -1)}
+    END
+    """)
+
+    if not exists:
+        rebuild_statistics(cursor)
+
+
+def rebuild_statistics(cursor):
+    """Recompute deal_stats from a full scan of the deals table"""
+    cursor.execute("DELETE FROM deal_stats")
+    for dimension, key in (('total', "''"),
+                           ('status', "IFNULL(status, '')"),
+                           ('commodity', "IFNULL(commodity_type, '')")):
+        cursor.execute(f"""
+            INSERT INTO deal_stats (dimension, key, deal_count, score_count, score_sum)
+            SELECT '{dimension}', {key}, COUNT(*), COUNT(ai_score), IFNULL(SUM(ai_score), 0)
+            FROM deals
+            GROUP BY {key}
+        """)
+
+
+def create_change_counter(cursor):
+    """
+    Create the change_counter table and the triggers that bump it
+
+    change_counter holds a single version number that increases on every
+    insert, update or delete of a deal, whichever process made the change.
+    It is what ETags are derived from.
+    """
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS change_counter (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    cursor.execute("INSERT OR IGNORE INTO change_counter (id, version) VALUES (1, 0)")
+
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS change_counter_deals_{event.lower()}
+        AFTER {event} ON deals
+        BEGIN
+            UPDATE change_counter SET version = version + 1 WHERE id = 1;
+        END
+        """)
+
+
+def init_database():
+    """
+    Initialize the database by:
+    1. Creating the database file if it doesn't exist
+    2. Running the schema.sql file to create tables
+    3. Verifying the tables were created successfully
+    """
+    
+    print("=" * 50)
+    print("DATABASE INITIALIZATION")
+    print("=" * 50)
+    
+    # Check if database already exists
+    if os.path.exists(DATABASE_PATH):
+        print(f"WARN: Database already exists at: {DATABASE_PATH}")
+        response = input("Do you want to recreate it? (y/n): ")
+        if response.lower() != 'y':
+            print("Initialization cancelled.")
+            return
+        else:
+            os.remove(DATABASE_PATH)
+            print("Old database deleted.")
+
+    # Create directory if it doesn't exist
+    os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
+    
+    conn = sqlite3.connect(DATABASE_PATH)
+    create_schema(conn)
     conn.commit()
     conn.close()
     
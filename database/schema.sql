@@ -83,6 +83,11 @@ CREATE INDEX IF NOT EXISTS idx_deals_date ON deals(date_received DESC);
 CREATE INDEX IF NOT EXISTS idx_deals_score ON deals(ai_score DESC);
 CREATE INDEX IF NOT EXISTS idx_deals_source ON deals(source_name);
 
+-- Composite indexes for keyset pagination (newest first, id tiebreak)
+CREATE INDEX IF NOT EXISTS idx_deals_date_id ON deals(date_received DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_deals_status_date_id ON deals(status, date_received DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_deals_commodity_date_id ON deals(commodity_type, date_received DESC, id DESC);
+
 -- ============================================
 -- TABLE: status_history
 -- Tracks all status changes for deals
@@ -0,0 +1,251 @@
+"""
+Load-test AI scoring end to end
+
+Drives POST /api/deals/<id>/score at a fixed concurrency, follows each
+job to completion through /api/jobs/<id>, and reports throughput and
+latency percentiles for enqueueing and for the whole job.
+
+By default everything runs in this process with no network: a temporary
+database, the app on a local port with its scoring workers, and
+mock_anthropic.py standing in for the API. Pass --url to load an app
+that is already running instead (point it at a mock or at recordings so
+no real API calls are made).
+
+Usage:
+  python load_test.py [--requests 100] [--concurrency 8] [--workers 4] [--scoring-mode async]
+                      [--latency 0.5] [--tokens-per-second 400]
+                      [--rate-limit-rate 0.05] [--truncate-rate 0] [--url URL]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import mock_anthropic
+
+COMMODITIES = ['Gold', 'Copper', 'Aluminum', 'Iron Ore', 'Wheat', 'Soybean', 'Oil']
+ORIGINS = ['Ghana', 'Mali', 'Chile', 'Peru', 'Brazil', 'Guinea', 'Kazakhstan']
+PAYMENTS = ['SBLC', 'LC', 'DLC', 'BCL', 'Wire Transfer']
+
+
+def call(base_url, method, path, payload=None):
+    """Make a JSON request; returns (status, body)"""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b'{}')
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def start_local_app(args):
+    """
+    Start the mock API and the app in this process
+
+    Returns:
+        (app base URL, mock base URL)
+    """
+    mock_options = mock_anthropic.build_parser().parse_args([
+        '--port', '0',
+        '--latency', str(args.latency),
+        '--tokens-per-second', str(args.tokens_per_second),
+        '--rate-limit-rate', str(args.rate_limit_rate),
+        '--overload-rate', str(args.overload_rate),
+        '--truncate-rate', str(args.truncate_rate),
+        '--retry-after', '0.5',
+    ])
+    mock_server, _ = mock_anthropic.start_server(mock_options)
+    mock_url = f"http://127.0.0.1:{mock_server.server_port}"
+
+    # Settings are read when config is imported
+    workdir = tempfile.mkdtemp(prefix='load_test_')
+    os.environ.update({
+        'ANTHROPIC_API_KEY': os.environ.get('ANTHROPIC_API_KEY') or 'load-test',
+        'ANTHROPIC_BASE_URL': mock_url,
+        'AI_RECORDING_MODE': 'off',
+        'SCORING_WORKERS': str(args.workers),
+        'SCORING_MODE': args.scoring_mode,
+        'AI_ASYNC_CONCURRENCY': str(max(args.workers, 1)),
+        'SCORING_BATCH_CONCURRENCY': str(args.workers),
+        'AI_REQUESTS_PER_MINUTE': str(args.api_rpm),
+        'AI_BACKOFF_BASE': '0.5',
+        'AI_MAX_CONNECTIONS': str(max(args.workers, 1)),
+        'FLASK_DEBUG': 'False',
+    })
+    from config import Config
+    Config.DATABASE_PATH = os.path.join(workdir, 'deals.db')
+    Config.RESPONSE_CACHE_PATH = os.path.join(workdir, 'response_cache.db')
+    Config.AI_RESULT_CACHE_PATH = os.path.join(workdir, 'ai_result_cache.db')
+
+    from werkzeug.serving import make_server, WSGIRequestHandler
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", mock_url
+
+
+def seed_deals(base_url, count, rng):
+    """Create sample deals; returns their IDs"""
+    deals = [{
+        'commodity_type': rng.choice(COMMODITIES),
+        'source_name': f"Load test source {i % 10}",
+        'source_reliability': rng.randint(3, 10),
+        'origin_country': rng.choice(ORIGINS),
+        'payment_method': rng.choice(PAYMENTS),
+        'shipping_terms': 'CIF Rotterdam',
+        'price_type': 'lme_discount',
+        'gross_discount': -rng.randint(4, 16),
+        'commission': 1,
+        'deal_text': f"Load test deal {i}: offer of {rng.randint(10, 500)} MT, documents on request.",
+        'date_received': '2025-06-01',
+    } for i in range(count)]
+    status, body = call(base_url, 'POST', '/api/deals/bulk', {'deals': deals})
+    if status not in (200, 201):
+        raise SystemExit(f"Could not create deals: {status} {body}")
+    return [result['deal_id'] for result in body['results'] if result.get('deal_id')]
+
+
+def run_load(base_url, deal_ids, total, concurrency, poll, force):
+    """
+    Score deals from several client threads
+
+    Returns:
+        List of per-request records (enqueue_ms, total_ms, status, ...)
+    """
+    records = []
+    lock = threading.Lock()
+    counter = iter(range(total))
+    path_suffix = '?force=true' if force else ''
+
+    def client():
+        while True:
+            with lock:
+                index = next(counter, None)
+            if index is None:
+                return
+
+            deal_id = deal_ids[index % len(deal_ids)]
+            start = time.perf_counter()
+            status, body = call(base_url, 'POST', f"/api/deals/{deal_id}/score{path_suffix}")
+            enqueued = time.perf_counter()
+            record = {'deal_id': deal_id, 'enqueue_ms': (enqueued - start) * 1000}
+            if status != 202:
+                record.update(status='rejected', error=body.get('error'))
+            else:
+                while True:
+                    time.sleep(poll)
+                    _, job = call(base_url, 'GET', f"/api/jobs/{body['job_id']}")
+                    job = job.get('job') or {}
+                    if job.get('status') in ('done', 'failed'):
+                        break
+                result = job.get('result') or {}
+                record.update(status=job['status'], error=job.get('error'),
+                              attempts=job.get('attempts'), cached=result.get('cached'),
+                              truncated=(result.get('parse_report') or {}).get('truncated'))
+            record['total_ms'] = (time.perf_counter() - start) * 1000
+            with lock:
+                records.append(record)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records
+
+
+def print_report(records, elapsed, job_stats, mock_stats, ai_metrics=None):
+    done = [r for r in records if r['status'] == 'done']
+    print(f"\nRequests: {len(records)} in {elapsed:.1f}s | done {len(done)} | "
+          f"failed {sum(r['status'] == 'failed' for r in records)} | "
+          f"rejected {sum(r['status'] == 'rejected' for r in records)} | "
+          f"truncated {sum(bool(r.get('truncated')) for r in done)}")
+    print(f"Throughput: {len(done) / elapsed:.2f} jobs/s ({len(done) / elapsed * 60:.0f} jobs/min)")
+
+    print(f"\n{'latency (ms)':16} {'p50':>9} {'p90':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for label, key, rows in (('enqueue', 'enqueue_ms', records), ('job total', 'total_ms', done)):
+        values = [r[key] for r in rows]
+        cells = [percentile(values, p) for p in (50, 90, 95, 99, 100)]
+        print(f"{label:16} " + ' '.join(f"{v:9.0f}" if v is not None else f"{'-':>9}" for v in cells))
+
+    errors = {}
+    for r in records:
+        if r.get('error') and r['status'] != 'done':
+            errors[r['error']] = errors.get(r['error'], 0) + 1
+    for error, count in sorted(errors.items(), key=lambda item: -item[1])[:5]:
+        print(f"  {count} x {error}")
+
+    if job_stats:
+        print(f"\nRate limiter: {job_stats.get('rate_limiter')}")
+        print(f"Connections:  {job_stats.get('connections')}")
+    if ai_metrics:
+        print(f"AI calls:     {ai_metrics['calls']} | latency {ai_metrics['latency_ms']} | "
+              f"ttft {ai_metrics['ttft_ms']} | retries {ai_metrics['retries']} | "
+              f"truncation {ai_metrics['truncation_rate']}")
+    if mock_stats:
+        print(f"Mock API:     {mock_stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--url', help='Load an already running app instead of starting one')
+    parser.add_argument('--deals', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads')
+    parser.add_argument('--workers', type=int, default=4, help='Scoring workers (local app only)')
+    parser.add_argument('--scoring-mode', choices=['threads', 'async'], default='threads',
+                        help='Worker threads, or --workers jobs on one event loop (local app only)')
+    parser.add_argument('--api-rpm', type=int, default=0, help='App rate limit (local app only)')
+    parser.add_argument('--poll', type=float, default=0.2, help='Seconds between job status checks')
+    parser.add_argument('--no-force', action='store_true', help='Allow cached AI results')
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--tokens-per-second', type=float, default=400)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--overload-rate', type=float, default=0.0)
+    parser.add_argument('--truncate-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    mock_url = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        base_url, mock_url = start_local_app(args)
+
+    print("=" * 60)
+    print(f"Load test: {args.requests} requests, concurrency {args.concurrency}, app {base_url}")
+    print("=" * 60)
+
+    deal_ids = seed_deals(base_url, args.deals, rng)
+    start = time.perf_counter()
+    records = run_load(base_url, deal_ids, args.requests, args.concurrency, args.poll, not args.no_force)
+    elapsed = time.perf_counter() - start
+
+    _, job_stats = call(base_url, 'GET', '/api/jobs/stats')
+    mock_stats = call(mock_url, 'GET', '/stats')[1] if mock_url else None
+    status, metrics = call(base_url, 'GET', f"/api/metrics/ai?hours={elapsed / 3600 + 0.01}")
+    print_report(records, elapsed, job_stats, mock_stats, metrics.get('metrics') if status == 200 else None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Move AI analyses out of the deals table into deal_analyses
+
+Older versions stored every scoring run as JSON in deals.ai_analysis and
+deals.ai_reasoning. This copies each one into a deal_analyses row, fills
+in deals.ai_risk_level / ai_recommendation, and clears the old columns,
+one batch per transaction. Safe to re-run.
+
+Usage:
+  python migrate_analyses.py [--batch-size 500]
+"""
+import argparse
+
+from config import Config
+from models.deal import Deal
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Normalize AI analyses into deal_analyses')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    deal_model = Deal(Config.DATABASE_PATH)
+    deal_model.ensure_schema()
+
+    print("=" * 60)
+    print("Migrating AI analyses to deal_analyses")
+    print("=" * 60)
+
+    migrated = deal_model.migrate_legacy_analyses(
+        batch_size=args.batch_size,
+        progress=lambda count: print(f"  {count} deals migrated...")
+    )
+
+    print(f"\n✅ Done: {migrated} deal(s) migrated")
+
+
+if __name__ == '__main__':
+    main()
@@ -18,6 +18,9 @@ import uuid
 from pathlib import Path
 from datetime import datetime
 
+from models.analysis import row_to_analysis
+from models.compression import decompress_fields
+
 try:
     from supabase import create_client, Client
     from dotenv import load_dotenv
@@ -55,7 +58,20 @@ def get_sqlite_data():
 
     # Get deals
     cursor.execute("SELECT * FROM deals")
-    deals = [dict(row) for row in cursor.fetchall()]
+    deals = [decompress_fields(dict(row), ['deal_text']) for row in cursor.fetchall()]
+
+    # Attach the latest normalized analysis, if the deal_analyses table exists
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'deal_analyses'")
+    if cursor.fetchone():
+        cursor.execute("""
+            SELECT * FROM deal_analyses
+            WHERE id IN (SELECT MAX(id) FROM deal_analyses GROUP BY deal_id)
+        """)
+        latest = {row['deal_id']: row_to_analysis(row) for row in cursor.fetchall()}
+        for deal in deals:
+            analysis = latest.get(deal['id'])
+            if analysis:
+                deal['ai_analysis'] = analysis
 
     conn.close()
     return sources, deals
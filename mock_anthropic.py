@@ -0,0 +1,315 @@
+"""
+Local stand-in for the Anthropic Messages API
+
+Answers POST /v1/messages (plain and streaming) with synthetic deal
+analyses, or with responses recorded by AI_RECORDING_MODE=record, so the
+scoring pipeline can be exercised and load-tested without network or
+API spend. Latency, generation speed, 429/529/500 errors, a per-minute
+request limit and max_tokens truncation are all configurable.
+GET /stats returns what the server has seen.
+
+Point the app at it with ANTHROPIC_BASE_URL=http://127.0.0.1:8765 (any
+ANTHROPIC_API_KEY works).
+
+Usage:
+  python mock_anthropic.py [--port 8765] [--latency 0.5] [--tokens-per-second 400]
+                           [--rate-limit-rate 0.05] [--overload-rate 0] [--error-rate 0]
+                           [--rpm 0] [--truncate-rate 0] [--recordings DIR]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from models.analysis import TEXT_FIELDS, LIST_FIELDS
+from services.recording import request_key
+
+PHRASES = (
+    'LME-linked pricing', 'refinery assay on arrival', 'SBLC from a tier-one bank',
+    'export licence from the minerals commission', 'CIF Dubai delivery', 'escrow release against assay',
+    'unverified mandate chain', 'discount within the regional norm', 'buyer KYC pending',
+    'Incoterms consistent with the route', 'recent export policy changes', 'seasonal supply tightness'
+)
+
+
+def synthetic_analysis(prompt):
+    """A plausible scoring response, deterministic for a given prompt"""
+    rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).digest())
+
+    def paragraph():
+        return ' '.join(f"The deal shows {rng.choice(PHRASES)} and {rng.choice(PHRASES)}."
+                        for _ in range(rng.randint(3, 6)))
+
+    analysis = {'score': rng.randint(20, 90)}
+    for field in TEXT_FIELDS:
+        analysis[field] = '\n\n'.join(paragraph() for _ in range(rng.randint(2, 3)))
+    for field in LIST_FIELDS:
+        analysis[field] = [f"{rng.choice(PHRASES).capitalize()} ({i + 1})" for i in range(rng.randint(3, 8))]
+    analysis['recommendation'] = paragraph()
+    analysis['risk_level'] = 'low' if analysis['score'] >= 70 else 'high' if analysis['score'] < 50 else 'medium'
+    return json.dumps(analysis, indent=2)
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class MockState:
+    """Options and counters shared by every request handler"""
+
+    def __init__(self, options):
+        self.options = options
+        self.rng = random.Random(options.seed)
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.cached_prefixes = set()
+        self.stats = {'requests': 0, 'streamed': 0, 'status': {}, 'truncated': 0, 'abandoned': 0,
+                      'input_tokens': 0, 'output_tokens': 0, 'cache_read_input_tokens': 0,
+                      'in_flight': 0, 'max_in_flight': 0}
+        self.recordings = {}
+        if options.recordings:
+            for path in glob.glob(os.path.join(options.recordings, '*.json')):
+                with open(path, encoding='utf-8') as f:
+                    record = json.load(f)
+                self.recordings[record['key']] = record['message']
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def injected_error(self):
+        """Status code to fail this request with, or None"""
+        with self.lock:
+            now = time.monotonic()
+            if self.options.rpm:
+                while self.recent and now - self.recent[0] > 60:
+                    self.recent.popleft()
+                if len(self.recent) >= self.options.rpm:
+                    return 429
+                self.recent.append(now)
+            roll = self.rng.random()
+        for status, rate in ((429, self.options.rate_limit_rate), (529, self.options.overload_rate),
+                             (500, self.options.error_rate)):
+            if roll < rate:
+                return status
+            roll -= rate
+        return None
+
+    def response_text(self, body):
+        """Recorded text for this request if there is one, else synthetic"""
+        recorded = self.recordings.get(request_key(body))
+        if recorded is None and self.recordings:
+            recorded = self.rng.choice(list(self.recordings.values()))
+        if recorded is not None:
+            return ''.join(block.get('text', '') for block in recorded['content'])
+        prompt = ''.join(m['content'] if isinstance(m['content'], str) else json.dumps(m['content'])
+                         for m in body.get('messages', []))
+        return synthetic_analysis(prompt)
+
+    def usage(self, body, output_tokens):
+        """Input token usage, simulating prompt caching of a marked system prompt"""
+        system = body.get('system') or ''
+        if isinstance(system, list):
+            cacheable = any(block.get('cache_control') for block in system)
+            system = ''.join(block.get('text', '') for block in system)
+        else:
+            cacheable = False
+        prompt = json.dumps(body.get('messages', []))
+        usage = {'input_tokens': estimate_tokens(prompt), 'output_tokens': output_tokens,
+                 'cache_creation_input_tokens': 0, 'cache_read_input_tokens': 0}
+
+        system_tokens = estimate_tokens(system) if system else 0
+        if cacheable:
+            with self.lock:
+                hit = system in self.cached_prefixes
+                self.cached_prefixes.add(system)
+            usage['cache_read_input_tokens' if hit else 'cache_creation_input_tokens'] = system_tokens
+        else:
+            usage['input_tokens'] += system_tokens
+        return usage
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    state = None
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            with self.state.lock:
+                stats = json.loads(json.dumps(self.state.stats))
+            self._send_json(200, stats)
+        else:
+            self._send_json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': 'Not found'}})
+
+    def do_POST(self):
+        state = self.state
+        body = json.loads(self.rfile.read(int(self.headers.get('content-length', 0))) or b'{}')
+        if self.path.split('?')[0].rstrip('/') != '/v1/messages':
+            self._send_json(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': 'Not found'}})
+            return
+
+        state.count('requests')
+        status = state.injected_error()
+        if status is not None:
+            with state.lock:
+                state.stats['status'][str(status)] = state.stats['status'].get(str(status), 0) + 1
+            error_type = {429: 'rate_limit_error', 529: 'overloaded_error'}.get(status, 'api_error')
+            headers = {'retry-after': str(state.options.retry_after)} if status == 429 else None
+            self._send_json(status, {'type': 'error', 'error': {'type': error_type, 'message': 'Injected by mock'}},
+                            headers)
+            return
+
+        text = state.response_text(body)
+        stop_reason = 'end_turn'
+        max_chars = int(body.get('max_tokens', 4096)) * 4
+        with state.lock:
+            cut = state.rng.uniform(0.3, 0.9) if state.rng.random() < state.options.truncate_rate else None
+        if cut is not None:
+            text = text[:int(len(text) * cut)]
+        if cut is not None or len(text) > max_chars:
+            text = text[:max_chars]
+            stop_reason = 'max_tokens'
+            state.count('truncated')
+
+        output_tokens = estimate_tokens(text)
+        usage = state.usage(body, output_tokens)
+        state.count('input_tokens', usage['input_tokens'])
+        state.count('output_tokens', output_tokens)
+        state.count('cache_read_input_tokens', usage['cache_read_input_tokens'])
+        message = {
+            'id': f"msg_mock_{random.getrandbits(48):012x}", 'type': 'message', 'role': 'assistant',
+            'model': body.get('model', 'mock'), 'content': [{'type': 'text', 'text': text}],
+            'stop_reason': stop_reason, 'stop_sequence': None, 'usage': usage
+        }
+
+        with state.lock:
+            state.stats['in_flight'] += 1
+            state.stats['max_in_flight'] = max(state.stats['max_in_flight'], state.stats['in_flight'])
+            state.stats['status']['200'] = state.stats['status'].get('200', 0) + 1
+        try:
+            latency = max(0.0, random.gauss(state.options.latency, state.options.latency * 0.2))
+            generation = output_tokens / state.options.tokens_per_second if state.options.tokens_per_second else 0
+            if body.get('stream'):
+                state.count('streamed')
+                self._stream(message, text, latency, generation)
+            else:
+                time.sleep(latency + generation)
+                self._send_json(200, message)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up first (e.g. its deadline passed)
+            state.count('abandoned')
+        finally:
+            state.count('in_flight', -1)
+
+    def _stream(self, message, text, latency, generation):
+        """Send the message as server-sent events, paced like generation"""
+        self.send_response(200)
+        self.send_header('content-type', 'text/event-stream')
+        self.send_header('transfer-encoding', 'chunked')
+        self.end_headers()
+
+        def event(name, data):
+            payload = f"event: {name}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(payload):x}\r\n".encode('ascii') + payload + b"\r\n")
+            self.wfile.flush()
+
+        time.sleep(latency)
+        start = dict(message, content=[], stop_reason=None,
+                     usage=dict(message['usage'], output_tokens=1))
+        event('message_start', {'type': 'message_start', 'message': start})
+        event('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                      'content_block': {'type': 'text', 'text': ''}})
+        chunk = 64
+        pieces = max(1, (len(text) + chunk - 1) // chunk)
+        for i in range(0, len(text), chunk):
+            event('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                          'delta': {'type': 'text_delta', 'text': text[i:i + chunk]}})
+            time.sleep(generation / pieces)
+        event('content_block_stop', {'type': 'content_block_stop', 'index': 0})
+        event('message_delta', {'type': 'message_delta',
+                                'delta': {'stop_reason': message['stop_reason'], 'stop_sequence': None},
+                                'usage': {'output_tokens': message['usage']['output_tokens']}})
+        event('message_stop', {'type': 'message_stop'})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Room for hundreds of clients connecting at once (benchmark_async.py)
+    request_queue_size = 1024
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds to first token')
+    parser.add_argument('--tokens-per-second', type=float, default=400, help='0 = instant')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Share of requests answered 429')
+    parser.add_argument('--overload-rate', type=float, default=0.0, help='Share answered 529')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share answered 500')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='retry-after sent with 429s')
+    parser.add_argument('--rpm', type=int, default=0, help='Requests per minute before 429s (0 = no limit)')
+    parser.add_argument('--truncate-rate', type=float, default=0.0,
+                        help='Share of responses cut off with stop_reason max_tokens')
+    parser.add_argument('--recordings', help='Serve responses recorded with AI_RECORDING_MODE=record')
+    parser.add_argument('--seed', type=int, default=None)
+    return parser
+
+
+def start_server(options):
+    """
+    Start the mock in a background thread
+
+    Args:
+        options: Namespace from build_parser() (see its defaults)
+
+    Returns:
+        (server, state); the API is at http://host:server.server_port
+    """
+    state = MockState(options)
+    handler = type('BoundMockHandler', (MockHandler,), {'state': state})
+    server = MockServer((options.host, options.port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main():
+    options = build_parser().parse_args()
+    server, state = start_server(options)
+    print("=" * 60)
+    print(f"Mock Messages API on http://{options.host}:{server.server_port}")
+    print(f"  latency={options.latency}s tokens/s={options.tokens_per_second} "
+          f"429={options.rate_limit_rate:.0%} 529={options.overload_rate:.0%} "
+          f"500={options.error_rate:.0%} rpm={options.rpm or 'unlimited'} "
+          f"truncate={options.truncate_rate:.0%} recordings={len(state.recordings)}")
+    print("=" * 60)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
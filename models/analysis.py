@@ -0,0 +1,111 @@
+"""
+Analysis helpers - Shapes AI scoring results for the deal_analyses table
+"""
+import json
+from models.compression import decompress_text
+
+# Free-text sections of an analysis
+TEXT_FIELDS = (
+    'executive_summary', 'market_analysis', 'origin_analysis', 'buyer_profile',
+    'price_analysis', 'payment_logistics'
+)
+
+# Sections stored as JSON arrays
+LIST_FIELDS = ('red_flags', 'unusual_patterns', 'strengths', 'next_steps', 'reasoning')
+
+ANALYSIS_COLUMNS = ('score', 'risk_level', 'recommendation') + TEXT_FIELDS + LIST_FIELDS
+
+RISK_LEVELS = ('low', 'medium', 'high')
+
+# Sections indexed for full-text search (same order as init_db)
+SEARCH_SECTIONS = TEXT_FIELDS + ('red_flags', 'unusual_patterns', 'strengths', 'next_steps', 'recommendation')
+
+
+def safe_list(value):
+    """Coerce a section value into a list of strings"""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str) and value.strip():
+        return [value]
+    return []
+
+
+def analysis_row(result):
+    """
+    Build deal_analyses column values from a scoring result
+
+    Args:
+        result: Dictionary returned by AIScorer.score_deal (or a legacy
+            ai_analysis dictionary)
+
+    Returns:
+        Dictionary keyed by ANALYSIS_COLUMNS
+    """
+    row = {
+        'score': result.get('score'),
+        'risk_level': result.get('risk_level') if result.get('risk_level') in RISK_LEVELS else None,
+        'recommendation': result.get('recommendation'),
+    }
+    for field in TEXT_FIELDS:
+        row[field] = result.get(field)
+    for field in LIST_FIELDS:
+        row[field] = json.dumps(safe_list(result.get(field)))
+    return row
+
+
+def row_to_analysis(row):
+    """Turn a deal_analyses row into the analysis dictionary the UI expects"""
+    analysis = dict(row)
+    for field in TEXT_FIELDS + LIST_FIELDS + ('recommendation',):
+        if field in analysis:
+            analysis[field] = decompress_text(analysis[field])
+    for field in LIST_FIELDS:
+        try:
+            analysis[field] = json.loads(analysis[field]) if analysis.get(field) else []
+        except (TypeError, ValueError):
+            analysis[field] = safe_list(analysis[field])
+    if isinstance(analysis.get('inputs'), str):
+        try:
+            analysis['inputs'] = json.loads(analysis['inputs'])
+        except ValueError:
+            analysis['inputs'] = None
+    return analysis
+
+
+def parse_legacy_analysis(ai_analysis, ai_reasoning):
+    """
+    Read the old ai_analysis / ai_reasoning JSON columns of a deals row
+
+    Returns:
+        Analysis dictionary, or an empty dictionary if nothing usable
+    """
+    analysis = {}
+
+    if ai_analysis:
+        try:
+            parsed = json.loads(ai_analysis) if isinstance(ai_analysis, str) else ai_analysis
+            if isinstance(parsed, dict):
+                analysis = parsed
+        except (TypeError, ValueError):
+            pass
+
+    if ai_reasoning and 'reasoning' not in analysis:
+        try:
+            parsed = json.loads(ai_reasoning) if isinstance(ai_reasoning, str) else ai_reasoning
+            analysis['reasoning'] = safe_list(parsed)
+        except (TypeError, ValueError):
+            analysis['reasoning'] = safe_list(ai_reasoning)
+
+    return analysis
+
+
+def analysis_search_text(analysis):
+    """Flatten an analysis dictionary into the text indexed for search"""
+    parts = []
+    for field in SEARCH_SECTIONS:
+        value = analysis.get(field)
+        if isinstance(value, list):
+            parts.append(' '.join(str(item) for item in value))
+        elif value:
+            parts.append(str(value))
+    return ' '.join(parts)
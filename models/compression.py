@@ -0,0 +1,91 @@
+"""
+Text Compression - Transparent compression for large text columns
+
+Compressed values are stored as BLOBs that start with a short format
+marker naming the codec, so plain TEXT values written by older code (or
+by hand) keep working and are returned unchanged.
+"""
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZLIB_MARKER = b'z1:'
+ZSTD_MARKER = b'zs:'
+
+# Only keep a compressed copy if it saves at least this fraction
+MIN_SAVING = 0.10
+
+
+def available_codecs():
+    """Codecs usable in this environment"""
+    return ['zlib', 'zstd'] if zstandard is not None else ['zlib']
+
+
+def compress_text(value, codec='zlib', min_bytes=1024):
+    """
+    Compress a text value if it is long enough to be worth it
+
+    Args:
+        value: Value about to be written to the database
+        codec: 'zlib', 'zstd' or 'off'
+        min_bytes: Values shorter than this (UTF-8 encoded) stay as text
+
+    Returns:
+        Marked BLOB (bytes) or the original value
+    """
+    if codec == 'off' or not isinstance(value, str):
+        return value
+
+    raw = value.encode('utf-8')
+    if len(raw) < min_bytes:
+        return value
+
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstd compression requested but the zstandard package is not installed")
+        packed = ZSTD_MARKER + zstandard.ZstdCompressor(level=6).compress(raw)
+    else:
+        packed = ZLIB_MARKER + zlib.compress(raw, 6)
+
+    if len(packed) > len(raw) * (1 - MIN_SAVING):
+        return value
+    return packed
+
+
+def decompress_text(value):
+    """
+    Reverse compress_text
+
+    Args:
+        value: Value read from the database
+
+    Returns:
+        The original text; non-compressed values are returned unchanged
+    """
+    if not isinstance(value, (bytes, memoryview)):
+        return value
+
+    value = bytes(value)
+    if value.startswith(ZLIB_MARKER):
+        return zlib.decompress(value[len(ZLIB_MARKER):]).decode('utf-8')
+    if value.startswith(ZSTD_MARKER):
+        if zstandard is None:
+            raise RuntimeError("Value is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(value[len(ZSTD_MARKER):]).decode('utf-8')
+    return value
+
+
+def is_compressed(value):
+    """True if the value carries a compression marker"""
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:3]) in (ZLIB_MARKER, ZSTD_MARKER)
+
+
+def decompress_fields(row, fields):
+    """Decompress the given keys of a row dictionary in place"""
+    for field in fields:
+        if field in row:
+            row[field] = decompress_text(row[field])
+    return row
@@ -0,0 +1,164 @@
+"""
+Connection Pool - Reuses tuned SQLite connections across requests
+"""
+import queue
+import sqlite3
+import threading
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    SQLite connection that goes back to its pool when closed
+    """
+
+    _pool = None
+    _checked_out = False
+
+    def close(self):
+        """Return the connection to its pool instead of closing it"""
+        if self._pool is None:
+            super().close()
+        elif self._checked_out:
+            self._checked_out = False
+            self._pool.release(self)
+
+    def discard(self):
+        """Really close the underlying SQLite connection"""
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections with WAL and tuned pragmas
+    """
+
+    def __init__(self, db_path, pool_size=8, busy_timeout=5000,
+                 synchronous='NORMAL', cache_size=-20000, mmap_size=268435456):
+        """
+        Initialize the pool
+
+        Args:
+            db_path: Path to the SQLite database file
+            pool_size: Maximum number of idle connections kept open
+            busy_timeout: Milliseconds to wait on a locked database
+            synchronous: PRAGMA synchronous level (OFF, NORMAL, FULL)
+            cache_size: PRAGMA cache_size (negative values are KiB)
+            mmap_size: PRAGMA mmap_size in bytes (0 disables memory mapping)
+        """
+        self.db_path = str(db_path)
+        self.pool_size = pool_size
+        self.pragmas = {
+            'busy_timeout': int(busy_timeout),
+            'synchronous': synchronous,
+            'cache_size': int(cache_size),
+            'mmap_size': int(mmap_size),
+        }
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._stats = {
+            'created': 0,
+            'checkouts': 0,
+            'reused': 0,
+            'discarded': 0,
+            'in_use': 0,
+        }
+
+    def _connect(self):
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.pragmas['busy_timeout'] / 1000,
+            check_same_thread=False,
+            factory=PooledConnection
+        )
+        conn.row_factory = sqlite3.Row  # Returns rows as dictionaries
+
+        conn.execute("PRAGMA journal_mode = WAL")
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+        return conn
+
+    def acquire(self):
+        """
+        Check a connection out of the pool, opening one if none are idle
+
+        Returns:
+            PooledConnection; call close() on it to hand it back
+        """
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn = self._connect()
+            conn._pool = self
+            reused = False
+
+        conn._checked_out = True
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['in_use'] += 1
+            if reused:
+                self._stats['reused'] += 1
+            else:
+                self._stats['created'] += 1
+
+        return conn
+
+    def release(self, conn):
+        """
+        Hand a connection back to the pool
+
+        Any transaction left open by the caller is rolled back so the next
+        borrower starts from a clean state.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.discard()
+            self._record_release(discarded=True)
+            return
+
+        if self._idle.qsize() >= self.pool_size:
+            conn.discard()
+            self._record_release(discarded=True)
+            return
+
+        self._idle.put(conn)
+        self._record_release(discarded=False)
+
+    def _record_release(self, discarded):
+        """Update counters after a connection is returned"""
+        with self._lock:
+            self._stats['in_use'] -= 1
+            if discarded:
+                self._stats['discarded'] += 1
+
+    def close_all(self):
+        """Close every idle connection (connections in use are left alone)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.discard()
+
+    def get_stats(self):
+        """
+        Get pool usage counters
+
+        Returns:
+            Dictionary with pool size, idle/in-use counts and reuse ratio
+        """
+        with self._lock:
+            stats = dict(self._stats)
+
+        stats['pool_size'] = self.pool_size
+        stats['idle'] = self._idle.qsize()
+        stats['reuse_ratio'] = round(stats['reused'] / stats['checkouts'], 4) if stats['checkouts'] else 0
+        stats['pragmas'] = dict(self.pragmas, journal_mode='wal')
+        return stats
@@ -2,25 +2,258 @@
 Deal Model - Handles all database operations for deals
 """
 import sqlite3
+import base64
+import json
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from models.connection_pool import ConnectionPool
+from models.analysis import (
+    ANALYSIS_COLUMNS, TEXT_FIELDS, LIST_FIELDS,
+    analysis_row, row_to_analysis, parse_legacy_analysis, analysis_search_text
+)
+from models.compression import compress_text, decompress_fields, is_compressed
+from database.init_db import create_schema, rebuild_search_index, rebuild_statistics
+
+MAX_PAGE_SIZE = 1000
+
+# Columns returned by list endpoints unless the caller asks for more.
+# Leaves out deal_text, additional_notes and the large AI blobs.
+SUMMARY_FIELDS = (
+    'id', 'commodity_type', 'source_name', 'source_reliability',
+    'price', 'price_currency', 'price_type', 'gross_discount', 'commission', 'net_discount',
+    'quantity', 'quantity_unit', 'origin_country', 'payment_method', 'shipping_terms',
+    'status', 'date_received', 'ai_score', 'ai_risk_level', 'pre_score', 'pre_risk_level',
+    'updated_at'
+)
+
+# Columns whose changes affect dashboard statistics / source counters
+STATS_FIELDS = {'status', 'commodity_type', 'ai_score'}
+SOURCE_FIELDS = {'status', 'source_name'}
+
+# Always selected so rows stay addressable and pageable
+REQUIRED_FIELDS = ('id', 'date_received')
+
+# Columns that may hold compressed text (see models.compression)
+COMPRESSED_DEAL_FIELDS = ('deal_text',)
+COMPRESSED_ANALYSIS_FIELDS = TEXT_FIELDS + LIST_FIELDS
+
+INSERT_SQL = """
+    INSERT INTO deals (
+        commodity_type, source_name, source_reliability,
+        deal_text, price, price_currency, quantity, quantity_unit,
+        origin_country, payment_method, shipping_terms,
+        additional_notes, date_received, status,
+        price_type, gross_discount, commission, net_discount
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def encode_cursor(date_received, deal_id):
+    """Encode a (date_received, id) seek position as an opaque cursor"""
+    raw = json.dumps([date_received, deal_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def build_match_query(text):
+    """
+    Turn free text into a safe FTS5 MATCH expression
+
+    Each word is quoted so punctuation such as '-9%' or 'C&F' can't break
+    the query syntax. A trailing '*' on a word keeps prefix matching.
+    Words are implicitly ANDed.
+
+    Raises:
+        ValueError: If the text contains no searchable words
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*').replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ('*' if prefix else ''))
+
+    if not terms:
+        raise ValueError("Search query is empty")
+    return ' '.join(terms)
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date_received, deal_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(deal_id, int):
+        raise ValueError("Invalid cursor")
+    return date_received, deal_id
+
 
 class Deal:
     """
     Deal model for managing commodity trading deals
     """
     
-    def __init__(self, db_path):
-        """Initialize with database path"""
+    def __init__(self, db_path, compression='zlib', compress_min_bytes=1024, **pool_options):
+        """
+        Initialize with database path
+
+        Args:
+            db_path: Path to the SQLite database file
+            compression: Codec for large text columns: 'zlib', 'zstd' or 'off'
+            compress_min_bytes: Text shorter than this is stored uncompressed
+            **pool_options: Passed to ConnectionPool (pool_size, busy_timeout,
+                synchronous, cache_size, mmap_size)
+        """
         self.db_path = db_path
+        self.compression = compression
+        self.compress_min_bytes = compress_min_bytes
+        self.pool = ConnectionPool(db_path, **pool_options)
+        self._columns = None
+        self._change_listeners = []
     
     def get_connection(self):
-        """Create and return a database connection"""
+        """
+        Borrow a database connection from the pool
+
+        Calling close() on the returned connection hands it back to the
+        pool rather than closing it.
+        """
+        return self.pool.acquire()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the duration of a with-block"""
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def ensure_schema(self):
+        """Create any missing tables and indexes"""
         conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Returns rows as dictionaries
-        return conn
+        try:
+            create_schema(conn)
+        finally:
+            conn.close()
     
-    def get_all(self, status=None, commodity_type=None, limit=100):
+    def get_columns(self):
+        """Get the column names of the deals table (cached)"""
+        if self._columns is None:
+            with self.connection() as conn:
+                rows = conn.execute("PRAGMA table_info(deals)").fetchall()
+            self._columns = tuple(row['name'] for row in rows)
+        return self._columns
+
+    def resolve_fields(self, fields=None):
+        """
+        Turn a fields selector into a list of columns to SELECT
+
+        Args:
+            fields: None or 'summary' for the slim list projection, 'all' or
+                '*' for every column, or a comma-separated string / list of
+                column names
+
+        Returns:
+            List of column names
+
+        Raises:
+            ValueError: If an unknown column is requested
+        """
+        columns = self.get_columns()
+
+        if fields in (None, '', 'summary'):
+            return [c for c in SUMMARY_FIELDS if c in columns]
+        if fields in ('all', '*'):
+            return list(columns)
+
+        if isinstance(fields, str):
+            fields = [f.strip() for f in fields.split(',') if f.strip()]
+
+        unknown = [f for f in fields if f not in columns]
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+
+        selected = [f for f in REQUIRED_FIELDS if f not in fields]
+        selected.extend(dict.fromkeys(fields))
+        return selected
+
+    def get_data_version(self):
+        """
+        Get the global change counter
+
+        The value increases whenever any deal is created, updated or
+        deleted, so it can be used to validate cached responses.
+        """
+        with self.connection() as conn:
+            row = conn.execute("SELECT version FROM change_counter WHERE id = 1").fetchone()
+        return row[0] if row else 0
+
+    def add_change_listener(self, callback):
+        """
+        Register a callback for deal writes
+
+        The callback receives a set of tags naming what changed: 'deals',
+        'stats', 'sources' and 'deal:<id>' for each touched deal.
+        """
+        self._change_listeners.append(callback)
+
+    def _notify(self, tags):
+        """Tell change listeners which data was written"""
+        for callback in self._change_listeners:
+            callback(set(tags))
+
+    def _update_tags(self, deal_id, fields):
+        """Tags invalidated by updating the given fields of one deal"""
+        tags = {'deals', f'deal:{deal_id}'}
+        if STATS_FIELDS & set(fields):
+            tags.add('stats')
+        if SOURCE_FIELDS & set(fields):
+            tags.add('sources')
+        return tags
+
+    def _compress(self, value):
+        """Compress a text value with this model's codec settings"""
+        return compress_text(value, self.compression, self.compress_min_bytes)
+
+    def _compress_analysis(self, row):
+        """Compress the large sections of an analysis_row dictionary in place"""
+        for field in COMPRESSED_ANALYSIS_FIELDS:
+            row[field] = self._compress(row[field])
+        return row
+
+    def _index_text(self, cursor, deal_id, deal_text=None, analysis=None):
+        """
+        Write plain text for compressed values into the search index
+
+        The deals_fts triggers can't read compressed BLOBs, so they index
+        them as '' and leave the real text to this method.
+
+        Args:
+            cursor: Cursor inside the write transaction
+            deal_id: The deal ID
+            deal_text: Uncompressed deal text to index (optional)
+            analysis: Analysis dictionary to index (optional)
+        """
+        if deal_text is not None:
+            cursor.execute("UPDATE deals_fts SET deal_text = ? WHERE rowid = ?", (deal_text, deal_id))
+        if analysis is not None:
+            cursor.execute("UPDATE deals_fts SET analysis = ? WHERE rowid = ?",
+                           (analysis_search_text(analysis), deal_id))
+
+    def get_pool_stats(self):
+        """Get connection pool usage counters"""
+        return self.pool.get_stats()
+
+    def get_all(self, status=None, commodity_type=None, limit=100, fields=None):
         """
         Get all deals with optional filters
         
@@ -28,14 +261,38 @@ class Deal:
             status: Filter by status (optional)
             commodity_type: Filter by commodity (optional)
             limit: Maximum number of results (default 100)
+            fields: Column selector, see resolve_fields (default summary)
         
         Returns:
             List of deal dictionaries
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return self.get_page(status=status, commodity_type=commodity_type,
+                             limit=limit, fields=fields)['deals']
         
-        query = "SELECT * FROM deals WHERE 1=1"
+    def get_page(self, status=None, commodity_type=None, limit=100, cursor=None, fields=None):
+        """
+        Get one page of deals, newest first, using keyset pagination
+
+        Seeks on (date_received, id) so every page costs the same no matter
+        how deep into the table it is.
+
+        Args:
+            status: Filter by status (optional)
+            commodity_type: Filter by commodity (optional)
+            limit: Page size (clamped to 1..MAX_PAGE_SIZE)
+            cursor: next_cursor from the previous page (optional)
+            fields: Column selector, see resolve_fields (default summary)
+
+        Returns:
+            Dictionary with 'deals' and 'next_cursor' (None on the last page)
+
+        Raises:
+            ValueError: If the cursor is malformed or a field is unknown
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        columns = self.resolve_fields(fields)
+
+        query = f"SELECT {', '.join(columns)} FROM deals WHERE 1=1"
         params = []
         
         if status:
@@ -46,63 +303,528 @@ class Deal:
             query += " AND commodity_type = ?"
             params.append(commodity_type)
         
-        query += " ORDER BY date_received DESC LIMIT ?"
-        params.append(limit)
+        if cursor:
+            query += " AND (date_received, id) < (?, ?)"
+            params.extend(decode_cursor(cursor))
         
-        cursor.execute(query, params)
-        deals = [dict(row) for row in cursor.fetchall()]
+        # Fetch one extra row to know whether another page exists
+        query += " ORDER BY date_received DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
         
-        conn.close()
-        return deals
+        with self.connection() as conn:
+            db_cursor = conn.cursor()
+            db_cursor.execute(query, params)
+            deals = [decompress_fields(dict(row), COMPRESSED_DEAL_FIELDS) for row in db_cursor.fetchall()]
     
-    def get_by_id(self, deal_id):
+        next_cursor = None
+        if len(deals) > limit:
+            deals = deals[:limit]
+            last = deals[-1]
+            next_cursor = encode_cursor(last['date_received'], last['id'])
+
+        return {
+            'deals': deals,
+            'next_cursor': next_cursor
+        }
+
+    def find_ids(self, status=None, commodity_type=None, unscored=False, limit=None):
+        """
+        Get the IDs of deals matching simple filters, oldest first
+
+        Args:
+            status: Filter by status (optional)
+            commodity_type: Filter by commodity (optional)
+            unscored: Only deals without an AI score
+            limit: Maximum number of IDs (optional)
+
+        Returns:
+            List of deal IDs
+        """
+        query = "SELECT id FROM deals WHERE 1=1"
+        params = []
+
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+
+        if commodity_type:
+            query += " AND commodity_type = ?"
+            params.append(commodity_type)
+
+        if unscored:
+            query += " AND ai_score IS NULL"
+
+        query += " ORDER BY date_received, id"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+
+        with self.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [row[0] for row in rows]
+
+    def search(self, text, status=None, commodity_type=None, limit=20, offset=0, fields=None):
+        """
+        Full-text search over deal text, notes, source and AI analysis
+
+        Args:
+            text: Free-text query, e.g. "Ghana gold CIF"
+            status: Filter by status (optional)
+            commodity_type: Filter by commodity (optional)
+            limit: Maximum number of results (clamped to 1..MAX_PAGE_SIZE)
+            offset: Number of ranked results to skip
+            fields: Column selector, see resolve_fields (default summary)
+
+        Returns:
+            List of deal dictionaries, best match first, each with a
+            'snippet' of the matching text and its bm25 'rank'
+
+        Raises:
+            ValueError: If the query is empty or a field is unknown
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        columns = ', '.join(f"d.{c}" for c in self.resolve_fields(fields))
+
+        # Weight matches in the raw deal text above the AI's commentary
+        query = f"""
+            SELECT {columns},
+                   snippet(deals_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet,
+                   bm25(deals_fts, 2.0, 4.0, 2.0, 1.0) AS rank
+            FROM deals_fts
+            JOIN deals d ON d.id = deals_fts.rowid
+            WHERE deals_fts MATCH ?
+        """
+        params = [build_match_query(text)]
+
+        if status:
+            query += " AND d.status = ?"
+            params.append(status)
+
+        if commodity_type:
+            query += " AND d.commodity_type = ?"
+            params.append(commodity_type)
+
+        query += " ORDER BY rank LIMIT ? OFFSET ?"
+        params.extend([limit, max(0, int(offset))])
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            results = [decompress_fields(dict(row), COMPRESSED_DEAL_FIELDS) for row in cursor.fetchall()]
+
+        return results
+
+    def rebuild_search_index(self):
+        """Repopulate the full-text index from the deals table"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                rebuild_search_index(cursor)
+
+                # SQL indexed compressed values as ''; fill in their text
+                cursor.execute("SELECT id, deal_text FROM deals WHERE typeof(deal_text) = 'blob'")
+                for row in cursor.fetchall():
+                    deal = decompress_fields(dict(row), COMPRESSED_DEAL_FIELDS)
+                    self._index_text(cursor, deal['id'], deal_text=deal['deal_text'])
+
+                blob_check = ' OR '.join(f"typeof({f}) = 'blob'" for f in COMPRESSED_ANALYSIS_FIELDS)
+                cursor.execute(f"""
+                    SELECT a.* FROM deal_analyses a
+                    WHERE a.id = (SELECT MAX(id) FROM deal_analyses WHERE deal_id = a.deal_id)
+                      AND ({blob_check})
+                """)
+                for row in cursor.fetchall():
+                    self._index_text(cursor, row['deal_id'], analysis=row_to_analysis(row))
+
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+    def get_by_id(self, deal_id, include_analysis=False):
         """
         Get a single deal by ID
         
         Args:
             deal_id: The deal ID
+            include_analysis: Also load the latest AI analysis into
+                deal['analysis'] (default False)
         
         Returns:
             Deal dictionary or None if not found
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM deals WHERE id = ?", (deal_id,))
+            result = cursor.fetchone()
         
-        cursor.execute("SELECT * FROM deals WHERE id = ?", (deal_id,))
-        result = cursor.fetchone()
+        if not result:
+            return None
         
-        conn.close()
+        deal = decompress_fields(dict(result), COMPRESSED_DEAL_FIELDS)
+        if include_analysis:
+            deal['analysis'] = self.get_analysis(deal_id, legacy_deal=deal)
+        return deal
         
-        if result:
-            return dict(result)
+    def get_analysis(self, deal_id, legacy_deal=None):
+        """
+        Get the latest AI analysis for a deal
+
+        Args:
+            deal_id: The deal ID
+            legacy_deal: Deal row already in hand, used to read the old
+                ai_analysis/ai_reasoning columns if no analysis row exists
+
+        Returns:
+            Analysis dictionary or None if the deal has never been scored
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM deal_analyses
+                WHERE deal_id = ?
+                ORDER BY id DESC
+                LIMIT 1
+            """, (deal_id,))
+            row = cursor.fetchone()
+
+            if row is None and legacy_deal is None:
+                cursor.execute("SELECT ai_score, ai_analysis, ai_reasoning FROM deals WHERE id = ?",
+                               (deal_id,))
+                legacy_deal = cursor.fetchone()
+
+        if row is not None:
+            return row_to_analysis(row)
+
+        if legacy_deal is not None:
+            legacy = parse_legacy_analysis(legacy_deal['ai_analysis'], legacy_deal['ai_reasoning'])
+            if legacy:
+                legacy.setdefault('score', legacy_deal['ai_score'])
+                return row_to_analysis(analysis_row(legacy))
         return None
     
-    def create(self, deal_data):
+    def get_analysis_history(self, deal_id):
         """
-        Create a new deal
+        List every scoring run for a deal, newest first
+
+        Returns:
+            List of dictionaries with id, score, risk_level, model, created_at
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, score, risk_level, model, created_at
+                FROM deal_analyses
+                WHERE deal_id = ?
+                ORDER BY id DESC
+            """, (deal_id,))
+            history = [dict(row) for row in cursor.fetchall()]
+
+        return history
+
+    def save_analysis(self, deal_id, result, model=None, inputs=None):
+        """
+        Store a scoring run and update the deal's score summary
+
+        Inserts a deal_analyses row and sets ai_score, ai_risk_level and
+        ai_recommendation on the deal in one transaction.
         
         Args:
-            deal_data: Dictionary with deal information
+            deal_id: The deal ID
+            result: Scoring result dictionary from AIScorer
+            model: Model id that produced the result (optional)
+            inputs: Deal fields the result was based on (optional, see
+                AIScorer.prompt_inputs)
         
         Returns:
-            ID of newly created deal
+            ID of the new deal_analyses row, or None if the deal is missing
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        row = analysis_row(result)
+        plain = row_to_analysis(row)
+        self._compress_analysis(row)
+        columns = ANALYSIS_COLUMNS + ('deal_id', 'model', 'inputs')
+        values = [row[c] for c in ANALYSIS_COLUMNS] + [
+            deal_id, model, json.dumps(inputs) if inputs is not None else None
+        ]
         
-        cursor.execute("""
-    INSERT INTO deals (
-        commodity_type, source_name, source_reliability,
-        deal_text, price, price_currency, quantity, quantity_unit,
-        origin_country, payment_method, shipping_terms,
-        additional_notes, date_received, status,
-        price_type, gross_discount, commission, net_discount
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("""
+                    UPDATE deals
+                    SET ai_score = ?, ai_risk_level = ?, ai_recommendation = ?,
+                        ai_analysis = NULL, ai_reasoning = NULL
+                    WHERE id = ?
+                """, (row['score'], row['risk_level'], row['recommendation'], deal_id))
+                if cursor.rowcount == 0:
+                    conn.rollback()
+                    return None
+
+                cursor.execute(
+                    f"INSERT INTO deal_analyses ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    values
+                )
+                analysis_id = cursor.lastrowid
+                if any(is_compressed(row[f]) for f in COMPRESSED_ANALYSIS_FIELDS):
+                    self._index_text(cursor, deal_id, analysis=plain)
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+        self._notify({'deals', 'stats', f'deal:{deal_id}'})
+        return analysis_id
+
+    def migrate_legacy_analyses(self, batch_size=500, progress=None):
+        """
+        Move old ai_analysis/ai_reasoning JSON off the deals rows
+
+        Processes deals in id order, one transaction per batch, writing a
+        deal_analyses row and the score summary columns for each. Safe to
+        re-run; migrated deals no longer match.
+
+        Args:
+            batch_size: Deals per transaction
+            progress: Optional callback(migrated_so_far)
+
+        Returns:
+            Number of deals migrated
+        """
+        columns = ANALYSIS_COLUMNS + ('deal_id', 'model')
+        insert_sql = (f"INSERT INTO deal_analyses ({', '.join(columns)}) "
+                      f"VALUES ({', '.join('?' * len(columns))})")
+        migrated = 0
+        last_id = 0
+
+        while True:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("BEGIN IMMEDIATE")
+                    cursor.execute("""
+                        SELECT id, ai_score, ai_analysis, ai_reasoning
+                        FROM deals
+                        WHERE id > ? AND (ai_analysis IS NOT NULL OR ai_reasoning IS NOT NULL)
+                        ORDER BY id
+                        LIMIT ?
+                    """, (last_id, batch_size))
+                    batch = cursor.fetchall()
+                    if not batch:
+                        conn.rollback()
+                        break
+
+                    inserts = []
+                    summaries = []
+                    reindex = []
+                    for deal in batch:
+                        legacy = parse_legacy_analysis(deal['ai_analysis'], deal['ai_reasoning'])
+                        if legacy:
+                            legacy['score'] = deal['ai_score'] if deal['ai_score'] is not None else legacy.get('score')
+                            row = analysis_row(legacy)
+                            plain = row_to_analysis(row)
+                            self._compress_analysis(row)
+                            if any(is_compressed(row[f]) for f in COMPRESSED_ANALYSIS_FIELDS):
+                                reindex.append((deal['id'], plain))
+                            inserts.append([row[c] for c in ANALYSIS_COLUMNS] + [deal['id'], None])
+                        else:
+                            row = {'risk_level': None, 'recommendation': None}
+                        summaries.append((row['risk_level'], row['recommendation'], deal['id']))
+
+                    cursor.executemany(insert_sql, inserts)
+                    cursor.executemany("""
+                        UPDATE deals
+                        SET ai_risk_level = ?, ai_recommendation = ?,
+                            ai_analysis = NULL, ai_reasoning = NULL
+                        WHERE id = ?
+                    """, summaries)
+                    for deal_id, plain in reindex:
+                        self._index_text(cursor, deal_id, analysis=plain)
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    raise
+
+            last_id = batch[-1]['id']
+            migrated += len(batch)
+            if progress:
+                progress(migrated)
+
+        if migrated:
+            self._notify({'deals'})
+        return migrated
+
+    def compress_existing(self, batch_size=500, progress=None):
+        """
+        Compress large text already stored uncompressed
+
+        Walks deals.deal_text and the deal_analyses sections in id order,
+        one transaction per batch, rewriting values that compress_text
+        shrinks. Safe to re-run; compressed values are skipped.
+
+        Args:
+            batch_size: Rows per transaction
+            progress: Optional callback(table, rows_compressed_so_far)
+
+        Returns:
+            Dictionary mapping table name to number of rows rewritten
+        """
+        counts = {'deals': 0, 'deal_analyses': 0}
+        if self.compression == 'off':
+            return counts
+
+        tables = (
+            ('deals', COMPRESSED_DEAL_FIELDS),
+            ('deal_analyses', COMPRESSED_ANALYSIS_FIELDS),
+        )
+        for table, fields in tables:
+            wanted = ' OR '.join(
+                f"(typeof({f}) = 'text' AND length(CAST({f} AS BLOB)) >= ?)" for f in fields
+            )
+            last_id = 0
+
+            while True:
+                with self.connection() as conn:
+                    cursor = conn.cursor()
+                    try:
+                        cursor.execute("BEGIN IMMEDIATE")
+                        cursor.execute(f"""
+                            SELECT id, {', '.join(fields)} FROM {table}
+                            WHERE id > ? AND ({wanted})
+                            ORDER BY id
+                            LIMIT ?
+                        """, [last_id] + [self.compress_min_bytes] * len(fields) + [batch_size])
+                        batch = cursor.fetchall()
+                        if not batch:
+                            conn.rollback()
+                            break
+
+                        for row in batch:
+                            packed = {f: self._compress(row[f]) for f in fields}
+                            changed = [f for f in fields if packed[f] is not row[f]]
+                            if not changed:
+                                continue
+                            cursor.execute(
+                                f"UPDATE {table} SET {', '.join(f'{f} = ?' for f in changed)} WHERE id = ?",
+                                [packed[f] for f in changed] + [row['id']]
+                            )
+                            if table == 'deals':
+                                self._index_text(cursor, row['id'], deal_text=row['deal_text'])
+                            counts[table] += 1
+
+                        conn.commit()
+                    except sqlite3.Error:
+                        conn.rollback()
+                        raise
+
+                last_id = batch[-1]['id']
+                if progress:
+                    progress(table, counts[table])
+
+        if counts['deals']:
+            self._notify({'deals'})
+        return counts
+
+    def save_pre_score(self, deal_id, result):
+        """
+        Store a deal's pre-score
+
+        Args:
+            deal_id: The deal ID
+            result: Dictionary from PreScorer.score()
+
+        Returns:
+            True if the deal exists
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE deals SET pre_score = ?, pre_risk_level = ?, pre_analysis = ? WHERE id = ?",
+                self._pre_score_params(deal_id, result)
+            )
+            conn.commit()
+            found = cursor.rowcount > 0
+
+        if found:
+            self._notify({'deals', f'deal:{deal_id}'})
+        return found
+
+    def _pre_score_params(self, deal_id, result):
+        details = {k: v for k, v in result.items() if k not in ('score', 'risk_level')}
+        return (result['score'], result['risk_level'], json.dumps(details), deal_id)
+
+    def pre_score_all(self, pre_scorer, batch_size=1000, progress=None):
+        """
+        Pre-score every deal
+
+        Walks the table in id order, one transaction per batch, and
+        stores each PreScorer result in pre_score, pre_risk_level and
+        pre_analysis.
+
+        Args:
+            pre_scorer: PreScorer instance
+            batch_size: Deals per transaction
+            progress: Optional callback(deals_scored_so_far)
+
+        Returns:
+            Dictionary with the number of deals scored and counts by
+            decision and risk level
+        """
+        counts = {'deals': 0, 'decisions': {}, 'risk_levels': {}}
+        columns = [f for f in pre_scorer.input_fields if f != 'deal_text']
+        last_id = 0
+
+        while True:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("BEGIN IMMEDIATE")
+                    # The rules only check whether deal_text is present, so
+                    # skip reading (and decompressing) the text itself
+                    cursor.execute(f"""
+                        SELECT id, {', '.join(columns)}, NULLIF(length(deal_text), 0) AS deal_text
+                        FROM deals
+                        WHERE id > ?
+                        ORDER BY id
+                        LIMIT ?
+                    """, (last_id, batch_size))
+                    batch = cursor.fetchall()
+                    if not batch:
+                        conn.rollback()
+                        break
+
+                    params = []
+                    for row in batch:
+                        result = pre_scorer.score(dict(row))
+                        params.append(self._pre_score_params(row['id'], result))
+                        for group, key in (('decisions', 'decision'), ('risk_levels', 'risk_level')):
+                            counts[group][result[key]] = counts[group].get(result[key], 0) + 1
+                    cursor.executemany(
+                        "UPDATE deals SET pre_score = ?, pre_risk_level = ?, pre_analysis = ? WHERE id = ?",
+                        params
+                    )
+                    conn.commit()
+                except sqlite3.Error:
+                    conn.rollback()
+                    raise
+
+            counts['deals'] += len(batch)
+            last_id = batch[-1]['id']
+            if progress:
+                progress(counts['deals'])
+
+        if counts['deals']:
+            self._notify({'deals'})
+        return counts
+
+    def _insert_params(self, deal_data):
+        """Build the INSERT parameter tuple for one deal"""
+        return (
             deal_data.get('commodity_type'),
             deal_data.get('source_name'),
             deal_data.get('source_reliability'),
-            deal_data.get('deal_text'),
+            self._compress(deal_data.get('deal_text')),
             deal_data.get('price'),
             deal_data.get('price_currency', 'USD'),
             deal_data.get('quantity'),
@@ -117,13 +839,73 @@ class Deal:
             deal_data.get('gross_discount'),
             deal_data.get('commission'),
             deal_data.get('net_discount')
-        ))
+        )
         
-        deal_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+    def create(self, deal_data):
+        """
+        Create a new deal
         
+        Args:
+            deal_data: Dictionary with deal information
+
+        Returns:
+            ID of newly created deal
+        """
+        params = self._insert_params(deal_data)
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute(INSERT_SQL, params)
+                deal_id = cursor.lastrowid
+                if is_compressed(params[3]):
+                    self._index_text(cursor, deal_id, deal_text=deal_data['deal_text'])
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+        self._notify({'deals', 'stats', 'sources'})
         return deal_id
+
+    def create_many(self, deals_data):
+        """
+        Create several deals in a single transaction
+
+        Args:
+            deals_data: List of deal dictionaries
+
+        Returns:
+            List of new deal IDs, in the same order as deals_data
+        """
+        if not deals_data:
+            return []
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # Take the write lock up front so the new ids are contiguous
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM deals")
+                last_id = cursor.fetchone()[0]
+
+                params = [self._insert_params(d) for d in deals_data]
+                cursor.executemany(INSERT_SQL, params)
+
+                cursor.execute("SELECT id FROM deals WHERE id > ? ORDER BY id", (last_id,))
+                deal_ids = [row[0] for row in cursor.fetchall()]
+
+                for deal_id, deal_params, deal_data in zip(deal_ids, params, deals_data):
+                    if is_compressed(deal_params[3]):
+                        self._index_text(cursor, deal_id, deal_text=deal_data['deal_text'])
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+        self._notify({'deals', 'stats', 'sources'})
+        return deal_ids
     
     def update(self, deal_id, deal_data):
         """
@@ -136,31 +918,40 @@ class Deal:
         Returns:
             True if successful, False otherwise
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         # Build dynamic UPDATE query based on provided fields
         fields = []
         values = []
+        reindex = False
         
         for key, value in deal_data.items():
             if key != 'id':  # Don't update ID
+                if key in COMPRESSED_DEAL_FIELDS:
+                    value = self._compress(value)
+                    reindex = reindex or is_compressed(value)
                 fields.append(f"{key} = ?")
                 values.append(value)
         
         if not fields:
-            conn.close()
             return False
         
         query = f"UPDATE deals SET {', '.join(fields)} WHERE id = ?"
         values.append(deal_id)
         
-        cursor.execute(query, values)
-        conn.commit()
-        
-        success = cursor.rowcount > 0
-        conn.close()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute(query, values)
+                success = cursor.rowcount > 0
+                if success and reindex:
+                    self._index_text(cursor, deal_id, deal_text=deal_data['deal_text'])
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
         
+        if success:
+            self._notify(self._update_tags(deal_id, deal_data))
         return success
     
     def delete(self, deal_id):
@@ -173,55 +964,233 @@ class Deal:
         Returns:
             True if successful, False otherwise
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM deals WHERE id = ?", (deal_id,))
+            conn.commit()
+            success = cursor.rowcount > 0
         
-        cursor.execute("DELETE FROM deals WHERE id = ?", (deal_id,))
-        conn.commit()
+        if success:
+            self._notify({'deals', 'stats', f'deal:{deal_id}'})
+        return success
         
-        success = cursor.rowcount > 0
-        conn.close()
+    def update_many(self, updates):
+        """
+        Apply partial updates to several deals in a single transaction
         
-        return success
+        Updates touching the same set of columns are grouped and sent with
+        one executemany each.
+
+        Args:
+            updates: List of dictionaries, each with an 'id' plus the
+                columns to change
+
+        Returns:
+            Dictionary mapping deal ID to True (updated) or False (not found)
+
+        Raises:
+            ValueError: If an update names an unknown column or has no fields
+        """
+        columns = self.get_columns()
+        groups = {}
+        reindex = []
+
+        for update in updates:
+            fields = tuple(sorted(k for k in update if k != 'id'))
+            if not fields:
+                raise ValueError(f"Update for deal {update.get('id')} has no fields")
+            unknown = [f for f in fields if f not in columns]
+            if unknown:
+                raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+            values = [self._compress(update[f]) if f in COMPRESSED_DEAL_FIELDS else update[f]
+                      for f in fields]
+            if 'deal_text' in update and is_compressed(values[fields.index('deal_text')]):
+                reindex.append(update)
+            groups.setdefault(fields, []).append((update['id'], values))
+
+        ids = [update['id'] for update in updates]
+        if not ids:
+            return {}
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                existing = self._existing_ids(cursor, ids)
+
+                for fields, group in groups.items():
+                    query = f"UPDATE deals SET {', '.join(f'{f} = ?' for f in fields)} WHERE id = ?"
+                    cursor.executemany(query, [
+                        values + [deal_id]
+                        for deal_id, values in group if deal_id in existing
+                    ])
+
+                for update in reindex:
+                    if update['id'] in existing:
+                        self._index_text(cursor, update['id'], deal_text=update['deal_text'])
+
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+        tags = set()
+        for update in updates:
+            if update['id'] in existing:
+                tags |= self._update_tags(update['id'], update)
+        if tags:
+            self._notify(tags)
+        return {deal_id: deal_id in existing for deal_id in ids}
+
+    def delete_many(self, deal_ids):
+        """
+        Delete several deals in a single transaction
+
+        Args:
+            deal_ids: List of deal IDs
+
+        Returns:
+            Dictionary mapping deal ID to True (deleted) or False (not found)
+        """
+        if not deal_ids:
+            return {}
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                existing = self._existing_ids(cursor, deal_ids)
+                cursor.executemany("DELETE FROM deals WHERE id = ?",
+                                   [(deal_id,) for deal_id in existing])
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+        if existing:
+            self._notify({'deals', 'stats'} | {f'deal:{deal_id}' for deal_id in existing})
+        return {deal_id: deal_id in existing for deal_id in deal_ids}
+
+    def existing_ids(self, deal_ids):
+        """Return the subset of deal_ids present in the deals table"""
+        with self.connection() as conn:
+            return self._existing_ids(conn.cursor(), deal_ids)
+
+    def _existing_ids(self, cursor, deal_ids):
+        """Return the subset of deal_ids present in the deals table"""
+        existing = set()
+        unique_ids = list(dict.fromkeys(deal_ids))
+
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(unique_ids), 500):
+            chunk = unique_ids[i:i + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f"SELECT id FROM deals WHERE id IN ({placeholders})", chunk)
+            existing.update(row[0] for row in cursor.fetchall())
+
+        return existing
     
     def get_statistics(self):
         """
         Get dashboard statistics
         
+        Reads the trigger-maintained deal_stats table, so the cost does not
+        grow with the number of deals.
+
         Returns:
             Dictionary with various stats
         """
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT dimension, key, deal_count, score_count, score_sum
+                FROM deal_stats
+                WHERE deal_count > 0
+            """)
+            rows = [dict(row) for row in cursor.fetchall()]
         
+        return self._format_statistics(rows)
+
+    def _format_statistics(self, rows):
+        """Shape deal_stats rows into the /api/statistics payload"""
         stats = {}
         
-        # Total deals
-        cursor.execute("SELECT COUNT(*) FROM deals")
-        stats['total_deals'] = cursor.fetchone()[0]
+        total = next((r for r in rows if r['dimension'] == 'total'), None)
+        stats['total_deals'] = total['deal_count'] if total else 0
         
         # Deals by status
-        cursor.execute("""
-            SELECT status, COUNT(*) as count
-            FROM deals
-            GROUP BY status
-        """)
-        stats['by_status'] = {row['status']: row['count'] for row in cursor.fetchall()}
+        stats['by_status'] = {
+            (r['key'] or None): r['deal_count']
+            for r in rows if r['dimension'] == 'status'
+        }
         
         # Average AI score
-        cursor.execute("SELECT AVG(ai_score) FROM deals WHERE ai_score IS NOT NULL")
-        result = cursor.fetchone()[0]
-        stats['avg_score'] = round(result, 2) if result else 0
+        if total and total['score_count']:
+            stats['avg_score'] = round(total['score_sum'] / total['score_count'], 2)
+        else:
+            stats['avg_score'] = 0
         
         # Top commodities
-        cursor.execute("""
-            SELECT commodity_type, COUNT(*) as count
-            FROM deals
-            GROUP BY commodity_type
-            ORDER BY count DESC
-            LIMIT 5
-        """)
-        stats['top_commodities'] = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
+        commodities = sorted(
+            (r for r in rows if r['dimension'] == 'commodity'),
+            key=lambda r: (-r['deal_count'], r['key'])
+        )
+        stats['top_commodities'] = [
+            {'commodity_type': r['key'] or None, 'count': r['deal_count']}
+            for r in commodities[:5]
+        ]
+        
         return stats
+
+    def check_statistics(self):
+        """
+        Compare deal_stats against a full recount of the deals table
+
+        Returns:
+            List of mismatch dictionaries (empty when consistent)
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT dimension, key, deal_count, score_count, score_sum
+                FROM deal_stats
+                WHERE deal_count != 0 OR score_count != 0
+            """)
+            stored = {(r['dimension'], r['key']): dict(r) for r in cursor.fetchall()}
+
+            expected = {}
+            for dimension, key in (('total', "''"),
+                                   ('status', "IFNULL(status, '')"),
+                                   ('commodity', "IFNULL(commodity_type, '')")):
+                cursor.execute(f"""
+                    SELECT {key} AS key, COUNT(*) AS deal_count,
+                           COUNT(ai_score) AS score_count, IFNULL(SUM(ai_score), 0) AS score_sum
+                    FROM deals
+                    GROUP BY {key}
+                """)
+                for r in cursor.fetchall():
+                    expected[(dimension, r['key'])] = dict(r, dimension=dimension)
+
+        mismatches = []
+        for ident in sorted(set(stored) | set(expected)):
+            have = stored.get(ident, {})
+            want = expected.get(ident, {})
+            for column in ('deal_count', 'score_count', 'score_sum'):
+                if abs((have.get(column) or 0) - (want.get(column) or 0)) > 1e-6:
+                    mismatches.append({
+                        'dimension': ident[0],
+                        'key': ident[1],
+                        'column': column,
+                        'stored': have.get(column, 0),
+                        'actual': want.get(column, 0)
+                    })
+
+        return mismatches
+
+    def rebuild_statistics(self):
+        """Recompute deal_stats from scratch"""
+        with self.connection() as conn:
+            rebuild_statistics(conn.cursor())
+            conn.commit()
+
+        self._notify({'stats'})
@@ -0,0 +1,92 @@
+"""
+Pre-score every deal with the local rule engine
+
+Stores a preliminary score, risk level and flags on each deal (no API
+calls) and reports how many deals the rules would reject at the current
+PRE_SCORE_REJECT_BELOW. For deals that already have an AI score it also
+shows how well the two agree, to help pick the threshold.
+
+Usage:
+  python pre_score_deals.py [--batch-size 1000] [--reject-below 30]
+"""
+import argparse
+import time
+
+from config import Config
+from models.deal import Deal
+from services.pre_scorer import PreScorer
+
+
+def agreement(deal_model, reject_below):
+    """
+    Compare stored pre-scores with AI scores
+
+    Returns:
+        Dictionary with the number of deals having both, the mean absolute
+        difference, and how the AI scored the deals the rules reject
+    """
+    with deal_model.connection() as conn:
+        row = conn.execute("""
+            SELECT COUNT(*), AVG(ABS(pre_score - ai_score)),
+                   SUM(pre_score < :reject),
+                   SUM(pre_score < :reject AND ai_score < 50),
+                   SUM(pre_score < :reject AND ai_score >= 70)
+            FROM deals
+            WHERE pre_score IS NOT NULL AND ai_score IS NOT NULL
+        """, {'reject': reject_below}).fetchone()
+    return {
+        'deals': row[0],
+        'mean_abs_difference': round(row[1], 1) if row[1] is not None else None,
+        'rejected': row[2] or 0,
+        'rejected_ai_high_risk': row[3] or 0,
+        'rejected_ai_low_risk': row[4] or 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-score all deals with the local rules')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--reject-below', type=int, default=Config.PRE_SCORE_REJECT_BELOW)
+    args = parser.parse_args()
+
+    deal_model = Deal(Config.DATABASE_PATH,
+                      compression=Config.BLOB_COMPRESSION,
+                      compress_min_bytes=Config.BLOB_COMPRESSION_MIN_BYTES)
+    deal_model.ensure_schema()
+    pre_scorer = PreScorer(reject_below=args.reject_below)
+
+    print("=" * 60)
+    print(f"Pre-scoring deals (reject below {args.reject_below})")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    counts = deal_model.pre_score_all(
+        pre_scorer,
+        batch_size=args.batch_size,
+        progress=lambda count: print(f"  {count} deals scored...")
+    )
+    elapsed = time.perf_counter() - start
+
+    total = counts['deals']
+    print(f"\n✅ Pre-scored {total} deal(s) in {elapsed:.2f}s"
+          + (f" ({elapsed / total * 1e6:.0f} µs per deal including writes)" if total else ''))
+    for group in ('decisions', 'risk_levels'):
+        print(f"\n{group.replace('_', ' ').title()}:")
+        for key, count in sorted(counts[group].items()):
+            print(f"  {key:10} {count:8,} ({count / total:.0%})")
+
+    stats = agreement(deal_model, args.reject_below)
+    if stats['deals']:
+        print(f"\nAgainst {stats['deals']} AI-scored deal(s):")
+        print(f"  mean |pre_score - ai_score|: {stats['mean_abs_difference']}")
+        print(f"  rejected by rules: {stats['rejected']} "
+              f"(AI high risk: {stats['rejected_ai_high_risk']}, AI low risk: {stats['rejected_ai_low_risk']})")
+
+    if Config.PRE_SCORE_REJECT_MODE == 'off':
+        print("\nPRE_SCORE_REJECT_MODE is 'off': rejected deals are still sent to the API.")
+
+    deal_model.pool.close_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Check the incrementally maintained deal_stats table against the deals
+table, and optionally rebuild it
+
+Usage:
+  python rebuild_statistics.py           # report mismatches only
+  python rebuild_statistics.py --fix     # rebuild deal_stats if inconsistent
+"""
+import sys
+
+from config import Config
+from models.deal import Deal
+
+
+def main():
+    fix = '--fix' in sys.argv[1:]
+
+    deal_model = Deal(Config.DATABASE_PATH)
+    deal_model.ensure_schema()
+
+    mismatches = deal_model.check_statistics()
+
+    if not mismatches:
+        print("✅ deal_stats is consistent with deals")
+        return 0
+
+    print(f"⚠️ Found {len(mismatches)} mismatch(es) in deal_stats:")
+    for m in mismatches:
+        print(f"  {m['dimension']}/{m['key'] or '-'} {m['column']}: stored={m['stored']} actual={m['actual']}")
+
+    if not fix:
+        print("\nRun with --fix to rebuild deal_stats")
+        return 1
+
+    deal_model.rebuild_statistics()
+    remaining = deal_model.check_statistics()
+    if remaining:
+        print(f"❌ Still {len(remaining)} mismatch(es) after rebuild")
+        return 1
+
+    print("✅ deal_stats rebuilt")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Re-score stale AI analyses now
+
+Runs one check of the re-score scheduler: picks active deals whose
+analysis is older than RESCORE_MAX_AGE_DAYS, in priority order, as many
+as today's RESCORE_DAILY_TOKENS budget allows, and queues them as one
+batch. The jobs are run by the app's workers or scoring_worker.py. Also
+lists recent runs with their progress and token use.
+
+Usage:
+  python rescore_stale.py [--dry-run] [--anytime] [--max-age-days 14] [--runs 5]
+"""
+import argparse
+
+from config import Config
+from models.deal import Deal
+from services.job_queue import JobQueue
+from services.rescore_scheduler import RescoreScheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Queue stale AI analyses for re-scoring')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would be queued')
+    parser.add_argument('--anytime', action='store_true', help=f"Ignore RESCORE_HOURS ({Config.RESCORE_HOURS})")
+    parser.add_argument('--max-age-days', type=int, default=Config.RESCORE_MAX_AGE_DAYS)
+    parser.add_argument('--runs', type=int, default=5, help='Recent runs to list')
+    args = parser.parse_args()
+
+    deal_model = Deal(Config.DATABASE_PATH,
+                      compression=Config.BLOB_COMPRESSION,
+                      compress_min_bytes=Config.BLOB_COMPRESSION_MIN_BYTES)
+    deal_model.ensure_schema()
+
+    # Only queues; the handler is never called from here
+    queue = JobQueue(deal_model.pool, handler=None)
+    scheduler = RescoreScheduler(
+        deal_model.pool, queue,
+        max_age_days=args.max_age_days,
+        daily_tokens=Config.RESCORE_DAILY_TOKENS,
+        concurrency=Config.RESCORE_CONCURRENCY,
+        hours=Config.RESCORE_HOURS
+    )
+
+    print("=" * 60)
+    print(f"Re-scoring analyses older than {args.max_age_days} days "
+          f"(budget {Config.RESCORE_DAILY_TOKENS:,} tokens/day, concurrency {Config.RESCORE_CONCURRENCY})")
+    print("=" * 60)
+
+    report = scheduler.run_once(dry_run=args.dry_run, ignore_hours=args.anytime)
+    if 'tokens_used_today' in report:
+        print(f"Tokens used today: {report['tokens_used_today']:,} | "
+              f"estimated per deal: {report['tokens_per_deal']:,} | "
+              f"left: {report['tokens_remaining']:,}")
+    if report['queued']:
+        print(f"\n✅ Queued {report['queued']} deal(s) as batch {report['batch_id']}: {report['deal_ids']}")
+    else:
+        print(f"\nNothing queued: {report['reason']}")
+        if report['deal_ids']:
+            print(f"Would queue {len(report['deal_ids'])} deal(s): {report['deal_ids']}")
+
+    runs = scheduler.get_runs(args.runs)
+    if runs:
+        print("\nRecent runs:")
+        for run in runs:
+            jobs = run['jobs']
+            print(f"  {run['created_at']}  batch {run['batch_id']:<5} {len(run['deal_ids']):4} deal(s)  "
+                  f"done {jobs['done']} failed {jobs['failed']} pending {jobs['queued'] + jobs['running']}  "
+                  f"tokens {run['tokens_used']:,}")
+
+    deal_model.pool.close_all()
+
+
+if __name__ == '__main__':
+    main()
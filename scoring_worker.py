@@ -0,0 +1,163 @@
+"""
+Run AI scoring workers outside the web server
+
+Drains the scoring_jobs queue that POST /api/deals/<id>/score fills.
+Run the web app with SCORING_WORKERS=0 and one or more of these to keep
+long model calls off the web workers entirely; scoring throughput is
+then set by --workers here, or with --async (SCORING_MODE=async) by
+--concurrency jobs on one event loop. With RESCORE_ENABLED (or --rescore)
+it also runs the scheduler that re-scores stale analyses off-peak.
+
+Usage:
+  python scoring_worker.py [--workers 4] [--async [--concurrency 200]] [--rescore]
+"""
+import argparse
+import time
+
+from config import Config
+from models.deal import Deal
+from services.ai_scorer import AIScorer
+from services.ai_telemetry import AITelemetry
+from services.circuit_breaker import CircuitBreaker
+from services.anthropic_client import create_client, create_async_client, ConnectionStats
+from services.async_scorer import AsyncAIScorer, AsyncScoringService
+from services.recording import wrap_client
+from services.job_queue import JobQueue, make_scoring_handler, make_async_scoring_handler
+from services.pre_scorer import PreScorer
+from services.rescore_scheduler import RescoreScheduler
+from services.rate_limiter import RateLimiter
+from services.response_cache import ResponseCache, SQLiteBackend
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run background AI scoring workers')
+    parser.add_argument('--workers', type=int, default=max(Config.SCORING_WORKERS, 1))
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        default=Config.SCORING_MODE == 'async',
+                        help='Run jobs on an event loop with the async API client')
+    parser.add_argument('--concurrency', type=int, default=Config.AI_ASYNC_CONCURRENCY,
+                        help='Jobs in flight at once with --async')
+    parser.add_argument('--rescore', action='store_true', default=Config.RESCORE_ENABLED,
+                        help='Also re-score stale analyses off-peak (RESCORE_* settings)')
+    args = parser.parse_args()
+    if args.use_async and Config.AI_RECORDING_MODE != 'off':
+        parser.error('--async does not support AI_RECORDING_MODE (recording wraps the sync client only)')
+
+    deal_model = Deal(Config.DATABASE_PATH,
+                      compression=Config.BLOB_COMPRESSION,
+                      compress_min_bytes=Config.BLOB_COMPRESSION_MIN_BYTES,
+                      pool_size=args.workers + 1)
+    deal_model.ensure_schema()
+
+    # Drop the app's cached responses for the deals scored here
+    if Config.RESPONSE_CACHE_BACKEND == 'sqlite':
+        response_cache = ResponseCache(SQLiteBackend(Config.RESPONSE_CACHE_PATH,
+                                                     max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES),
+                                       ttl=Config.RESPONSE_CACHE_TTL)
+        deal_model.add_change_listener(response_cache.invalidate)
+
+    ai_result_cache = None
+    if Config.AI_RESULT_CACHE_MAX_ENTRIES > 0:
+        ai_result_cache = ResponseCache(
+            SQLiteBackend(Config.AI_RESULT_CACHE_PATH, max_entries=Config.AI_RESULT_CACHE_MAX_ENTRIES),
+            ttl=Config.AI_RESULT_CACHE_TTL
+        )
+
+    limiter = RateLimiter(requests_per_minute=Config.AI_REQUESTS_PER_MINUTE,
+                          tokens_per_minute=Config.AI_TOKENS_PER_MINUTE)
+
+    # Every worker shares one scorer and its pooled client
+    connection_stats = ConnectionStats()
+    client_settings = dict(
+        keepalive_expiry=Config.AI_KEEPALIVE_EXPIRY,
+        timeout=Config.AI_TIMEOUT_SECONDS,
+        connect_timeout=Config.AI_CONNECT_TIMEOUT_SECONDS,
+        stats=connection_stats,
+        base_url=Config.ANTHROPIC_BASE_URL
+    )
+    scorer_settings = dict(
+        cache=ai_result_cache, limiter=limiter,
+        max_retries=Config.AI_MAX_RETRIES, backoff_base=Config.AI_BACKOFF_BASE,
+        backoff_max=Config.AI_BACKOFF_MAX,
+        telemetry=AITelemetry(deal_model.pool),
+        deadline=Config.AI_CALL_DEADLINE_SECONDS,
+        breaker=CircuitBreaker(failure_threshold=Config.AI_BREAKER_FAILURES,
+                               reset_timeout=Config.AI_BREAKER_RESET_SECONDS)
+    )
+    pre_scorer = PreScorer(reject_below=Config.PRE_SCORE_REJECT_BELOW)
+
+    if args.use_async:
+        client = create_async_client(Config.ANTHROPIC_API_KEY, max_connections=args.concurrency,
+                                     keepalive_connections=Config.AI_KEEPALIVE_CONNECTIONS,
+                                     **client_settings)
+        scorer = AsyncAIScorer(Config.ANTHROPIC_API_KEY, client=client, **scorer_settings)
+        handler = make_async_scoring_handler(deal_model, lambda: scorer, pre_scorer=pre_scorer,
+                                             reject_mode=Config.PRE_SCORE_REJECT_MODE)
+    else:
+        client = create_client(Config.ANTHROPIC_API_KEY,
+                               max_connections=Config.AI_MAX_CONNECTIONS,
+                               keepalive_connections=Config.AI_KEEPALIVE_CONNECTIONS,
+                               **client_settings)
+        client = wrap_client(client, Config.AI_RECORDING_MODE, Config.AI_RECORDINGS_DIR)
+        scorer = AIScorer(Config.ANTHROPIC_API_KEY, client=client, **scorer_settings)
+        handler = make_scoring_handler(deal_model, lambda: scorer, pre_scorer=pre_scorer,
+                                       reject_mode=Config.PRE_SCORE_REJECT_MODE)
+
+    # With --async the service runs the handler in place of the queue's threads
+    queue = JobQueue(
+        deal_model.pool,
+        None if args.use_async else handler,
+        workers=args.workers,
+        lease_seconds=Config.SCORING_JOB_LEASE_SECONDS,
+        max_attempts=Config.SCORING_JOB_MAX_ATTEMPTS
+    )
+    service = AsyncScoringService(queue, handler, args.concurrency) if args.use_async else None
+
+    print("=" * 60)
+    if service is not None:
+        print(f"Async scoring: {args.concurrency} jobs at once | Database: {Config.DATABASE_PATH}")
+    else:
+        print(f"Scoring workers: {args.workers} | Database: {Config.DATABASE_PATH}")
+    print("=" * 60)
+
+    scheduler = None
+    if args.rescore:
+        scheduler = RescoreScheduler(
+            deal_model.pool, queue,
+            max_age_days=Config.RESCORE_MAX_AGE_DAYS,
+            daily_tokens=Config.RESCORE_DAILY_TOKENS,
+            concurrency=Config.RESCORE_CONCURRENCY,
+            hours=Config.RESCORE_HOURS,
+            interval=Config.RESCORE_INTERVAL_SECONDS
+        )
+        print(f"Re-scoring analyses older than {Config.RESCORE_MAX_AGE_DAYS} days during hours "
+              f"{Config.RESCORE_HOURS} ({Config.RESCORE_DAILY_TOKENS:,} tokens/day)")
+
+    if service is not None:
+        service.start()
+    else:
+        queue.start()
+    if scheduler is not None:
+        scheduler.start()
+    try:
+        while True:
+            time.sleep(30)
+            stats = queue.get_stats()
+            connections = connection_stats.get_stats()
+            print(f"  queued={stats['jobs']['queued']} running={stats['jobs']['running']} "
+                  f"completed={stats['completed']} failed={stats['failed']} "
+                  f"connection reuse={connections['reuse_ratio']:.0%} "
+                  f"breaker={scorer.breaker.state}")
+    except KeyboardInterrupt:
+        print("\nStopping after current jobs...")
+        if scheduler is not None:
+            scheduler.stop()
+        if service is not None:
+            service.stop()
+        else:
+            queue.stop()
+        deal_model.pool.close_all()
+
+
+if __name__ == '__main__':
+    main()
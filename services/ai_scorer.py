@@ -4,64 +4,560 @@ Uses Claude API to score and analyze commodity deals
 """
 import os
 import json
-from anthropic import Anthropic
+import time
+import random
+import hashlib
+import httpx
+from anthropic import Anthropic, APIStatusError, APIConnectionError
+from services.json_stream import SectionStreamParser
+from services.score_parser import parse_score_response
+
+# Upstream statuses worth waiting out: rate limited and overloaded
+RETRYABLE_STATUS = (429, 529)
+
+# Deal fields the scoring prompt is built from
+PROMPT_FIELDS = (
+    'commodity_type', 'source_name', 'source_reliability', 'price', 'price_currency',
+    'price_type', 'gross_discount', 'commission', 'net_discount', 'quantity',
+    'quantity_unit', 'origin_country', 'payment_method', 'shipping_terms',
+    'deal_text', 'additional_notes'
+)
+
+PRICE_FIELDS = ('price', 'price_currency', 'price_type', 'gross_discount', 'commission', 'net_discount')
+
+# Deal fields each detailed section is written from. The free text can
+# bear on anything, so a change to it touches every section.
+SECTION_DEPENDENCIES = {
+    'market_analysis': ('commodity_type', 'quantity', 'quantity_unit', 'deal_text'),
+    'origin_analysis': ('commodity_type', 'origin_country', 'deal_text'),
+    'buyer_profile': ('commodity_type', 'quantity', 'quantity_unit', 'deal_text'),
+    'price_analysis': PRICE_FIELDS + ('commodity_type', 'origin_country', 'quantity',
+                                      'quantity_unit', 'deal_text'),
+    'payment_logistics': ('payment_method', 'shipping_terms', 'origin_country',
+                          'deal_text', 'additional_notes'),
+}
+
+# Sections that weigh the whole deal; rewritten on every re-score
+SUMMARY_SECTIONS = (
+    'score', 'risk_level', 'executive_summary', 'red_flags', 'unusual_patterns',
+    'strengths', 'next_steps', 'recommendation', 'reasoning'
+)
+
+# Filled in for sections a response left out
+DEFAULT_SECTIONS = {
+    'executive_summary': 'Analysis in progress...',
+    'market_analysis': 'Market data being analyzed...',
+    'origin_analysis': 'Origin analysis pending...',
+    'buyer_profile': 'Buyer analysis pending...',
+    'price_analysis': 'Price analysis pending...',
+    'payment_logistics': 'Payment analysis pending...',
+    'red_flags': [],
+    'unusual_patterns': [],
+    'strengths': [],
+    'next_steps': [],
+    'reasoning': [],
+    'recommendation': 'Review detailed analysis',
+    'risk_level': 'medium'
+}
+
+PARSE_ERROR_SECTION = 'See Executive Summary for raw AI response'
+
+
+class ScoringTimeout(Exception):
+    """An API call ran past the scorer's deadline"""
+
+
+def is_upstream_failure(error):
+    """True for errors that mean the API is down or struggling, not a bad request"""
+    # Errors while reading a stream arrive as raw httpx errors
+    if isinstance(error, (APIConnectionError, ScoringTimeout, httpx.TransportError)):
+        return True
+    return isinstance(error, APIStatusError) and (
+        error.status_code >= 500 or error.status_code in RETRYABLE_STATUS
+    )
+
+
+def has_value(value):
+    """True unless the value is None or blank text"""
+    return value is not None and str(value).strip() != ''
+
+
+def _input_value(value):
+    """Comparable form of a deal field: None if blank, numbers as float"""
+    if not has_value(value):
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return str(value).strip()
+
+
+def prompt_inputs(deal_data):
+    """
+    Snapshot of the deal fields a scoring prompt is built from
+
+    Stored with each analysis so a later re-score can tell what changed.
+    """
+    return {field: _input_value(deal_data.get(field)) for field in PROMPT_FIELDS}
+
+
+def input_hash(deal_data):
+    """Short digest of prompt_inputs; equal for deals that would get the same prompt"""
+    payload = json.dumps(prompt_inputs(deal_data), sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def plan_rescore(previous, deal_data):
+    """
+    Work out which sections of a previous analysis an edit invalidates
+
+    Args:
+        previous: Latest stored analysis, with its 'inputs' snapshot
+        deal_data: The deal as it is now
+
+    Returns:
+        None when the deal needs a full analysis (no usable snapshot,
+        nothing changed, or every detailed section is affected);
+        otherwise a dictionary with 'changed' (field -> [old, new]),
+        'rescore' (detailed sections to rewrite) and 'reuse' (section ->
+        previous value kept as is)
+    """
+    old_inputs = (previous or {}).get('inputs')
+    if not isinstance(old_inputs, dict):
+        return None
+
+    new_inputs = prompt_inputs(deal_data)
+    changed = {field: [old_inputs.get(field), value]
+               for field, value in new_inputs.items() if old_inputs.get(field) != value}
+    if not changed:
+        return None
+
+    rescore = []
+    reuse = {}
+    for section, fields in SECTION_DEPENDENCIES.items():
+        value = previous.get(section)
+        usable = has_value(value) and value not in (DEFAULT_SECTIONS[section], PARSE_ERROR_SECTION)
+        if usable and not changed.keys() & set(fields):
+            reuse[section] = value
+        else:
+            rescore.append(section)
+
+    if not reuse:
+        return None
+    return {'changed': changed, 'rescore': rescore, 'reuse': reuse}
 
 class AIScorer:
     """
     AI-powered deal scoring and analysis
     """
     
-    def __init__(self, api_key=None):
-        """Initialize with Anthropic API key"""
+    def __init__(self, api_key=None, cache=None, limiter=None, max_retries=5,
+                 backoff_base=2.0, backoff_max=60.0, client=None, telemetry=None,
+                 deadline=None, breaker=None):
+        """
+        Initialize with Anthropic API key
+        
+        Args:
+            api_key: Anthropic API key (default ANTHROPIC_API_KEY env var)
+            cache: Optional ResponseCache for parsed results, keyed by a
+                hash of the exact request (see cache_key)
+            limiter: Optional RateLimiter shared by every scorer in the process
+            max_retries: Retries after a 429/529 response
+            backoff_base: First retry delay in seconds, doubled each time
+            backoff_max: Longest single retry delay in seconds
+            client: Anthropic client to use (see anthropic_client.create_client);
+                by default a new one is created
+            telemetry: Optional AITelemetry that records every API call
+            deadline: Seconds one scoring call may take, retries included,
+                counted from its first attempt (None or 0: no deadline)
+            breaker: Optional CircuitBreaker shared by every scorer in the
+                process; while it is open score_deal returns at once with
+                'circuit_open' set instead of calling the API
+        """
         self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY not found")
         
-        self.client = Anthropic(api_key=self.api_key)
+        # Retries are handled here so the shared limiter sees them
+        self.client = client or Anthropic(api_key=self.api_key, max_retries=0)
         self.model = "claude-sonnet-4-5-20250929"  # Claude Sonnet 4.5 (latest)
+        self.max_tokens = 16000  # Increased for comprehensive analysis
+        self.temperature = 0.7  # Higher for more expansive, detailed responses
+        self.expected_output_tokens = 6000  # Reserved up front, settled after the call
+        self.cache = cache
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.telemetry = telemetry
+        self.deadline = deadline
+        self.breaker = breaker
+    
+    def cache_key(self, system_prompt, prompt):
+        """
+        Content address of a scoring request
+        
+        Identical prompts sent to the same model with the same settings
+        share a key, whichever deal they came from.
+        """
+        payload = json.dumps([self.model, self.max_tokens, self.temperature, system_prompt, prompt])
+        return 'score:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
     
-    def score_deal(self, deal_data):
+    def score_deal(self, deal_data, force=False, on_section=None, previous=None):
         """
         Score a commodity deal and provide reasoning
         
         Args:
             deal_data: Dictionary with deal information
+            force: Skip the result cache and always call the API
+            on_section: Optional callback(key, value); when given the
+                response is streamed and each top-level section is passed
+                on as soon as it is complete
+            previous: Optional latest analysis of this deal (with its
+                'inputs'); detailed sections the changed fields do not
+                affect are kept from it and only the rest is regenerated
+                (see plan_rescore)
         
         Returns:
-            Dictionary with score and reasoning
+            Dictionary with score and reasoning; 'cached' is True when
+            the result came from the cache, 'reused_sections' lists the
+            sections kept from previous and 'inputs' is the snapshot to
+            store with the analysis. On failure 'success' is False, and
+            'circuit_open' is True if the API was not called because the
+            circuit breaker is open
         """
+        request, early = self._prepare_request(deal_data, force, on_section, previous)
+        if early is not None:
+            self._replay_cached(request, on_section)
+            return early
         
-        prompt = self._build_scoring_prompt(deal_data)
-        
+        call = {'retries': 0, 'first_token': None}
+        started = time.monotonic()
         try:
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=16000,  # Increased for comprehensive analysis
-                temperature=0.7,  # Higher for more expansive, detailed responses
-                system=self._get_system_prompt(),
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            
-            response_text = message.content[0].text
-            result = self._parse_score_response(response_text)
-            
-            return {
-                'success': True,
-                'score': result['score'],
-                'reasoning': result['reasoning'],
-                'recommendation': result.get('recommendation', ''),
-                'risk_level': result.get('risk_level', 'medium')
-            }
-            
+            if on_section is None:
+                message = self._create_message(request['system_prompt'], request['prompt'], call)
+            else:
+                message = self._stream_message(request['system_prompt'], request['prompt'],
+                                               self._section_emitter(request, on_section), call)
+            return self._finish_request(request, deal_data, message, started, call)
         except Exception as e:
-            return {
+            return self._fail_request(request, deal_data, e, started, call)
+    
+    def _prepare_request(self, deal_data, force, on_section, previous):
+        """
+        Build the prompt for score_deal and check the cache and breaker
+        
+        Returns:
+            (request, early) where request holds the prompts, cache key,
+            inputs and reused sections, and early is the result to return
+            without calling the API (cached, or circuit open) or None.
+            A cache hit's sections are kept in request['cached_sections']
+            for _replay_cached; on_section is not called here
+        """
+        inputs = prompt_inputs(deal_data)
+        plan = plan_rescore(previous, deal_data)
+        if plan is None:
+            prompt = self._build_scoring_prompt(deal_data)
+            reused = {}
+        else:
+            prompt = self._build_partial_prompt(deal_data, plan)
+            reused = plan['reuse']
+        system_prompt = self._get_system_prompt()
+        request = {
+            'system_prompt': system_prompt,
+            'prompt': prompt,
+            'key': self.cache_key(system_prompt, prompt),
+            'inputs': inputs,
+            'reused': reused,
+            'streamed': on_section is not None
+        }
+        
+        if self.cache is not None and not force:
+            cached = self.cache.get(request['key'])
+            if cached is not None:
+                request['cached_sections'] = cached
+                return request, {**cached, 'success': True, 'cached': True,
+                                 'reused_sections': list(reused), 'inputs': inputs}
+        
+        if self.breaker is not None and not self.breaker.allow():
+            return request, {
                 'success': False,
-                'error': str(e),
+                'error': 'AI service unavailable: too many recent failures, try again shortly',
+                'circuit_open': True,
                 'score': None,
                 'reasoning': []
             }
+        return request, None
+    
+    def _replay_cached(self, request, on_section):
+        """Hand a cache hit's sections to on_section, as a stream would"""
+        if on_section is None:
+            return
+        for section, value in request.get('cached_sections', {}).items():
+            on_section(section, value)
+    
+    def _section_emitter(self, request, on_section):
+        """
+        Hand the reused sections to on_section now and wrap it for the stream
+        
+        Kept sections are final already, so they are shown before the rest
+        and the model is ignored if it rewrites them anyway.
+        """
+        reused = request['reused']
+        for section, value in reused.items():
+            on_section(section, value)
+        return lambda section, value: section in reused or on_section(section, value)
+    
+    def _finish_request(self, request, deal_data, message, started, call):
+        """Parse the final Message, cache and record it, and build the score_deal result"""
+        reused = request['reused']
+        response_text = message.content[0].text if message.content else ''
+        result = self._parse_score_response(response_text, message.stop_reason, reused)
+        usage = self._usage_report(message)
+        
+        # Only cache complete results; a truncated one is worth a re-run
+        parsed = result.pop('parsed', True)
+        parse_report = result.pop('parse_report', None)
+        if self.cache is not None and parsed:
+            self.cache.set(request['key'], result, {'ai_results'})
+        
+        self._record_call(deal_data, started, call, request['streamed'], bool(reused),
+                          usage=usage, parsed=parsed,
+                          recovered=parse_report['recovered'] if parse_report else None)
+        if self.breaker is not None:
+            self.breaker.record(False)
+        
+        return {
+            **result,
+            'success': True,
+            'cached': False,
+            'score': result['score'],
+            'reasoning': result['reasoning'],
+            'recommendation': result.get('recommendation', ''),
+            'risk_level': result.get('risk_level', 'medium'),
+            'usage': usage,
+            'parse_report': parse_report,
+            'reused_sections': list(reused),
+            'inputs': request['inputs']
+        }
+    
+    def _fail_request(self, request, deal_data, error, started, call):
+        """Record a failed call and build the score_deal failure result"""
+        # httpx's async timeouts carry no message
+        message = str(error) or type(error).__name__
+        self._record_call(deal_data, started, call, request['streamed'], bool(request['reused']),
+                          error=message)
+        if self.breaker is not None:
+            self.breaker.record(is_upstream_failure(error))
+        return {
+            'success': False,
+            'error': message,
+            'score': None,
+            'reasoning': []
+        }
+    
+    def _record_call(self, deal_data, started, call, streamed, partial, usage=None,
+                     parsed=None, error=None, recovered=None):
+        """Pass one API call's tokens, timings, outcome and recovered fields to the telemetry store"""
+        if self.telemetry is None:
+            return
+        now = time.monotonic()
+        self.telemetry.record({
+            **(usage or {}),
+            'deal_id': deal_data.get('id'),
+            'model': self.model,
+            'streamed': streamed,
+            'partial': partial,
+            'ttft_ms': (call['first_token'] - started) * 1000 if call['first_token'] else None,
+            'latency_ms': (now - started) * 1000,
+            'parsed': parsed,
+            'recovered_fields': json.dumps(recovered) if recovered is not None else None,
+            'retries': call['retries'],
+            'error': error
+        })
+    
+    def _request_params(self, system_prompt, prompt):
+        """Keyword arguments for messages.create / messages.stream"""
+        return {
+            'model': self.model,
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature,
+            # The system prompt is identical on every call, so let the API
+            # cache it and skip re-reading it
+            'system': [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }],
+            'messages': [
+                {"role": "user", "content": prompt}
+            ]
+        }
+    
+    def _create_message(self, system_prompt, prompt, info=None):
+        """Call the Messages API and wait for the whole response"""
+        params = self._request_params(system_prompt, prompt)
+        return self._call_with_retries(
+            system_prompt, prompt,
+            lambda timeout: self.client.messages.create(**params, **timeout),
+            info=info
+        )
+    
+    def _stream_message(self, system_prompt, prompt, on_section, info=None):
+        """
+        Call the Messages API with streaming, reporting sections as they close
+        
+        Returns:
+            The final Message, as messages.create would
+        """
+        params = self._request_params(system_prompt, prompt)
+        emitted = []
+        
+        def call(timeout):
+            parser = SectionStreamParser()
+            give_up_at = time.monotonic() + timeout['timeout'] if timeout else None
+            with self.client.messages.stream(**params, **timeout) as stream:
+                for text in stream.text_stream:
+                    self._on_stream_text(text, parser, give_up_at, info, emitted, on_section)
+                return stream.get_final_message()
+        
+        # Once sections have been handed out a retry would repeat them
+        return self._call_with_retries(system_prompt, prompt, call,
+                                       can_retry=lambda: not emitted, info=info)
+    
+    def _on_stream_text(self, text, parser, give_up_at, info, emitted, on_section):
+        """Feed one streamed text chunk to the section parser and pass on closed sections"""
+        if info is not None and info['first_token'] is None:
+            info['first_token'] = time.monotonic()
+        # The HTTP timeout only bounds each read; a response trickling in
+        # must still end by the deadline
+        if give_up_at is not None and time.monotonic() > give_up_at:
+            raise ScoringTimeout(f"Streaming response exceeded the {self.deadline}s deadline")
+        for section, value in parser.feed(text):
+            emitted.append(section)
+            on_section(section, value)
+    
+    def _call_with_retries(self, system_prompt, prompt, call, can_retry=None, info=None):
+        """
+        Run an API call within the rate limits, retrying 429/529
+        
+        Backs off exponentially with jitter (or as long as the
+        retry-after header asks) and pauses the shared limiter meanwhile.
+        With a deadline, each attempt gets the time that is left and no
+        retry is started that could not finish in time.
+        
+        Args:
+            system_prompt: System prompt, used to size the reservation
+            prompt: User prompt, used to size the reservation
+            call: Callable(timeout) making the request and returning the
+                final Message; timeout is {} or {'timeout': seconds left},
+                to be passed on to the client
+            can_retry: Optional callable; a failed attempt is only retried
+                while it returns True
+            info: Optional dictionary whose 'retries' is incremented on
+                each retry
+        """
+        reserved = self._reservation(system_prompt, prompt)
+        deadline_at = None
+        
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire(reserved)
+            
+            # Waiting for our own rate limiter is not the API being slow
+            if self.deadline and deadline_at is None:
+                deadline_at = time.monotonic() + self.deadline
+            timeout = self._attempt_timeout(deadline_at, reserved)
+            
+            try:
+                message = call(timeout)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, reserved, deadline_at, can_retry, info)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            
+            self._settle(reserved, message)
+            return message
+    
+    def _reservation(self, system_prompt, prompt):
+        """Tokens to reserve with the limiter: rough size (~4 characters per token) plus expected output"""
+        return (len(system_prompt) + len(prompt)) // 4 + self.expected_output_tokens
+    
+    def _attempt_timeout(self, deadline_at, reserved):
+        """
+        Client timeout for the next attempt
+        
+        Returns:
+            {} without a deadline, otherwise {'timeout': seconds left}
+        
+        Raises:
+            ScoringTimeout: If the deadline has passed (the reservation is
+                released first)
+        """
+        if deadline_at is None:
+            return {}
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            if self.limiter is not None:
+                self.limiter.settle(reserved, 0)
+            raise ScoringTimeout(f"No response within the {self.deadline}s deadline")
+        return {'timeout': remaining}
+    
+    def _retry_delay(self, error, attempt, reserved, deadline_at, can_retry, info):
+        """
+        Release a failed attempt's reservation and decide on a retry
+        
+        Returns:
+            Seconds to wait before retrying (the shared limiter is paused
+            as long), or None if the error should be raised
+        """
+        if self.limiter is not None:
+            self.limiter.settle(reserved, 0)
+        if (not isinstance(error, APIStatusError) or error.status_code not in RETRYABLE_STATUS
+                or attempt == self.max_retries or (can_retry is not None and not can_retry())):
+            return None
+        
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        retry_after = error.response.headers.get('retry-after') if error.response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+            return None
+        
+        if self.limiter is not None:
+            self.limiter.pause(delay)
+        if info is not None:
+            info['retries'] += 1
+        return delay
+    
+    def _settle(self, reserved, message):
+        """Correct the limiter reservation with the tokens a call really used"""
+        if self.limiter is not None:
+            usage = message.usage
+            self.limiter.settle(reserved, usage.input_tokens + usage.output_tokens)
+    
+    def _usage_report(self, message):
+        """
+        Summarize token usage for one call
+        
+        Returns:
+            Dictionary with input, cache write, cache read and output
+            tokens plus the stop reason
+        """
+        usage = message.usage
+        report = {
+            'input_tokens': usage.input_tokens,
+            'cache_creation_input_tokens': getattr(usage, 'cache_creation_input_tokens', None) or 0,
+            'cache_read_input_tokens': getattr(usage, 'cache_read_input_tokens', None) or 0,
+            'output_tokens': usage.output_tokens,
+            'stop_reason': message.stop_reason
+        }
+        return report
     
     def _get_system_prompt(self):
         """System prompt with commodity trading expertise"""
@@ -209,156 +705,130 @@ CRITICAL INSTRUCTIONS:
 ✗ Do NOT repeat information across sections"""
 
     def _build_scoring_prompt(self, deal_data):
-        """Build the user prompt with deal details"""
+        """
+        Build the user prompt with deal details
+        
+        Only fields that have a value are included; the output format and
+        section guidance already live in the (cached) system prompt.
+        """
+        sections = self._deal_sections(deal_data)
+        sections.append("Return your analysis as a single JSON object in the format specified in the "
+                        "system prompt, with 5-8 items per list. Keep it concise to avoid truncation.")
+        return "\n\n".join(sections)
+    
+    def _build_partial_prompt(self, deal_data, plan):
+        """
+        Build the user prompt for re-scoring after an edit
+        
+        Lists what changed, passes the still-valid sections as context and
+        asks only for the affected sections plus the summary sections.
+        """
+        sections = self._deal_sections(deal_data)
+        sections.append("**CHANGED SINCE THE LAST ANALYSIS:**\n" + "\n".join(
+            f"{field.replace('_', ' ').capitalize()}: {old if old is not None else '(none)'} -> "
+            f"{new if new is not None else '(none)'}"
+            for field, (old, new) in plan['changed'].items()
+        ))
+        sections.append("**STILL-VALID SECTIONS OF THE LAST ANALYSIS (context only, do not repeat):**\n"
+                        + json.dumps(plan['reuse'], ensure_ascii=False, indent=1))
+        keys = list(SUMMARY_SECTIONS[:2]) + plan['rescore'] + list(SUMMARY_SECTIONS[2:])
+        sections.append("Update the analysis for these changes. Return a single JSON object in the "
+                        "format specified in the system prompt but with ONLY these keys: "
+                        + ", ".join(keys) + ". Use 5-8 items per list and weigh the whole deal, "
+                        "including the sections above, for the score. Keep it concise.")
+        return "\n\n".join(sections)
+    
+    def _deal_sections(self, deal_data):
+        """Prompt sections describing the deal: details, raw text and notes"""
         
         # Format price display
         if deal_data.get('price_type') == 'lme_discount':
-            price_info = f"LME Discount Pricing - Gross: {deal_data.get('gross_discount')}%, Commission: {deal_data.get('commission')}%, Net: {deal_data.get('net_discount')}%"
-        elif deal_data.get('price'):
-            price_info = f"{deal_data.get('price')} {deal_data.get('price_currency', 'USD')}"
+            parts = [f"{label}: {deal_data.get(field)}%"
+                     for label, field in (('Gross', 'gross_discount'), ('Commission', 'commission'),
+                                          ('Net', 'net_discount'))
+                     if has_value(deal_data.get(field))]
+            price_info = "LME Discount Pricing" + (" - " + ", ".join(parts) if parts else "")
+        elif has_value(deal_data.get('price')):
+            price_info = f"{deal_data.get('price')} {deal_data.get('price_currency') or 'USD'}"
         else:
-            price_info = "Not specified"
+            price_info = None
         
-        prompt = f"""Analyze this commodity trading deal and provide COMPREHENSIVE, DETAILED analysis.
-
-**DEAL DETAILS:**
-Commodity: {deal_data.get('commodity_type', 'Not specified')}
-Source: {deal_data.get('source_name', 'Unknown')} (Reliability: {deal_data.get('source_reliability', 'N/A')}/10)
-Price: {price_info}
-Quantity: {deal_data.get('quantity', 'Not specified')} {deal_data.get('quantity_unit', '')}
-Origin: {deal_data.get('origin_country', 'Not specified')}
-Payment Method: {deal_data.get('payment_method', 'Not specified')}
-Shipping Terms: {deal_data.get('shipping_terms', 'Not specified')}
-
-**RAW DEAL TEXT:**
-{deal_data.get('deal_text', 'No additional details provided')}
-
-**ADDITIONAL NOTES:**
-{deal_data.get('additional_notes', 'None')}
-
-Provide a professional analysis with:
-- Focused 2-3 paragraph assessments for each section
-- Specific numbers, facts, and market context
-- Clear lists of risks, strengths, and action items (5-8 items each)
-- Score from 0-100 based on the scoring criteria
-
-Return your analysis as a valid JSON object following the exact format specified in the system prompt. Keep responses concise to avoid truncation."""
+        source = deal_data.get('source_name')
+        if source and has_value(deal_data.get('source_reliability')):
+            source = f"{source} (Reliability: {deal_data.get('source_reliability')}/10)"
+        
+        quantity = None
+        if has_value(deal_data.get('quantity')):
+            quantity = f"{deal_data.get('quantity')} {deal_data.get('quantity_unit') or ''}".strip()
+        
+        details = [
+            ('Commodity', deal_data.get('commodity_type')),
+            ('Source', source),
+            ('Price', price_info),
+            ('Quantity', quantity),
+            ('Origin', deal_data.get('origin_country')),
+            ('Payment Method', deal_data.get('payment_method')),
+            ('Shipping Terms', deal_data.get('shipping_terms')),
+        ]
+        
+        sections = ["Analyze this commodity trading deal.", "**DEAL DETAILS:**\n" + "\n".join(
+            f"{label}: {value}" for label, value in details if has_value(value)
+        )]
+        
+        for title, field in (('RAW DEAL TEXT', 'deal_text'), ('ADDITIONAL NOTES', 'additional_notes')):
+            if has_value(deal_data.get(field)):
+                sections.append(f"**{title}:**\n{str(deal_data[field]).strip()}")
         
-        return prompt
+        return sections
     
-    def _parse_score_response(self, response_text):
-        """Parse Claude's JSON response"""
-        try:
-            # Save raw response for debugging (avoid encoding issues)
+    def _parse_score_response(self, response_text, stop_reason=None, reused=None):
+        """
+        Parse Claude's JSON response
+        
+        Every field that came through intact is kept, including from a
+        response cut off by max_tokens; missing sections get placeholders.
+        Sections in reused (kept from the previous analysis) win over
+        whatever the response says about them. 'parse_report' says what was recovered. A response
+        without a usable score is returned as placeholders with 'parsed'
+        False.
+        """
+        reused = reused or {}
+        fields, report = parse_score_response(response_text, stop_reason)
+        
+        if 'score' not in fields:
             try:
-                print("\n" + "="*60)
-                print("RAW AI RESPONSE:")
-                print("="*60)
-                print(response_text[:500])  # Print first 500 chars
-                print("="*60 + "\n")
+                print(f"\nCOULD NOT PARSE AI RESPONSE: {report}")
             except UnicodeEncodeError:
-                # Skip printing if console can't handle Unicode
                 pass
-
-            cleaned = response_text.strip()
-
-            # Remove markdown code blocks
-            if cleaned.startswith('```json'):
-                cleaned = cleaned[7:]
-            elif cleaned.startswith('```'):
-                cleaned = cleaned[3:]
-
-            if cleaned.endswith('```'):
-                cleaned = cleaned[:-3]
-
-            cleaned = cleaned.strip()
-
-            # Try to find JSON object if there's extra text
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', cleaned)
-            if json_match:
-                cleaned = json_match.group(0)
-
-            result = json.loads(cleaned)
-
-            if 'score' not in result:
-                raise ValueError("Response missing 'score' field")
-
-            result['score'] = max(0, min(100, int(result['score'])))
-
-            defaults = {
-                'executive_summary': 'Analysis in progress...',
-                'market_analysis': 'Market data being analyzed...',
-                'origin_analysis': 'Origin analysis pending...',
-                'buyer_profile': 'Buyer analysis pending...',
-                'price_analysis': 'Price analysis pending...',
-                'payment_logistics': 'Payment analysis pending...',
-                'red_flags': [],
-                'unusual_patterns': [],
-                'strengths': [],
-                'next_steps': [],
-                'reasoning': [],
-                'recommendation': 'Review detailed analysis',
-                'risk_level': 'medium'
-            }
-
-            for key, default_value in defaults.items():
-                if key not in result:
-                    result[key] = default_value
-
-            try:
-                print("Successfully parsed AI response")
-            except:
-                pass
-            return result
-
-        except json.JSONDecodeError as e:
-            try:
-                print(f"\nJSON PARSING ERROR: {e}")
-                print(f"Attempted to parse: {cleaned[:200]}...")
-            except:
-                pass
-
-            # Try to extract score
-            import re
-            score_match = re.search(r'"score"\s*:\s*(\d+)', response_text)
-            score = int(score_match.group(1)) if score_match else 50
-
+            
             # Return the raw response so user can see what went wrong
             return {
-                'score': score,
+                'score': 50,
                 'executive_summary': f'Warning: JSON Parsing Error. Raw response:\n\n{response_text[:1000]}',
-                'market_analysis': 'See Executive Summary for raw AI response',
-                'origin_analysis': 'See Executive Summary for raw AI response',
-                'buyer_profile': 'See Executive Summary for raw AI response',
-                'price_analysis': 'See Executive Summary for raw AI response',
-                'payment_logistics': 'See Executive Summary for raw AI response',
-                'red_flags': [f'JSON parsing failed: {str(e)}'],
+                'market_analysis': PARSE_ERROR_SECTION,
+                'origin_analysis': PARSE_ERROR_SECTION,
+                'buyer_profile': PARSE_ERROR_SECTION,
+                'price_analysis': PARSE_ERROR_SECTION,
+                'payment_logistics': PARSE_ERROR_SECTION,
+                'red_flags': ['AI response did not contain a valid score'],
                 'unusual_patterns': [],
                 'strengths': [],
                 'next_steps': ['Check server console for full response', 'Try re-running analysis'],
                 'reasoning': ['Warning: AI returned invalid JSON format'],
                 'recommendation': 'Check console output or try again',
-                'risk_level': 'medium'
+                'risk_level': 'medium',
+                'parsed': False,
+                'parse_report': report
             }
-        except Exception as e:
-            try:
-                print(f"\nUNEXPECTED ERROR: {e}")
-            except:
-                pass
-            return {
-                'score': 50,
-                'executive_summary': f'Warning: Error: {str(e)}',
-                'market_analysis': 'Error occurred',
-                'origin_analysis': 'Error occurred',
-                'buyer_profile': 'Error occurred',
-                'price_analysis': 'Error occurred',
-                'payment_logistics': 'Error occurred',
-                'red_flags': [str(e)],
-                'unusual_patterns': [],
-                'strengths': [],
-                'next_steps': ['Check error message', 'Try again'],
-                'reasoning': ['Warning: Unexpected error occurred'],
-                'recommendation': 'Try running analysis again',
-                'risk_level': 'medium'
-            }
\ No newline at end of file
+        
+        # Sections kept on purpose are not missing
+        report['missing'] = [key for key in report['missing'] if key not in reused]
+        
+        if report['complete']:
+            print("Successfully parsed AI response")
+        else:
+            print(f"Recovered {len(report['recovered'])} fields from AI response "
+                  f"(truncated={report['truncated']}, cut off at {report['cut_off']}, "
+                  f"missing={report['missing']}, invalid={list(report['invalid'])})")
+        
+        return {**DEFAULT_SECTIONS, **fields, **reused, 'parsed': report['complete'], 'parse_report': report}
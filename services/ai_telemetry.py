@@ -0,0 +1,192 @@
+"""
+AI Telemetry Service
+Records tokens, latency and cost of every scoring API call and aggregates them
+"""
+import json
+import sqlite3
+from contextlib import contextmanager
+
+# USD per million tokens: input, output, cache write, cache read.
+# Matched on model id prefix; unknown models are recorded without a cost
+MODEL_PRICES = {
+    'claude-opus-4': (15.0, 75.0, 18.75, 1.50),
+    'claude-sonnet-4': (3.0, 15.0, 3.75, 0.30),
+    'claude-haiku-4': (1.0, 5.0, 1.25, 0.10),
+    'claude-3-5-haiku': (0.80, 4.0, 1.0, 0.08),
+}
+
+CALL_COLUMNS = (
+    'deal_id', 'model', 'streamed', 'partial', 'input_tokens', 'output_tokens',
+    'cache_creation_input_tokens', 'cache_read_input_tokens', 'cost_usd',
+    'ttft_ms', 'latency_ms', 'stop_reason', 'parsed', 'recovered_fields', 'retries', 'error'
+)
+
+
+def call_cost(model, usage):
+    """
+    Price of one call in USD
+
+    Args:
+        model: Model id
+        usage: Dictionary with input, output, cache write and cache read
+            token counts (as in AIScorer._usage_report)
+
+    Returns:
+        Cost, or None for a model missing from MODEL_PRICES
+    """
+    for prefix, prices in MODEL_PRICES.items():
+        if (model or '').startswith(prefix):
+            tokens = (usage.get('input_tokens') or 0, usage.get('output_tokens') or 0,
+                      usage.get('cache_creation_input_tokens') or 0,
+                      usage.get('cache_read_input_tokens') or 0)
+            return sum(count * price for count, price in zip(tokens, prices)) / 1e6
+    return None
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list, or None if it is empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class AITelemetry:
+    """
+    Store of AI scoring calls in the ai_calls table
+
+    Recording never raises: telemetry must not fail a scoring job.
+    """
+
+    def __init__(self, pool, retention_days=30):
+        """
+        Initialize the store
+
+        Args:
+            pool: ConnectionPool for the deals database
+            retention_days: Calls older than this are dropped by prune()
+                (0 keeps everything)
+        """
+        self.pool = pool
+        self.retention_days = retention_days
+
+    @contextmanager
+    def _connection(self):
+        conn = self.pool.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def record(self, call):
+        """
+        Store one API call
+
+        Args:
+            call: Dictionary with any of CALL_COLUMNS; cost_usd is worked
+                out from the model and token counts when not given
+        """
+        call = dict(call)
+        if call.get('cost_usd') is None and call.get('error') is None:
+            call['cost_usd'] = call_cost(call.get('model'), call)
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    f"INSERT INTO ai_calls ({', '.join(CALL_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' for _ in CALL_COLUMNS)})",
+                    [call.get(column) for column in CALL_COLUMNS]
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Could not record AI call: {e}")
+
+    def prune(self):
+        """
+        Drop calls older than retention_days
+
+        Returns:
+            Number of rows deleted
+        """
+        if not self.retention_days:
+            return 0
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM ai_calls WHERE created_at < datetime('now', ?)",
+                                  (f"-{int(self.retention_days)} days",))
+            conn.commit()
+            return cursor.rowcount
+
+    def summary(self, hours=24):
+        """
+        Aggregate the calls of the last few hours
+
+        Args:
+            hours: Window size
+
+        Returns:
+            Dictionary with call and error counts, latency and
+            time-to-first-token percentiles (ms), token totals and
+            tokens per deal, cache read share, truncation, parse failure
+            and retry rates, incomplete responses that still gave a score
+            ('partial_recoveries') and how often each field was recovered
+            from them, cost, and calls per model
+        """
+        with self._connection() as conn:
+            rows = [dict(row) for row in conn.execute(
+                "SELECT * FROM ai_calls WHERE created_at >= datetime('now', ?)",
+                (f"-{float(hours)} hours",)
+            ).fetchall()]
+
+        ok = [row for row in rows if row['error'] is None]
+        deals = {row['deal_id'] for row in rows if row['deal_id'] is not None}
+        tokens = {key: sum(row[key] or 0 for row in ok) for key in (
+            'input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens'
+        )}
+        prompt_tokens = (tokens['input_tokens'] + tokens['cache_creation_input_tokens']
+                         + tokens['cache_read_input_tokens'])
+        cost = sum(row['cost_usd'] or 0 for row in ok)
+
+        def rate(count, total):
+            return round(count / total, 4) if total else None
+
+        def spread(values):
+            return {name: round(value, 1) if value is not None else None
+                    for name, value in (('p50', percentile(values, 50)), ('p95', percentile(values, 95)),
+                                        ('p99', percentile(values, 99)), ('max', max(values, default=None)))}
+
+        models = {}
+        for row in rows:
+            models[row['model']] = models.get(row['model'], 0) + 1
+
+        # Fields salvaged from responses that did not parse completely
+        incomplete = [json.loads(row['recovered_fields']) for row in ok
+                      if not row['parsed'] and row['recovered_fields']]
+        recovered = {}
+        for fields in incomplete:
+            for field in fields:
+                recovered[field] = recovered.get(field, 0) + 1
+
+        return {
+            'hours': hours,
+            'calls': len(rows),
+            'errors': len(rows) - len(ok),
+            'error_rate': rate(len(rows) - len(ok), len(rows)),
+            'deals': len(deals),
+            'partial_rescores': sum(bool(row['partial']) for row in ok),
+            'latency_ms': spread([row['latency_ms'] for row in ok if row['latency_ms'] is not None]),
+            'ttft_ms': spread([row['ttft_ms'] for row in ok if row['ttft_ms'] is not None]),
+            'tokens': tokens,
+            'tokens_per_deal': {
+                'input': round(prompt_tokens / len(deals)) if deals else None,
+                'output': round(tokens['output_tokens'] / len(deals)) if deals else None,
+            },
+            'cache_read_share': rate(tokens['cache_read_input_tokens'], prompt_tokens),
+            'truncation_rate': rate(sum(row['stop_reason'] == 'max_tokens' for row in ok), len(ok)),
+            'parse_failure_rate': rate(sum(not row['parsed'] for row in ok), len(ok)),
+            'partial_recoveries': sum('score' in fields for fields in incomplete),
+            'recovered_fields': recovered,
+            'retries': sum(row['retries'] or 0 for row in rows),
+            'retry_rate': rate(sum(bool(row['retries']) for row in rows), len(rows)),
+            'cost_usd': round(cost, 4),
+            'cost_per_deal_usd': round(cost / len(deals), 4) if deals else None,
+            'models': models,
+        }
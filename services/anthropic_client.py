@@ -0,0 +1,123 @@
+"""
+Anthropic Client Factory
+Builds one long-lived, pooled API client per process and counts how
+often its HTTP connections are reused
+"""
+import threading
+
+import httpx
+from anthropic import Anthropic, AsyncAnthropic, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+
+class ConnectionStats:
+    """
+    Counts requests against new TCP connections and TLS handshakes
+
+    Fed by httpcore's trace hook, so it sees what the connection pool
+    actually did rather than what was asked of it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'connections_opened': 0, 'tls_handshakes': 0}
+
+    def on_request(self, request):
+        """httpx request event hook: attach the trace callback"""
+        request.extensions['trace'] = self._trace
+        with self._lock:
+            self._stats['requests'] += 1
+
+    async def on_request_async(self, request):
+        """on_request for httpx.AsyncClient, whose hooks and trace must be coroutines"""
+        request.extensions['trace'] = self._trace_async
+        with self._lock:
+            self._stats['requests'] += 1
+
+    async def _trace_async(self, event, info):
+        self._trace(event, info)
+
+    def _trace(self, event, info):
+        if event == 'connection.connect_tcp.complete':
+            name = 'connections_opened'
+        elif event == 'connection.start_tls.complete':
+            name = 'tls_handshakes'
+        else:
+            return
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_stats(self):
+        """
+        Get connection counters
+
+        Returns:
+            Dictionary with requests, connections opened, TLS handshakes
+            and the share of requests that reused a pooled connection
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        requests = stats['requests']
+        reused = max(requests - stats['connections_opened'], 0)
+        stats['reuse_ratio'] = round(reused / requests, 4) if requests else 0
+        return stats
+
+
+def create_client(api_key, max_connections=10, keepalive_connections=10,
+                  keepalive_expiry=120.0, timeout=300.0, connect_timeout=10.0,
+                  stats=None, base_url=None):
+    """
+    Create an Anthropic client with an explicitly sized connection pool
+
+    Retries are left to AIScorer (max_retries=0 here) so they pass
+    through the shared rate limiter.
+
+    Args:
+        api_key: Anthropic API key
+        max_connections: Most concurrent connections to the API
+        keepalive_connections: Idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection is kept
+        timeout: Seconds to wait for a response (read/write/pool)
+        connect_timeout: Seconds to wait for a new connection
+        stats: Optional ConnectionStats to record connection reuse
+        base_url: API address (default: ANTHROPIC_BASE_URL or the real API)
+
+    Returns:
+        Anthropic client, safe to share between threads
+    """
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        event_hooks={'request': [stats.on_request]} if stats is not None else None
+    )
+    return Anthropic(api_key=api_key, http_client=http_client, max_retries=0,
+                     timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                     base_url=base_url or None)
+
+
+def create_async_client(api_key, max_connections=200, keepalive_connections=50,
+                        keepalive_expiry=120.0, timeout=300.0, connect_timeout=10.0,
+                        stats=None, base_url=None):
+    """
+    Create an AsyncAnthropic client with an explicitly sized connection pool
+
+    Same settings as create_client. Use it from one event loop only.
+
+    Returns:
+        AsyncAnthropic client
+    """
+    http_client = DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        event_hooks={'request': [stats.on_request_async]} if stats is not None else None
+    )
+    return AsyncAnthropic(api_key=api_key, http_client=http_client, max_retries=0,
+                          timeout=httpx.Timeout(timeout, connect=connect_timeout),
+                          base_url=base_url or None)
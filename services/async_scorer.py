@@ -0,0 +1,194 @@
+"""
+Async AI Scoring Service
+Scores deals on one asyncio event loop with the async Anthropic client
+"""
+import asyncio
+import threading
+import time
+
+from anthropic import AsyncAnthropic
+from services.ai_scorer import AIScorer
+from services.json_stream import SectionStreamParser
+
+
+class AsyncAIScorer(AIScorer):
+    """
+    AIScorer whose API calls are coroutines
+
+    Prompts, parsing, result cache, rate limiter, telemetry, deadline and
+    circuit breaker all behave as in AIScorer; an in-flight call holds no
+    thread, so one event loop can keep hundreds of generations going.
+    SQLite work (cache, telemetry) runs in the default thread pool.
+    """
+
+    def __init__(self, api_key=None, client=None, **kwargs):
+        """
+        Initialize as AIScorer
+
+        Args:
+            api_key: Anthropic API key (default ANTHROPIC_API_KEY env var)
+            client: AsyncAnthropic client (see
+                anthropic_client.create_async_client); by default a new one
+            **kwargs: Other AIScorer settings (cache, limiter, telemetry,
+                deadline, breaker, retry policy)
+        """
+        super().__init__(api_key, client=client, **kwargs)
+        if client is None:
+            self.client = AsyncAnthropic(api_key=self.api_key, max_retries=0)
+
+    async def score_deal(self, deal_data, force=False, on_section=None, previous=None):
+        """Coroutine version of AIScorer.score_deal; same arguments and result"""
+        # Only the cache lookup runs in the thread; on_section is called on the loop
+        request, early = await asyncio.to_thread(
+            self._prepare_request, deal_data, force, on_section, previous
+        )
+        if early is not None:
+            self._replay_cached(request, on_section)
+            return early
+
+        call = {'retries': 0, 'first_token': None}
+        started = time.monotonic()
+        try:
+            if on_section is None:
+                message = await self._create_message(request['system_prompt'], request['prompt'], call)
+            else:
+                message = await self._stream_message(request['system_prompt'], request['prompt'],
+                                                     self._section_emitter(request, on_section), call)
+            return await asyncio.to_thread(self._finish_request, request, deal_data, message, started, call)
+        except Exception as e:
+            return await asyncio.to_thread(self._fail_request, request, deal_data, e, started, call)
+
+    async def _create_message(self, system_prompt, prompt, info=None):
+        """Call the Messages API and wait for the whole response"""
+        params = self._request_params(system_prompt, prompt)
+        return await self._call_with_retries(
+            system_prompt, prompt,
+            lambda timeout: self.client.messages.create(**params, **timeout),
+            info=info
+        )
+
+    async def _stream_message(self, system_prompt, prompt, on_section, info=None):
+        """
+        Call the Messages API with streaming, reporting sections as they close
+
+        Returns:
+            The final Message, as messages.create would
+        """
+        params = self._request_params(system_prompt, prompt)
+        emitted = []
+
+        async def call(timeout):
+            parser = SectionStreamParser()
+            give_up_at = time.monotonic() + timeout['timeout'] if timeout else None
+            async with self.client.messages.stream(**params, **timeout) as stream:
+                async for text in stream.text_stream:
+                    self._on_stream_text(text, parser, give_up_at, info, emitted, on_section)
+                return await stream.get_final_message()
+
+        # Once sections have been handed out a retry would repeat them
+        return await self._call_with_retries(system_prompt, prompt, call,
+                                             can_retry=lambda: not emitted, info=info)
+
+    async def _call_with_retries(self, system_prompt, prompt, call, can_retry=None, info=None):
+        """AIScorer._call_with_retries for a call returning an awaitable"""
+        reserved = self._reservation(system_prompt, prompt)
+        deadline_at = None
+
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                await self.limiter.acquire_async(reserved)
+
+            # Waiting for our own rate limiter is not the API being slow
+            if self.deadline and deadline_at is None:
+                deadline_at = time.monotonic() + self.deadline
+            timeout = self._attempt_timeout(deadline_at, reserved)
+
+            try:
+                message = await call(timeout)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, reserved, deadline_at, can_retry, info)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+
+            self._settle(reserved, message)
+            return message
+
+
+class AsyncScoringService:
+    """
+    Event loop in a background thread that drains the scoring queue
+
+    Runs up to concurrency jobs at once with a coroutine handler (see
+    job_queue.make_async_scoring_handler), taking the place of the
+    queue's worker threads. Other threads, such as Flask request
+    handlers, can run their own coroutines on the same loop with run().
+    """
+
+    def __init__(self, job_queue, handler, concurrency=200):
+        """
+        Initialize the service
+
+        Args:
+            job_queue: JobQueue to drain
+            handler: Coroutine function(deal_id, progress=..., **options)
+            concurrency: Most jobs in flight at once
+        """
+        self.job_queue = job_queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.loop = None
+
+        self._thread = None
+        self._ready = threading.Event()
+        self._stopping = None
+
+    def start(self):
+        """Start the loop thread and begin taking jobs (no-op if running)"""
+        if self._thread is not None:
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._main, name='async-scoring', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _main(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._stopping = asyncio.Event()
+        self._ready.set()
+        try:
+            self.loop.run_until_complete(
+                self.job_queue.work_async(self.handler, self.concurrency, self._stopping)
+            )
+        finally:
+            self.loop.close()
+
+    def run(self, coro, timeout=None):
+        """
+        Run a coroutine on the service loop from another thread
+
+        Args:
+            coro: Coroutine, e.g. scorer.score_deal(deal)
+            timeout: Seconds to wait for it (default: wait)
+
+        Returns:
+            The coroutine's result
+        """
+        if self.loop is None:
+            raise RuntimeError('AsyncScoringService is not running')
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def stop(self, timeout=None):
+        """
+        Stop taking jobs and wait for those in flight
+
+        Args:
+            timeout: Seconds to wait for the loop thread (default: wait)
+        """
+        if self._thread is None:
+            return
+        self.loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout)
+        self._thread = None
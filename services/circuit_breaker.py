@@ -0,0 +1,120 @@
+"""
+Circuit Breaker Service
+Stops calling the AI API for a while after repeated upstream failures
+"""
+import threading
+import time
+
+BREAKER_STATES = ('closed', 'open', 'half_open')
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker shared by every scorer in a process
+
+    closed: calls go through; failure_threshold failures in a row open it.
+    open: calls are refused at once until reset_timeout has passed.
+    half_open: a single trial call goes through; success closes the
+    breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        """
+        Initialize the breaker
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+                (0 disables it)
+            reset_timeout: Seconds to stay open before allowing a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = 'closed'
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._stats = {'opened': 0, 'rejected': 0, 'failures': 0, 'successes': 0}
+
+    @property
+    def state(self):
+        """Current state; an open breaker past its timeout reads as half_open"""
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now):
+        if self._state == 'open' and now - self._opened_at >= self.reset_timeout:
+            self._state = 'half_open'
+            self._trial_running = False
+        return self._state
+
+    def allow(self):
+        """
+        Check whether a call may go ahead
+
+        Returns:
+            True if the caller should make the call (and then report it
+            with record), False if it should fall back instead
+        """
+        if not self.failure_threshold:
+            return True
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def record(self, failed):
+        """
+        Report the outcome of an allowed call
+
+        Args:
+            failed: True if the upstream service failed (timeout,
+                connection error, 5xx/429 after retries)
+        """
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            if not failed:
+                self._stats['successes'] += 1
+                self._failures = 0
+                self._state = 'closed'
+                self._trial_running = False
+                return
+
+            self._stats['failures'] += 1
+            self._failures += 1
+            if state == 'half_open' or self._failures >= self.failure_threshold:
+                if state != 'open':
+                    self._stats['opened'] += 1
+                self._state = 'open'
+                self._opened_at = now
+                self._trial_running = False
+
+    def get_stats(self):
+        """
+        Get the breaker state for monitoring
+
+        Returns:
+            Dictionary with state, consecutive failures, seconds until a
+            trial call is allowed (while open) and opened/rejected/failure/
+            success totals
+        """
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            stats = dict(self._stats)
+            stats.update({
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'retry_in': round(self._opened_at + self.reset_timeout - now, 1) if state == 'open' else None
+            })
+        return stats
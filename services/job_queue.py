@@ -0,0 +1,810 @@
+"""
+Scoring Job Queue
+Persistent SQLite-backed queue that runs AI scoring off the request path
+"""
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+FINISHED_STATUSES = ('done', 'failed')
+
+# Priority of a job pushed back by JobDeferred
+DEFERRED_PRIORITY = -1
+
+# How often wait() checks on a job
+WAIT_POLL_SECONDS = 0.25
+
+
+class JobDeferred(Exception):
+    """
+    Raised by a handler to put its job behind everything else waiting
+
+    The job is queued again with DEFERRED_PRIORITY and the given options
+    merged into its own, without using up an attempt.
+    """
+
+    def __init__(self, reason, **options):
+        super().__init__(reason)
+        self.options = options
+
+
+class JobQueue:
+    """
+    Queue of scoring jobs stored in the scoring_jobs table, drained by a
+    pool of worker threads
+
+    Several processes (web workers, scoring_worker.py) may share one
+    database: jobs are claimed inside a write transaction, and a claim is
+    a lease, so a job held by a worker that died is picked up again once
+    the lease runs out.
+    """
+
+    def __init__(self, pool, handler, workers=2, poll_interval=1.0,
+                 lease_seconds=600, max_attempts=2):
+        """
+        Initialize the queue
+
+        Args:
+            pool: ConnectionPool for the deals database
+            handler: Callable(deal_id, progress=callback, **options) run for
+                each job; returns a JSON-serializable result or raises to
+                fail the attempt. progress(key, value) publishes a partial
+                result (see get(include_partial=True))
+            workers: Number of worker threads started by start()
+            poll_interval: Seconds an idle worker waits before checking again
+            lease_seconds: How long a claimed job is reserved for its worker
+            max_attempts: Attempts before a job is marked failed
+        """
+        self.pool = pool
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self._threads = []
+        self._stopping = threading.Event()
+        self._wakeup = threading.Condition()
+        self._lock = threading.Lock()
+        self._stats = {'completed': 0, 'failed': 0, 'retried': 0, 'deferred': 0, 'coalesced': 0}
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._async_jobs = 0
+        self._done_waiters = {}
+
+    @contextmanager
+    def _connection(self):
+        conn = self.pool.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, deal_id, **options):
+        """
+        Add a scoring job
+
+        Args:
+            deal_id: The deal to score
+            **options: JSON-serializable keyword arguments for the handler
+
+        Returns:
+            ID of the new job
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO scoring_jobs (deal_id, options) VALUES (?, ?)",
+                           (deal_id, json.dumps(options, sort_keys=True) if options else None))
+            job_id = cursor.lastrowid
+            conn.commit()
+
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def enqueue_coalesced(self, deal_id, input_hash, **options):
+        """
+        Add a scoring job unless an identical one is already pending
+
+        A request for a deal that already has a queued or running job with
+        the same input hash and options joins that job, so concurrent
+        callers share one API call and one analysis write.
+
+        Args:
+            deal_id: The deal to score
+            input_hash: Digest of the deal fields being scored
+                (see ai_scorer.input_hash)
+            **options: JSON-serializable keyword arguments for the handler
+
+        Returns:
+            (job_id, coalesced) where coalesced is True if an existing job
+            was returned
+        """
+        encoded = json.dumps(options, sort_keys=True) if options else None
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("""
+                    SELECT id FROM scoring_jobs
+                    WHERE deal_id = ? AND status IN ('queued', 'running') AND batch_id IS NULL
+                      AND input_hash IS ? AND options IS ?
+                    ORDER BY id DESC
+                    LIMIT 1
+                """, (deal_id, input_hash, encoded))
+                row = cursor.fetchone()
+                if row is None:
+                    cursor.execute(
+                        "INSERT INTO scoring_jobs (deal_id, options, input_hash) VALUES (?, ?, ?)",
+                        (deal_id, encoded, input_hash)
+                    )
+                    job_id = cursor.lastrowid
+                else:
+                    job_id = row['id']
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+        if row is not None:
+            self._count('coalesced')
+            return job_id, True
+
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id, False
+
+    def enqueue_batch(self, deal_ids, concurrency, **options):
+        """
+        Add one job per deal, grouped as a batch
+
+        Args:
+            deal_ids: Deals to score
+            concurrency: Most jobs of this batch allowed to run at once
+            **options: JSON-serializable keyword arguments for the handler
+
+        Returns:
+            ID of the new batch
+        """
+        encoded = json.dumps(options, sort_keys=True) if options else None
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                cursor.execute("INSERT INTO scoring_batches (concurrency) VALUES (?)", (concurrency,))
+                batch_id = cursor.lastrowid
+                cursor.executemany(
+                    "INSERT INTO scoring_jobs (deal_id, batch_id, options) VALUES (?, ?, ?)",
+                    [(deal_id, batch_id, encoded) for deal_id in deal_ids]
+                )
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+        with self._wakeup:
+            self._wakeup.notify_all()
+        return batch_id
+
+    def get_batch(self, batch_id):
+        """
+        Get the progress of a batch
+
+        Returns:
+            Dictionary with counts by status and one entry per deal (job
+            id, status, score once done, error once failed), or None if
+            the batch does not exist
+        """
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, concurrency, created_at FROM scoring_batches WHERE id = ?",
+                           (batch_id,))
+            batch = cursor.fetchone()
+            if batch is None:
+                return None
+
+            cursor.execute("""
+                SELECT id AS job_id, deal_id, status, attempts, result, error
+                FROM scoring_jobs
+                WHERE batch_id = ?
+                ORDER BY id
+            """, (batch_id,))
+            jobs = [dict(row) for row in cursor.fetchall()]
+
+        counts = {status: 0 for status in JOB_STATUSES}
+        for job in jobs:
+            counts[job['status']] += 1
+            result = json.loads(job.pop('result')) if job['result'] else None
+            job['score'] = result.get('score') if result else None
+
+        batch = dict(batch)
+        batch.update({
+            'total': len(jobs),
+            'counts': counts,
+            'finished': counts['done'] + counts['failed'] == len(jobs),
+            'jobs': jobs
+        })
+        return batch
+
+    def get(self, job_id, include_partial=False):
+        """
+        Get a job's current state
+
+        Args:
+            job_id: The job ID
+            include_partial: Also return the sections published so far
+                under 'partial'
+
+        Returns:
+            Job dictionary (with 'position' in the queue while queued), or
+            None if not found
+        """
+        columns = 'id, deal_id, options, status, priority, attempts, result, error, created_at, started_at, finished_at'
+        if include_partial:
+            columns += ', partial'
+
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {columns} FROM scoring_jobs WHERE id = ?", (job_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+
+            job = dict(row)
+            if job['status'] == 'queued':
+                cursor.execute("""
+                    SELECT COUNT(*) FROM scoring_jobs
+                    WHERE status = 'queued' AND (priority > :priority OR (priority = :priority AND id < :id))
+                """, {'priority': job['priority'], 'id': job_id})
+                job['position'] = cursor.fetchone()[0] + 1
+
+        job['options'] = json.loads(job['options']) if job['options'] else {}
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        if include_partial:
+            job['partial'] = json.loads(job['partial']) if job['partial'] else {}
+        return job
+
+    def wait(self, job_id, timeout):
+        """
+        Wait for a job to finish
+
+        Args:
+            job_id: The job ID
+            timeout: Most seconds to wait
+
+        Returns:
+            The job as get() returns it, finished or not, or None if not found
+        """
+        give_up_at = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = give_up_at - time.monotonic()
+            if job is None or job['status'] in FINISHED_STATUSES or remaining <= 0:
+                return job
+            time.sleep(min(remaining, WAIT_POLL_SECONDS))
+
+    async def wait_async(self, job_id, timeout):
+        """
+        wait() for the event loop running work_async
+
+        A job run by this loop wakes the waiter as soon as it is recorded;
+        one run by another process is polled for.
+        """
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + timeout
+        event = asyncio.Event()
+        self._done_waiters.setdefault(job_id, set()).add(event)
+        try:
+            while True:
+                event.clear()
+                job = await asyncio.to_thread(self.get, job_id)
+                remaining = give_up_at - loop.time()
+                if job is None or job['status'] in FINISHED_STATUSES or remaining <= 0:
+                    return job
+                try:
+                    await asyncio.wait_for(event.wait(), min(remaining, WAIT_POLL_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            waiters = self._done_waiters[job_id]
+            waiters.discard(event)
+            if not waiters:
+                del self._done_waiters[job_id]
+
+    def start(self):
+        """Start the worker threads (no-op if already running)"""
+        if self._threads:
+            return
+
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work,
+                args=(f"{self._worker_prefix}:{i}",),
+                name=f"scoring-worker-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """
+        Stop the worker threads after their current job
+
+        Args:
+            timeout: Seconds to wait for each thread (default: wait)
+        """
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _claim(self, worker):
+        """
+        Reserve the oldest runnable job for a worker
+
+        Returns:
+            (job_id, deal_id, options, attempts) or None if nothing is runnable
+        """
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                # Single-deal jobs go first so a big batch can't starve
+                # interactive scoring (deferred jobs go last); batch jobs
+                # respect their batch's cap. A deal already being scored
+                # waits, so its jobs never race each other (the later one
+                # then usually hits the result cache)
+                cursor.execute("""
+                    SELECT j.id, j.deal_id, j.options, j.attempts FROM scoring_jobs j
+                    LEFT JOIN scoring_batches b ON b.id = j.batch_id
+                    WHERE (j.status = 'queued' OR (j.status = 'running' AND j.lease_until < :now))
+                      AND (j.batch_id IS NULL OR b.concurrency > (
+                          SELECT COUNT(*) FROM scoring_jobs r
+                          WHERE r.batch_id = j.batch_id AND r.status = 'running'
+                            AND r.lease_until >= :now
+                      ))
+                      AND NOT EXISTS (
+                          SELECT 1 FROM scoring_jobs d
+                          WHERE d.deal_id = j.deal_id AND d.id != j.id AND d.status = 'running'
+                            AND d.lease_until >= :now
+                      )
+                    ORDER BY j.priority DESC, j.batch_id IS NOT NULL, j.id
+                    LIMIT 1
+                """, {'now': now})
+                row = cursor.fetchone()
+                if row is None:
+                    conn.rollback()
+                    return None
+
+                attempts = row['attempts'] + 1
+                cursor.execute("""
+                    UPDATE scoring_jobs
+                    SET status = 'running', attempts = ?, worker = ?, lease_until = ?,
+                        partial = NULL, started_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (attempts, worker, now + self.lease_seconds, row['id']))
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+        options = json.loads(row['options']) if row['options'] else {}
+        return row['id'], row['deal_id'], options, attempts
+
+    def _finish(self, job_id, worker, status, result=None, error=None):
+        """Record the outcome of an attempt, if the worker still holds the job"""
+        with self._connection() as conn:
+            conn.execute("""
+                UPDATE scoring_jobs
+                SET status = ?, result = ?, error = ?, lease_until = NULL,
+                    finished_at = CASE WHEN ? = 'queued' THEN NULL ELSE CURRENT_TIMESTAMP END
+                WHERE id = ? AND worker = ?
+            """, (status, json.dumps(result) if result is not None else None, error,
+                  status, job_id, worker))
+            conn.commit()
+
+    def _defer(self, job_id, worker, options, reason):
+        """Queue a job again at the back, without counting the attempt"""
+        with self._connection() as conn:
+            conn.execute("""
+                UPDATE scoring_jobs
+                SET status = 'queued', priority = ?, options = ?, error = ?,
+                    attempts = attempts - 1, lease_until = NULL, partial = NULL
+                WHERE id = ? AND worker = ?
+            """, (DEFERRED_PRIORITY, json.dumps(options), reason, job_id, worker))
+            conn.commit()
+
+    def _progress_writer(self, job_id, worker):
+        """Build the progress callback handed to the handler for one job"""
+        partial = {}
+
+        def progress(key, value):
+            partial[key] = value
+            with self._connection() as conn:
+                conn.execute("UPDATE scoring_jobs SET partial = ? WHERE id = ? AND worker = ?",
+                             (json.dumps(partial), job_id, worker))
+                conn.commit()
+
+        return progress
+
+    def _async_progress_writer(self, job_id, worker):
+        """
+        Build the progress callback for a coroutine handler
+
+        The callback runs on the event loop and only records the section;
+        the latest partial result is written from the default thread pool,
+        one write at a time, so a busy database never stalls the other
+        jobs' streams.
+
+        Returns:
+            (progress, flush); await flush() to wait for the last write
+        """
+        loop = asyncio.get_running_loop()
+        partial = {}
+        state = {'writing': None, 'dirty': False}
+
+        def write(snapshot):
+            with self._connection() as conn:
+                conn.execute("UPDATE scoring_jobs SET partial = ? WHERE id = ? AND worker = ?",
+                             (snapshot, job_id, worker))
+                conn.commit()
+
+        def start_write():
+            state['dirty'] = False
+            state['writing'] = loop.run_in_executor(None, write, json.dumps(partial))
+            state['writing'].add_done_callback(written)
+
+        def written(future):
+            state['writing'] = None
+            if future.exception() is not None:
+                print(f"Scoring worker {worker}: could not save progress: {future.exception()}")
+            if state['dirty']:
+                start_write()
+
+        def progress(key, value):
+            partial[key] = value
+            if state['writing'] is None:
+                start_write()
+            else:
+                state['dirty'] = True
+
+        async def flush():
+            while state['writing'] is not None:
+                await asyncio.wait({state['writing']})
+
+        return progress, flush
+
+    def run_one(self, worker='inline'):
+        """
+        Claim and run a single job
+
+        Returns:
+            True if a job was run, False if the queue was empty
+        """
+        claimed = self._claim(worker)
+        if claimed is None:
+            return False
+
+        job_id, deal_id, options, attempts = claimed
+        try:
+            result = self.handler(deal_id, progress=self._progress_writer(job_id, worker), **options)
+        except Exception as e:
+            self._record_outcome(job_id, worker, options, attempts, error=e)
+        else:
+            self._record_outcome(job_id, worker, options, attempts, result=result)
+        return True
+
+    def _record_outcome(self, job_id, worker, options, attempts, result=None, error=None):
+        """Store a finished attempt: done, deferred, queued for a retry or failed"""
+        if isinstance(error, JobDeferred):
+            self._defer(job_id, worker, {**options, **error.options}, str(error))
+            self._count('deferred')
+        elif error is not None:
+            # A missing deal won't appear on retry
+            if attempts < self.max_attempts and not isinstance(error, LookupError):
+                self._finish(job_id, worker, 'queued', error=str(error))
+                self._count('retried')
+            else:
+                self._finish(job_id, worker, 'failed', error=str(error))
+                self._count('failed')
+        else:
+            self._finish(job_id, worker, 'done', result=result)
+            self._count('completed')
+
+    async def run_one_async(self, handler, worker):
+        """
+        Claim and run a single job with a coroutine handler
+
+        Database work runs in the default thread pool so the event loop
+        stays free for the handler's API calls.
+
+        Returns:
+            True if a job was run, False if the queue was empty
+        """
+        claimed = await asyncio.to_thread(self._claim, worker)
+        if claimed is None:
+            return False
+        await self._run_claimed_async(handler, claimed, worker)
+        return True
+
+    async def _run_claimed_async(self, handler, claimed, worker):
+        """Run a claimed job with a coroutine handler and record the outcome"""
+        job_id, deal_id, options, attempts = claimed
+        progress, flush = self._async_progress_writer(job_id, worker)
+        try:
+            result = await handler(deal_id, progress=progress, **options)
+        except Exception as e:
+            await flush()
+            await asyncio.to_thread(self._record_outcome, job_id, worker, options, attempts, error=e)
+        else:
+            await flush()
+            await asyncio.to_thread(self._record_outcome, job_id, worker, options, attempts, result=result)
+        for event in self._done_waiters.get(job_id, ()):
+            event.set()
+
+    async def work_async(self, handler, concurrency=100, stopping=None):
+        """
+        Run queued jobs on the current event loop until stopping is set
+
+        Takes the place of start()'s worker threads: each claimed job runs
+        as its own task, up to concurrency at once, so hundreds of API
+        calls can be in flight without a thread each.
+
+        Args:
+            handler: Coroutine function(deal_id, progress=callback, **options)
+                (see make_async_scoring_handler)
+            concurrency: Most jobs in flight at once
+            stopping: asyncio.Event that ends the loop; jobs in flight are
+                finished first (default: run until cancelled)
+        """
+        stopping = stopping or asyncio.Event()
+        slots = asyncio.Semaphore(concurrency)
+        tasks = set()
+        idle = min(self.poll_interval, 0.25)
+
+        async def run_claimed(claimed, worker):
+            with self._lock:
+                self._async_jobs += 1
+            try:
+                await self._run_claimed_async(handler, claimed, worker)
+            except sqlite3.Error as e:
+                print(f"Scoring worker {worker}: database error: {e}")
+            finally:
+                with self._lock:
+                    self._async_jobs -= 1
+                slots.release()
+
+        count = 0
+        while not stopping.is_set():
+            await slots.acquire()
+            if stopping.is_set():
+                slots.release()
+                break
+
+            # Each job gets its own worker name: _finish matches on it
+            count += 1
+            worker = f"{self._worker_prefix}:async-{count}"
+            try:
+                claimed = await asyncio.to_thread(self._claim, worker)
+            except sqlite3.Error as e:
+                print(f"Scoring worker {worker}: database error: {e}")
+                claimed = None
+
+            if claimed is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(stopping.wait(), idle)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(run_claimed(claimed, worker))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _work(self, worker):
+        """Worker thread loop"""
+        while not self._stopping.is_set():
+            try:
+                ran = self.run_one(worker)
+            except sqlite3.Error as e:
+                print(f"Scoring worker {worker}: database error: {e}")
+                ran = False
+
+            if not ran:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_stats(self):
+        """
+        Get queue depth and worker counters
+
+        Returns:
+            Dictionary with job counts by status, live worker count, jobs
+            in flight under work_async and completed/failed/retried/
+            deferred totals for this process; coalesced counts requests
+            that joined a pending job instead of adding a duplicate
+        """
+        with self._connection() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM scoring_jobs GROUP BY status").fetchall()
+
+        with self._lock:
+            stats = dict(self._stats)
+            stats['async_jobs'] = self._async_jobs
+        stats['jobs'] = {status: 0 for status in JOB_STATUSES}
+        stats['jobs'].update({row[0]: row[1] for row in rows})
+        stats['workers'] = sum(thread.is_alive() for thread in self._threads)
+        return stats
+
+
+def make_scoring_handler(deal_model, get_scorer, pre_scorer=None, reject_mode='off'):
+    """
+    Build the job handler that scores a deal and stores the analysis
+
+    Args:
+        deal_model: Deal model instance
+        get_scorer: Zero-argument callable returning an AIScorer
+        pre_scorer: Optional PreScorer run (and stored) before the API call
+        reject_mode: What to do with deals the pre-scorer rejects: 'off'
+            (score them anyway), 'skip' (no API call) or 'defer' (score
+            them once nothing else is waiting)
+
+    Returns:
+        Callable(deal_id, progress=None, force=False, deferred=False)
+        returning a short result summary; sections are streamed to
+        progress as they arrive. While the scorer's circuit breaker is
+        open the job finishes at once with a degraded result (see
+        degraded_result) and nothing is stored
+    """
+    def handler(deal_id, progress=None, force=False, deferred=False):
+        deal, pre, previous, early = _prepare_scoring(deal_model, pre_scorer, reject_mode,
+                                                      deal_id, force, deferred)
+        if early is not None:
+            return early
+        scorer = get_scorer()
+        result = scorer.score_deal(deal, force=force, on_section=progress, previous=previous)
+        return _store_scoring(deal_model, scorer, deal_id, result, previous, pre)
+
+    return handler
+
+
+def make_async_scoring_handler(deal_model, get_scorer, pre_scorer=None, reject_mode='off'):
+    """
+    Build the coroutine version of make_scoring_handler's handler
+
+    Args:
+        deal_model: Deal model instance
+        get_scorer: Zero-argument callable returning an AsyncAIScorer
+        pre_scorer: As in make_scoring_handler
+        reject_mode: As in make_scoring_handler
+
+    Returns:
+        Coroutine function with the handler's arguments and result, for
+        JobQueue.work_async; database work runs in the default thread pool
+    """
+    async def handler(deal_id, progress=None, force=False, deferred=False):
+        deal, pre, previous, early = await asyncio.to_thread(
+            _prepare_scoring, deal_model, pre_scorer, reject_mode, deal_id, force, deferred
+        )
+        if early is not None:
+            return early
+        scorer = get_scorer()
+        result = await scorer.score_deal(deal, force=force, on_section=progress, previous=previous)
+        return await asyncio.to_thread(_store_scoring, deal_model, scorer, deal_id, result, previous, pre)
+
+    return handler
+
+
+def _prepare_scoring(deal_model, pre_scorer, reject_mode, deal_id, force, deferred):
+    """
+    Load a deal and pre-screen it ahead of the API call
+
+    Returns:
+        (deal, pre-score, previous analysis, early result); the early
+        result is set when the pre-screen skipped the deal
+    """
+    deal = deal_model.get_by_id(deal_id)
+    if not deal:
+        raise LookupError(f"Deal {deal_id} not found")
+
+    pre = None
+    if pre_scorer is not None:
+        pre = pre_scorer.score(deal)
+        deal_model.save_pre_score(deal_id, pre)
+        rejected = pre['decision'] == 'reject' and not force
+        if rejected and reject_mode == 'skip':
+            return deal, pre, None, {
+                'skipped': True,
+                'score': pre['score'],
+                'risk_level': pre['risk_level'],
+                'recommendation': 'Rejected by pre-screen: ' +
+                                  '; '.join(pre['critical_flags'] + pre['red_flags']),
+                'pre_score': pre
+            }
+        if rejected and reject_mode == 'defer' and not deferred:
+            raise JobDeferred(f"Pre-screen score {pre['score']}; deferred", deferred=True)
+
+    # A forced run starts over; otherwise keep what an edit left valid
+    previous = None if force else deal_model.get_analysis(deal_id)
+    return deal, pre, previous, None
+
+
+def _store_scoring(deal_model, scorer, deal_id, result, previous, pre):
+    """Save a scoring result and build the job result summary"""
+    if result.get('circuit_open'):
+        fallback = degraded_result(previous, pre, result['error'])
+        if fallback is None:
+            raise RuntimeError(result['error'])
+        return fallback
+    if not result['success']:
+        raise RuntimeError(result.get('error', 'Unknown error'))
+
+    analysis_id = deal_model.save_analysis(deal_id, result, model=scorer.model,
+                                           inputs=result.get('inputs'))
+    if analysis_id is None:
+        raise LookupError(f"Deal {deal_id} was deleted while scoring")
+
+    return {
+        'analysis_id': analysis_id,
+        'score': result['score'],
+        'risk_level': result.get('risk_level', 'medium'),
+        'recommendation': result.get('recommendation', ''),
+        'cached': result.get('cached', False),
+        'usage': result.get('usage'),
+        'parse_report': result.get('parse_report'),
+        'reused_sections': result.get('reused_sections', [])
+    }
+
+
+def degraded_result(previous, pre, reason):
+    """
+    Stand-in result for when the AI service is unavailable
+
+    Args:
+        previous: Latest stored analysis of the deal, or None
+        pre: PreScorer result for the deal, or None
+        reason: Why the AI was not called
+
+    Returns:
+        Result summary with 'degraded' True and 'source' naming what it
+        is based on ('last_analysis' or 'pre_score'), or None if there is
+        nothing to fall back on
+    """
+    if previous is not None and previous.get('score') is not None:
+        return {
+            'degraded': True,
+            'source': 'last_analysis',
+            'reason': reason,
+            'score': previous['score'],
+            'risk_level': previous.get('risk_level') or 'medium',
+            'recommendation': previous.get('recommendation') or ''
+        }
+    if pre is not None:
+        return {
+            'degraded': True,
+            'source': 'pre_score',
+            'reason': reason,
+            'score': pre['score'],
+            'risk_level': pre['risk_level'],
+            'recommendation': 'Preliminary rule-based score: ' +
+                              ('; '.join(pre['critical_flags'] + pre['red_flags']) or 'no red flags found'),
+            'pre_score': pre
+        }
+    return None
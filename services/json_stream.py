@@ -0,0 +1,213 @@
+"""
+Incremental JSON Section Parser
+Pulls completed top-level fields out of a JSON object while it streams in
+"""
+import json
+import re
+
+WHITESPACE = ' \t\r\n'
+
+# Characters that matter inside a string, and inside a nested value
+STRING_SPECIAL = re.compile(r'["\\]')
+NESTED_SPECIAL = re.compile(r'["{}\[\]]')
+
+
+class SectionStreamParser:
+    """
+    Single-pass scanner over a streaming JSON object
+
+    feed() takes each new chunk of text and returns the top-level
+    (key, value) pairs whose values finished inside it, so callers can show
+    'executive_summary' while 'market_analysis' is still being written.
+    Text before the first '{' (such as a ```json fence) is skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.pos = 0
+        self.sections = {}
+        self.started = False
+        self.closed = False
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._state = 'key'  # key -> colon -> value -> comma -> key ...
+        self._token_start = None
+        self._key = None
+
+    @property
+    def pending_key(self):
+        """Key whose value was still being written when the text stopped"""
+        if self.closed or self._state not in ('colon', 'value'):
+            return None
+        return self._key
+
+    def salvage_pending(self):
+        """
+        Recover what can be kept of a value cut off mid-way
+
+        Only lists are salvaged: every item closed before the cut is
+        kept. A half-written string or number is never guessed at.
+
+        Returns:
+            (key, items) for a truncated list, or None
+        """
+        key = self.pending_key
+        if key is None or self._state != 'value' or self._token_start is None:
+            return None
+        text = self.buffer[self._token_start:]
+        if not text.startswith('['):
+            return None
+        return key, complete_items(text)
+
+    def feed(self, chunk):
+        """
+        Add text and collect newly completed sections
+
+        Args:
+            chunk: Next piece of the response text
+
+        Returns:
+            List of (key, value) pairs completed by this chunk
+        """
+        self.buffer += chunk
+        completed = []
+        buf = self.buffer
+        i = self.pos
+
+        if not self.started:
+            start = buf.find('{', i)
+            if start == -1:
+                self.pos = len(buf)
+                return completed
+            self.started = True
+            self._depth = 1
+            i = start + 1
+
+        while i < len(buf) and not self.closed:
+            # Jump over runs of text that can't change the state
+            if self._in_string:
+                pattern = None if self._escape else STRING_SPECIAL
+            else:
+                pattern = NESTED_SPECIAL if self._depth > 1 else None
+            if pattern is not None:
+                match = pattern.search(buf, i)
+                if match is None:
+                    i = len(buf)
+                    break
+                i = match.start()
+
+            ch = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        if self._state == 'key':
+                            self._key = self._decode(self._token_start, i + 1)
+                            self._state = 'colon'
+                        elif self._state == 'value':
+                            self._complete(self._token_start, i + 1, completed)
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._state in ('key', 'value'):
+                    self._token_start = i
+            elif ch in '{[':
+                if self._depth == 1 and self._state == 'value' and self._token_start is None:
+                    self._token_start = i
+                self._depth += 1
+            elif ch in '}]':
+                if self._depth == 1:
+                    # End of the whole object; flush a pending scalar
+                    if self._state == 'value' and self._token_start is not None:
+                        self._complete(self._token_start, i, completed)
+                    self.closed = True
+                self._depth -= 1
+                if self._depth == 1 and self._state == 'value':
+                    self._complete(self._token_start, i + 1, completed)
+            elif self._depth == 1:
+                if ch == ':' and self._state == 'colon':
+                    self._state = 'value'
+                    self._token_start = None
+                elif ch == ',':
+                    if self._state == 'value' and self._token_start is not None:
+                        self._complete(self._token_start, i, completed)
+                    self._state = 'key'
+                elif ch not in WHITESPACE and self._state == 'value' and self._token_start is None:
+                    # Start of a number, true, false or null
+                    self._token_start = i
+
+            i += 1
+
+        self.pos = i
+        return completed
+
+    def _decode(self, start, end):
+        try:
+            return json.loads(self.buffer[start:end])
+        except ValueError:
+            return None
+
+    def _complete(self, start, end, completed):
+        """Record the value between start and end for the current key"""
+        value = self._decode(start, end)
+        if value is None and self.buffer.startswith('[', start):
+            # Tolerate stray commas and other damage between list items
+            value = complete_items(self.buffer[start:end])
+        if self._key is not None and (value is not None or self.buffer[start:end].strip() == 'null'):
+            self.sections[self._key] = value
+            completed.append((self._key, value))
+        self._state = 'comma'
+        self._token_start = None
+
+
+def complete_items(text):
+    """
+    Parse the items of a JSON array that end before the text does
+
+    Args:
+        text: Array text starting at '[', possibly cut off
+
+    Returns:
+        List of the items that were followed by ',' or ']'
+    """
+    items = []
+    depth = 0
+    in_string = False
+    escape = False
+    start = 1
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 0:
+                _append_item(text[start:i], items)
+                break
+        elif ch == ',' and depth == 1:
+            _append_item(text[start:i], items)
+            start = i + 1
+    return items
+
+
+def _append_item(text, items):
+    if not text.strip():
+        return
+    try:
+        items.append(json.loads(text))
+    except ValueError:
+        pass
@@ -0,0 +1,226 @@
+"""
+Pre-Scorer Service
+Scores deals locally with the mechanical rules from the AI system prompt, so
+obvious rejects can be caught without an API call
+"""
+import re
+
+RULES_VERSION = 2
+
+# Deal columns the rules read
+INPUT_FIELDS = (
+    'commodity_type', 'source_name', 'source_reliability', 'deal_text',
+    'price', 'price_type', 'gross_discount', 'commission', 'net_discount',
+    'quantity', 'origin_country', 'payment_method', 'shipping_terms'
+)
+
+# Points out of the 20 available for payment terms
+PAYMENT_POINTS = {
+    'DLC': 18, 'LC': 17, 'SBLC': 15, 'BCL': 12,
+    'WIRE TRANSFER': 7, 'WIRE': 7, 'T/T': 7, 'TT': 7,
+}
+
+INCOTERMS = ('EXW', 'FCA', 'FAS', 'FOB', 'CFR', 'CIF', 'CPT', 'CIP', 'DAP', 'DPU', 'DDP')
+
+# Matched as whole words, so official long forms are listed too
+SANCTIONED_COUNTRIES = (
+    'north korea', 'dprk', 'dpr korea', 'iran', 'syria', 'syrian arab republic', 'cuba',
+    'russia', 'russian federation', 'belarus', 'venezuela', 'myanmar', 'burma', 'crimea'
+)
+
+# Origins where gold at LME -8% to -12% is normal
+AFRICAN_COUNTRIES = (
+    'ghana', 'mali', 'burkina faso', 'sudan', 'south africa', 'tanzania', 'guinea',
+    'zimbabwe', 'niger', 'ivory coast', "cote d'ivoire", "côte d'ivoire", 'cameroon',
+    'congo', 'drc', 'uganda', 'kenya', 'nigeria', 'sierra leone', 'liberia', 'senegal',
+    'ethiopia', 'zambia', 'chad', 'central african republic', 'mauritania', 'madagascar',
+    'togo', 'benin', 'egypt', 'namibia', 'botswana', 'angola', 'mozambique', 'eritrea',
+    'gabon', 'rwanda', 'burundi'
+)
+
+# Fields whose presence counts towards deal completeness
+COMPLETENESS_FIELDS = (
+    'commodity_type', 'source_name', 'quantity', 'origin_country',
+    'payment_method', 'shipping_terms', 'deal_text'
+)
+
+CRITICAL_PENALTY = 25
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value):
+    return str(value).strip() if value is not None else ''
+
+
+def _words(value):
+    return ' '.join(re.findall(r'\w+', _text(value).lower()))
+
+
+def names_country(origin, countries):
+    """
+    Whether an origin string names one of the countries
+
+    Whole words only, so 'Niger' does not match 'Nigeria' and a short
+    name does not match inside an unrelated word.
+    """
+    padded = f" {_words(origin)} "
+    return any(f" {_words(country)} " in padded for country in countries)
+
+
+class PreScorer:
+    """
+    Deterministic rule engine mirroring the system prompt's scoring criteria
+
+    Scores the same six weighted categories as the model (source 25,
+    price 25, payment 20, compliance 15, logistics 10, completeness 5)
+    and subtracts CRITICAL_PENALTY per critical red flag. It only sees the
+    structured fields, so it is a screen, not a replacement for the
+    analysis.
+    """
+
+    input_fields = INPUT_FIELDS
+
+    def __init__(self, reject_below=30):
+        """
+        Initialize the pre-scorer
+
+        Args:
+            reject_below: Scores under this are a clear reject
+        """
+        self.reject_below = reject_below
+
+    def score(self, deal):
+        """
+        Pre-score a deal
+
+        Args:
+            deal: Deal dictionary (see INPUT_FIELDS)
+
+        Returns:
+            Dictionary with score (0-100), risk_level, decision ('reject'
+            or 'score'), red_flags, critical_flags, strengths and the
+            points per category
+        """
+        findings = {'red_flags': [], 'critical_flags': [], 'strengths': []}
+        breakdown = {
+            'source': self._source(deal, findings),
+            'price': self._price(deal, findings),
+            'payment': self._payment(deal, findings),
+            'compliance': self._compliance(deal, findings),
+            'logistics': self._logistics(deal, findings),
+            'completeness': self._completeness(deal),
+        }
+        breakdown['penalty'] = -CRITICAL_PENALTY * len(findings['critical_flags'])
+
+        score = int(round(max(0, min(100, sum(breakdown.values())))))
+        if score >= 70:
+            risk_level = 'low'
+        elif score < 50:
+            risk_level = 'high'
+        else:
+            risk_level = 'medium'
+
+        return {
+            'score': score,
+            'risk_level': risk_level,
+            'decision': 'reject' if score < self.reject_below else 'score',
+            **findings,
+            'breakdown': breakdown,
+            'version': RULES_VERSION
+        }
+
+    def _source(self, deal, findings):
+        reliability = _number(deal.get('source_reliability'))
+        if reliability is None:
+            findings['red_flags'].append('Source reliability not rated')
+            return 10
+        reliability = max(0, min(10, reliability))
+        if reliability >= 8:
+            findings['strengths'].append(f"Reliable source ({reliability:g}/10)")
+            return 20 + (reliability - 8) * 2.5
+        if reliability >= 5:
+            return 12 + (reliability - 5) * 3.5
+        if reliability <= 3:
+            findings['red_flags'].append(f"Low source reliability ({reliability:g}/10)")
+        return reliability * 11 / 4
+
+    def _price(self, deal, findings):
+        if deal.get('price_type') != 'lme_discount':
+            # A fixed price needs market data the rules don't have
+            return 12 if _number(deal.get('price')) is not None else 8
+
+        gross = _number(deal.get('gross_discount'))
+        commission = _number(deal.get('commission'))
+        net = _number(deal.get('net_discount'))
+        if gross is None and net is None:
+            findings['red_flags'].append('LME pricing without a discount')
+            return 5
+
+        discount = abs(gross if gross is not None else net)
+        if gross is not None and commission is not None and net is not None \
+                and abs(net - (gross - commission)) > 0.2:
+            findings['red_flags'].append(
+                f"Net discount {net:g}% doesn't match gross {gross:g}% less commission {commission:g}%")
+        if commission is not None and abs(commission) > discount:
+            findings['red_flags'].append(f"Commission ({abs(commission):g}%) exceeds the discount ({discount:g}%)")
+
+        if discount >= 20:
+            findings['critical_flags'].append(f"Price {discount:g}% below LME")
+            return 0
+        if discount > 18:
+            findings['red_flags'].append(f"Price {discount:g}% below LME (over 18%)")
+            return 0
+
+        commodity = _text(deal.get('commodity_type')).lower()
+        if commodity == 'gold' and names_country(deal.get('origin_country'), AFRICAN_COUNTRIES):
+            if 8 <= discount <= 12:
+                findings['strengths'].append(f"LME -{discount:g}% is normal for African gold")
+                return 25
+            return 15 if discount > 12 else 20
+
+        if discount <= 5:
+            return 25
+        return 18 if discount <= 12 else 10
+
+    def _payment(self, deal, findings):
+        method = _text(deal.get('payment_method')).upper()
+        points = PAYMENT_POINTS.get(method)
+        if points is None:
+            findings['red_flags'].append('No recognised payment instrument')
+            return 5
+        if points >= 17:
+            findings['strengths'].append(f"Secure payment terms ({method})")
+        return points
+
+    def _compliance(self, deal, findings):
+        origin = _text(deal.get('origin_country')).lower()
+        if not origin:
+            findings['red_flags'].append('Origin country not given')
+            return 8
+        if names_country(origin, SANCTIONED_COUNTRIES):
+            findings['critical_flags'].append(f"Sanctioned origin ({deal.get('origin_country')})")
+            return 0
+        # Licences can only be checked in the full analysis
+        return 12
+
+    def _logistics(self, deal, findings):
+        terms = _text(deal.get('shipping_terms')).upper()
+        if not terms:
+            return 2
+        if any(term in terms.replace('/', ' ').split() for term in INCOTERMS):
+            return 10
+        return 5
+
+    def _completeness(self, deal):
+        present = sum(1 for field in COMPLETENESS_FIELDS if _text(deal.get(field)))
+        if deal.get('price_type') == 'lme_discount':
+            present += _number(deal.get('gross_discount')) is not None
+        else:
+            present += _number(deal.get('price')) is not None
+        return 5 * present / (len(COMPLETENESS_FIELDS) + 1)
@@ -0,0 +1,158 @@
+"""
+Rate Limiter Service
+Token buckets that keep AI scoring under the API's per-minute limits
+"""
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Bucket refilled continuously at a fixed rate per minute
+
+    The level may go negative when a caller settles more than it
+    reserved; later callers then wait for the debt to refill.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        """
+        Initialize the bucket
+
+        Args:
+            per_minute: Refill rate (0 or None means unlimited)
+            capacity: Maximum burst (default: one minute's worth)
+        """
+        self.per_minute = per_minute or 0
+        self.capacity = capacity or self.per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        if self.per_minute:
+            elapsed = now - self._updated
+            self.level = min(self.capacity, self.level + elapsed * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount can be taken (0 if available now)"""
+        if not self.per_minute:
+            return 0
+        self._refill(now)
+        # Requests larger than the bucket only need a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0
+        return (amount - self.level) * 60 / self.per_minute
+
+    def take(self, amount):
+        if self.per_minute:
+            self.level -= amount
+
+
+class RateLimiter:
+    """
+    Shared request and token budget for every scoring call in a process
+
+    Callers reserve an estimate before calling the API, then settle the
+    real usage afterwards. A 429/529 from the API pauses every caller,
+    not just the one that hit it.
+    """
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0):
+        """
+        Initialize the limiter
+
+        Args:
+            requests_per_minute: Request budget (0 = unlimited)
+            tokens_per_minute: Input + output token budget (0 = unlimited)
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = threading.Lock()
+        self._paused_until = 0
+        self._stats = {'acquired': 0, 'waited_seconds': 0.0, 'pauses': 0}
+
+    def try_acquire(self, tokens, waited=0.0):
+        """
+        Take one request and the given tokens if they are available now
+
+        Args:
+            tokens: Estimated tokens the call will use
+            waited: Seconds the caller has waited so far (for the stats)
+
+        Returns:
+            0 if taken, otherwise seconds to wait before trying again
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = max(
+                self._paused_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(tokens, now)
+            )
+            if delay > 0:
+                return delay
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self._stats['acquired'] += 1
+            self._stats['waited_seconds'] += waited
+            return 0
+
+    def acquire(self, tokens):
+        """
+        Block until one request and the given tokens are available
+
+        Args:
+            tokens: Estimated tokens the call will use
+        """
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(tokens, waited)
+            if delay <= 0:
+                return
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self, tokens):
+        """acquire() for coroutines: waits without blocking the event loop"""
+        waited = 0.0
+        while True:
+            delay = self.try_acquire(tokens, waited)
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def settle(self, reserved, actual):
+        """
+        Correct a reservation once real token usage is known
+
+        Args:
+            reserved: Tokens passed to acquire()
+            actual: Tokens the call really used
+        """
+        with self._lock:
+            self.tokens.take(actual - reserved)
+
+    def pause(self, seconds):
+        """Hold every caller for the given number of seconds"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._stats['pauses'] += 1
+
+    def get_stats(self):
+        """
+        Get limiter counters
+
+        Returns:
+            Dictionary with calls admitted, total seconds spent waiting,
+            number of API-imposed pauses and the configured limits
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['paused_for'] = round(max(0, self._paused_until - time.monotonic()), 2)
+        stats['waited_seconds'] = round(stats['waited_seconds'], 2)
+        stats['requests_per_minute'] = self.requests.per_minute
+        stats['tokens_per_minute'] = self.tokens.per_minute
+        return stats
@@ -0,0 +1,184 @@
+"""
+Recorded API Responses
+Saves Messages API responses to disk and plays them back without network
+"""
+import hashlib
+import json
+import os
+import threading
+
+from anthropic.types import Message
+
+RECORDING_MODES = ('off', 'record', 'replay')
+
+# Call options that do not change the response
+TRANSPORT_PARAMS = ('stream', 'timeout')
+
+
+class RecordingNotFound(LookupError):
+    """No recording matches a request being replayed"""
+
+
+def request_key(params):
+    """
+    Stable key of a messages.create / messages.stream request
+
+    Args:
+        params: Keyword arguments of the call (TRANSPORT_PARAMS are ignored)
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = {k: v for k, v in params.items() if k not in TRANSPORT_PARAMS}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class RecordingStore:
+    """
+    Directory of recordings, one JSON file per distinct request
+
+    Each file holds the request parameters and the full Message, so it
+    can be replayed by ReplayClient, served by mock_anthropic.py or fed
+    to benchmark_parser.py.
+    """
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def save(self, params, message):
+        """Record the Message returned for a request"""
+        key = request_key(params)
+        record = {
+            'key': key,
+            'request': {k: v for k, v in params.items() if k not in TRANSPORT_PARAMS},
+            'message': message.to_dict()
+        }
+        tmp_path = self._path(key) + '.tmp'
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f)
+            os.replace(tmp_path, self._path(key))
+
+    def load(self, params):
+        """
+        Find the recorded Message for a request
+
+        Raises:
+            RecordingNotFound: If the request was never recorded
+        """
+        try:
+            with open(self._path(request_key(params)), encoding='utf-8') as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            raise RecordingNotFound(f"No recording for this request in {self.directory}")
+        return Message.model_validate(record['message'])
+
+
+class _Messages:
+    """messages namespace shared by the recording and replay clients"""
+
+    def __init__(self, store, inner=None, chunk_size=40):
+        self._store = store
+        self._inner = inner
+        self._chunk_size = chunk_size
+
+    def create(self, **params):
+        if self._inner is None:
+            return self._store.load(params)
+        message = self._inner.create(**params)
+        self._store.save(params, message)
+        return message
+
+    def stream(self, **params):
+        if self._inner is None:
+            return _ReplayStream(self._store.load(params), self._chunk_size)
+        return _RecordingStream(self._inner.stream(**params), self._store, params)
+
+
+class _RecordingStream:
+    """Wraps a MessageStreamManager and records the final Message"""
+
+    def __init__(self, manager, store, params):
+        self._manager = manager
+        self._store = store
+        self._params = params
+        self._stream = None
+
+    def __enter__(self):
+        self._stream = self._manager.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._manager.__exit__(*exc_info)
+
+    @property
+    def text_stream(self):
+        return self._stream.text_stream
+
+    def get_final_message(self):
+        message = self._stream.get_final_message()
+        self._store.save(self._params, message)
+        return message
+
+
+class _ReplayStream:
+    """Plays a recorded Message back as a text stream"""
+
+    def __init__(self, message, chunk_size):
+        self._message = message
+        self._chunk_size = chunk_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    @property
+    def text_stream(self):
+        text = ''.join(block.text for block in self._message.content if block.type == 'text')
+        for i in range(0, len(text), self._chunk_size):
+            yield text[i:i + self._chunk_size]
+
+    def get_final_message(self):
+        return self._message
+
+
+class RecordingClient:
+    """Anthropic client stand-in that records every response it gets"""
+
+    def __init__(self, client, store):
+        self.messages = _Messages(store, inner=client.messages)
+
+
+class ReplayClient:
+    """Anthropic client stand-in that answers only from recordings"""
+
+    def __init__(self, store):
+        self.messages = _Messages(store)
+
+
+def wrap_client(client, mode, directory):
+    """
+    Apply a recording mode to an API client
+
+    Args:
+        client: Anthropic client
+        mode: 'off', 'record' or 'replay' (see RECORDING_MODES)
+        directory: Where recordings are kept
+
+    Returns:
+        The client itself, a RecordingClient or a ReplayClient
+    """
+    if mode not in RECORDING_MODES:
+        raise ValueError(f"Unknown recording mode {mode!r}; expected one of {RECORDING_MODES}")
+    if mode == 'record':
+        return RecordingClient(client, RecordingStore(directory))
+    if mode == 'replay':
+        return ReplayClient(RecordingStore(directory))
+    return client
@@ -0,0 +1,255 @@
+"""
+Re-score Scheduler Service
+Refreshes stale AI analyses of active deals off-peak, within a token budget
+"""
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# Deals still being worked on, most advanced first
+ACTIVE_STATUSES = ('in_progress', 'under_review', 'unassigned')
+
+# Used until ai_calls has enough history to estimate from
+DEFAULT_TOKENS_PER_DEAL = 10000
+
+# Tokens counted against the budget: everything the API processed
+TOKEN_FIELDS = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
+
+
+def parse_hours(window):
+    """
+    Parse an off-peak window such as '1-6' or '22-5' (local hours, end
+    exclusive, may wrap past midnight)
+
+    Returns:
+        Set of hours (0-23) inside the window; every hour for '' or '*'
+    """
+    window = (window or '').strip()
+    if window in ('', '*'):
+        return set(range(24))
+    try:
+        start, end = (int(part) % 24 for part in window.split('-'))
+    except ValueError:
+        raise ValueError(f"Invalid hours window {window!r}; expected e.g. '1-6'")
+    if start == end:
+        return set(range(24))
+    if start < end:
+        return set(range(start, end))
+    return set(range(start, 24)) | set(range(0, end))
+
+
+class RescoreScheduler:
+    """
+    Periodically queues active deals whose latest analysis is too old
+
+    Each run picks stale deals (in_progress first, then under_review, then
+    unassigned; higher AI score, more reliable source and older analysis
+    first) and queues them as one forced batch capped at the configured
+    concurrency. How many it picks is set by what is left of the daily
+    token budget. A run only starts inside the off-peak hours and once the
+    previous run's batch has finished. Runs are recorded in rescore_runs.
+
+    Run it in one process only (scoring_worker.py or rescore_stale.py).
+    """
+
+    def __init__(self, pool, job_queue, max_age_days=14, daily_tokens=500000,
+                 concurrency=1, hours='1-6', interval=900):
+        """
+        Initialize the scheduler
+
+        Args:
+            pool: ConnectionPool for the deals database
+            job_queue: JobQueue the re-scoring batches go to
+            max_age_days: Analyses older than this are stale
+            daily_tokens: Tokens re-scoring may use per (UTC) day; 0 stops it
+            concurrency: Most re-scoring jobs running at once
+            hours: Off-peak window in local hours (see parse_hours)
+            interval: Seconds between checks once started
+        """
+        self.pool = pool
+        self.job_queue = job_queue
+        self.max_age_days = max_age_days
+        self.daily_tokens = daily_tokens
+        self.concurrency = concurrency
+        self.hours = parse_hours(hours)
+        self.interval = interval
+
+        self._thread = None
+        self._stopping = threading.Event()
+
+    @contextmanager
+    def _connection(self):
+        conn = self.pool.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stale_deals(self, limit):
+        """
+        Active deals with an analysis older than max_age_days, best first
+
+        Deals that already have a job waiting or running are left out.
+
+        Returns:
+            List of dictionaries with id, status, ai_score,
+            source_reliability and analysed_at
+        """
+        order = ' '.join(f"WHEN '{status}' THEN {i}" for i, status in enumerate(ACTIVE_STATUSES))
+        with self._connection() as conn:
+            rows = conn.execute(f"""
+                SELECT d.id, d.status, d.ai_score, d.source_reliability, a.created_at AS analysed_at
+                FROM deals d
+                JOIN deal_analyses a
+                  ON a.id = (SELECT MAX(id) FROM deal_analyses WHERE deal_id = d.id)
+                WHERE d.status IN ({', '.join('?' for _ in ACTIVE_STATUSES)})
+                  AND a.created_at < datetime('now', ?)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM scoring_jobs j
+                      WHERE j.deal_id = d.id AND j.status IN ('queued', 'running')
+                  )
+                ORDER BY CASE d.status {order} END,
+                         IFNULL(d.ai_score, 0) DESC,
+                         IFNULL(d.source_reliability, 0) DESC,
+                         a.created_at
+                LIMIT ?
+            """, (*ACTIVE_STATUSES, f"-{int(self.max_age_days)} days", limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def tokens_per_deal(self):
+        """Average tokens of a successful scoring call over the last week"""
+        with self._connection() as conn:
+            row = conn.execute(f"""
+                SELECT AVG({' + '.join(f'IFNULL({field}, 0)' for field in TOKEN_FIELDS)}), COUNT(*)
+                FROM ai_calls
+                WHERE error IS NULL AND created_at >= datetime('now', '-7 days')
+            """).fetchone()
+        return int(row[0]) if row[1] >= 5 else DEFAULT_TOKENS_PER_DEAL
+
+    def _batch_usage(self, conn, where, params=()):
+        """
+        Tokens used and jobs still pending across re-scoring batches
+
+        Returns:
+            (tokens used by finished jobs, queued or running jobs)
+        """
+        usage = ' + '.join(f"IFNULL(json_extract(j.result, '$.usage.{field}'), 0)" for field in TOKEN_FIELDS)
+        row = conn.execute(f"""
+            SELECT IFNULL(SUM(CASE WHEN j.status = 'done' THEN {usage} ELSE 0 END), 0),
+                   SUM(j.status IN ('queued', 'running'))
+            FROM rescore_runs r
+            JOIN scoring_jobs j ON j.batch_id = r.batch_id
+            WHERE {where}
+        """, params).fetchone()
+        return int(row[0] or 0), int(row[1] or 0)
+
+    def run_once(self, now=None, dry_run=False, ignore_hours=False):
+        """
+        Check the schedule and budget and queue a batch of stale deals
+
+        Args:
+            now: Local datetime to check the off-peak window against
+                (default: now)
+            dry_run: Work out the batch but queue nothing
+            ignore_hours: Run even outside the off-peak window
+
+        Returns:
+            Report dictionary: 'queued' (deals queued, 0 if nothing was
+            done), 'reason' when nothing was queued, and the budget
+            figures the decision was based on
+        """
+        now = now or datetime.now()
+        report = {'queued': 0, 'batch_id': None, 'deal_ids': [],
+                  'token_budget': self.daily_tokens, 'max_age_days': self.max_age_days}
+
+        if not self.daily_tokens:
+            return {**report, 'reason': 'disabled (no daily token budget)'}
+        if not ignore_hours and now.hour not in self.hours:
+            return {**report, 'reason': f"outside off-peak hours ({now.hour}:00)"}
+
+        with self._connection() as conn:
+            # Charged to the day each job finished, not the day its run started
+            used, _ = self._batch_usage(conn, "date(j.finished_at) = date('now')")
+            _, unfinished = self._batch_usage(conn, '1')
+        per_deal = self.tokens_per_deal()
+        remaining = self.daily_tokens - used - unfinished * per_deal
+        report.update(tokens_used_today=used, tokens_per_deal=per_deal,
+                      tokens_remaining=max(0, remaining))
+
+        if unfinished:
+            return {**report, 'reason': f"previous run still has {unfinished} job(s) pending"}
+        allowance = remaining // per_deal
+        if allowance <= 0:
+            return {**report, 'reason': 'daily token budget used up'}
+
+        deals = self.stale_deals(allowance)
+        if not deals:
+            return {**report, 'reason': 'no stale analyses'}
+
+        deal_ids = [deal['id'] for deal in deals]
+        report['deal_ids'] = deal_ids
+        if dry_run:
+            return {**report, 'reason': 'dry run', 'would_queue': len(deal_ids)}
+
+        # A fresh API call is the point; identical prompts would hit the cache
+        batch_id = self.job_queue.enqueue_batch(deal_ids, self.concurrency, force=True)
+        try:
+            with self._connection() as conn:
+                conn.execute("""
+                    INSERT INTO rescore_runs (batch_id, deal_ids, token_budget, tokens_used_before, tokens_per_deal)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (batch_id, json.dumps(deal_ids), self.daily_tokens, used, per_deal))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Re-score run queued as batch {batch_id} but not recorded: {e}")
+
+        return {**report, 'queued': len(deal_ids), 'batch_id': batch_id}
+
+    def get_runs(self, limit=20):
+        """
+        Recent runs with their progress
+
+        Returns:
+            List of run dictionaries, newest first, with job counts by
+            status and the tokens the finished jobs used
+        """
+        with self._connection() as conn:
+            rows = [dict(row) for row in conn.execute(
+                "SELECT * FROM rescore_runs ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()]
+            for run in rows:
+                run['deal_ids'] = json.loads(run['deal_ids']) if run['deal_ids'] else []
+                counts = dict(conn.execute("""
+                    SELECT status, COUNT(*) FROM scoring_jobs WHERE batch_id = ? GROUP BY status
+                """, (run['batch_id'],)).fetchall())
+                run['jobs'] = {status: counts.get(status, 0) for status in ('queued', 'running', 'done', 'failed')}
+                run['tokens_used'], _ = self._batch_usage(conn, 'r.id = ?', (run['id'],))
+        return rows
+
+    def start(self):
+        """Check the schedule every interval seconds in a background thread"""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name='rescore-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the background thread"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                report = self.run_once()
+                if report['queued']:
+                    print(f"Re-score: queued {report['queued']} stale deal(s) as batch {report['batch_id']} "
+                          f"({report['tokens_remaining']:,} of {self.daily_tokens:,} tokens left today)")
+            except sqlite3.Error as e:
+                print(f"Re-score scheduler: database error: {e}")
+            self._stopping.wait(self.interval)
@@ -0,0 +1,246 @@
+"""
+Response Cache Service
+Read-through cache for hot API responses, invalidated by deal writes
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryBackend:
+    """
+    Bounded in-process LRU store with per-entry TTL
+    """
+
+    def __init__(self, max_entries=512):
+        """Initialize with the maximum number of entries to keep"""
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key, value, ttl, tags):
+        """Store a value tagged with the data it depends on"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, frozenset(tags), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_tags(self, tags):
+        """Drop every entry carrying any of the given tags"""
+        tags = set(tags)
+        with self._lock:
+            stale = [k for k, (_, entry_tags, _) in self._entries.items() if entry_tags & tags]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        """Drop everything"""
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        """Number of entries currently held"""
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """
+    File-backed store shared by every worker process on this host
+
+    Local stand-in for a shared cache such as Redis: entries and
+    invalidations made by one process are seen by the others.
+    """
+
+    def __init__(self, path, max_entries=512):
+        """Initialize with the cache file path"""
+        self.path = str(path)
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self.evictions = 0
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                tags TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+
+    def _conn(self):
+        """Per-thread connection to the cache file"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return the cached value or None if missing/expired"""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE cache_entries SET used_at = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl, tags):
+        """Store a value tagged with the data it depends on"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, tags, expires_at, used_at) VALUES (?, ?, ?, ?, ?)",
+            (key, json.dumps(value), ',' + ','.join(sorted(tags)) + ',', now + ttl, now)
+        )
+        cursor = conn.execute("""
+            DELETE FROM cache_entries WHERE key IN (
+                SELECT key FROM cache_entries ORDER BY used_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+        self.evictions += max(cursor.rowcount, 0)
+        conn.commit()
+
+    def invalidate_tags(self, tags):
+        """Drop every entry carrying any of the given tags"""
+        conn = self._conn()
+        removed = 0
+        for tag in tags:
+            cursor = conn.execute("DELETE FROM cache_entries WHERE tags LIKE ?", (f'%,{tag},%',))
+            removed += cursor.rowcount
+        conn.commit()
+        return removed
+
+    def clear(self):
+        """Drop everything"""
+        conn = self._conn()
+        conn.execute("DELETE FROM cache_entries")
+        conn.commit()
+
+    def size(self):
+        """Number of entries currently held"""
+        return self._conn().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Read-through cache with tag-based invalidation and hit/miss counters
+    """
+
+    def __init__(self, backend=None, ttl=30):
+        """
+        Initialize the cache
+
+        Args:
+            backend: MemoryBackend or SQLiteBackend (default in-process LRU)
+            ttl: Seconds an entry stays valid without being invalidated
+        """
+        self.backend = backend or MemoryBackend()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'skipped_stale': 0}
+        self.generation = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        value = self.backend.get(key)
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, key, value, tags, ttl=None, generation=None):
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value (must not be None)
+            tags: Names of the data the value depends on (e.g. 'deals')
+            ttl: Override the default TTL
+            generation: self.generation read before the value was computed;
+                if an invalidation happened since, the value may be stale
+                and is not stored
+        """
+        if generation is not None and generation != self.generation:
+            self._count('skipped_stale')
+            return
+        self.backend.set(key, value, ttl or self.ttl, tags)
+
+    def get_or_set(self, key, tags, compute, ttl=None):
+        """
+        Return the cached value for key, computing and storing it on a miss
+
+        Args:
+            key: Cache key
+            tags: Names of the data the value depends on
+            compute: Zero-argument callable producing the value
+            ttl: Override the default TTL
+
+        Returns:
+            The cached or freshly computed value
+        """
+        value = self.get(key)
+        if value is None:
+            generation = self.generation
+            value = compute()
+            self.set(key, value, tags, ttl, generation)
+        return value
+
+    def invalidate(self, tags):
+        """Drop entries depending on any of the given tags"""
+        with self._lock:
+            self.generation += 1
+        removed = self.backend.invalidate_tags(tags)
+        self._count('invalidations', removed)
+        return removed
+
+    def clear(self):
+        """Drop all entries"""
+        self.backend.clear()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get_stats(self):
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with hits, misses, hit ratio, size and evictions
+        """
+        with self._lock:
+            stats = dict(self._stats)
+
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0
+        stats['entries'] = self.backend.size()
+        stats['evictions'] = self.backend.evictions
+        stats['backend'] = type(self.backend).__name__
+        stats['ttl'] = self.ttl
+        return stats
@@ -0,0 +1,126 @@
+"""
+Score Response Parser
+Recovers and validates the analysis fields of a scoring response, even when
+it was cut off by max_tokens or wrapped in extra text
+"""
+from models.analysis import TEXT_FIELDS, LIST_FIELDS, RISK_LEVELS
+from services.json_stream import SectionStreamParser
+
+
+def _score(value):
+    if isinstance(value, bool):
+        raise ValueError('not a number')
+    if isinstance(value, str):
+        value = value.strip().rstrip('%')
+    try:
+        return max(0, min(100, int(round(float(value)))))
+    except (TypeError, ValueError):
+        raise ValueError('not a number')
+
+
+def _risk_level(value):
+    if not isinstance(value, str) or value.strip().lower() not in RISK_LEVELS:
+        raise ValueError(f"not one of {', '.join(RISK_LEVELS)}")
+    return value.strip().lower()
+
+
+def _text(value):
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        value = '\n\n'.join(value)
+    if not isinstance(value, str):
+        raise ValueError('not text')
+    if not value.strip():
+        raise ValueError('empty')
+    return value.strip()
+
+
+def _list(value):
+    if isinstance(value, str):
+        value = [value] if value.strip() else []
+    if not isinstance(value, list):
+        raise ValueError('not a list')
+    return [item if isinstance(item, str) else str(item)
+            for item in value if item is not None and str(item).strip()]
+
+
+# Field -> validator returning the cleaned value or raising ValueError
+SCORE_SCHEMA = {
+    'score': _score,
+    'risk_level': _risk_level,
+    'recommendation': _text,
+    **{field: _text for field in TEXT_FIELDS},
+    **{field: _list for field in LIST_FIELDS},
+}
+
+
+def _scan(text):
+    """Run the section parser over text; returns (parser, raw fields, salvaged)"""
+    parser = SectionStreamParser()
+    parser.feed(text)
+    raw = dict(parser.sections)
+
+    salvaged = parser.salvage_pending()
+    if salvaged is not None and salvaged[1]:
+        raw[salvaged[0]] = salvaged[1]
+    return parser, raw, salvaged
+
+
+def parse_score_response(text, stop_reason=None):
+    """
+    Parse a scoring response in one pass, keeping every usable field
+
+    Text around the JSON object (code fences, a preamble) is ignored.
+    When the response was truncated, every field that finished before the
+    cut is kept, and a list that was cut off keeps its complete items.
+    If the first '{' does not open an object with a score (a preamble with
+    braces of its own), the scan is retried from each later '{'.
+
+    Args:
+        text: Raw response text
+        stop_reason: The API's stop_reason ('max_tokens' marks truncation)
+
+    Returns:
+        (fields, report) - the validated fields, and a dictionary saying
+        whether the response was complete (closed, with a valid score and
+        no invalid fields) or truncated, and which fields were recovered,
+        salvaged from a cut-off list, missing or invalid
+    """
+    # Start at a code fence that opens before the JSON; a fence inside a
+    # string value must not move the start. A preamble with braces of its
+    # own is handled by the retry below
+    fence = text.find('```')
+    if fence != -1 and fence < text.find('{'):
+        text = text[fence:]
+
+    parser, raw, salvaged = _scan(text)
+    start = text.find('{')
+    while 'score' not in raw and start != -1:
+        start = text.find('{', start + 1)
+        retry = _scan(text[start:]) if start != -1 else None
+        if retry is not None and 'score' in retry[1]:
+            parser, raw, salvaged = retry
+
+    fields = {}
+    invalid = {}
+    for key, validate in SCORE_SCHEMA.items():
+        if key not in raw:
+            continue
+        try:
+            fields[key] = validate(raw[key])
+        except ValueError as e:
+            invalid[key] = str(e)
+
+    missing = [key for key in SCORE_SCHEMA if key not in fields and key not in invalid]
+    truncated = stop_reason == 'max_tokens' or (parser.started and not parser.closed)
+    report = {
+        'complete': parser.closed and not truncated and 'score' in fields and not invalid,
+        'truncated': truncated,
+        'found_json': parser.started,
+        'recovered': list(fields),
+        'salvaged': salvaged[0] if salvaged is not None and salvaged[0] in fields else None,
+        'cut_off': parser.pending_key,
+        'missing': missing,
+        'invalid': invalid,
+        'ignored': [key for key in raw if key not in SCORE_SCHEMA],
+    }
+    return fields, report
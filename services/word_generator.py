@@ -42,12 +42,7 @@ class WordGenerator:
         doc.add_paragraph()  # Spacer
 
         # Parse AI analysis
-        ai_analysis = {}
-        if deal_data.get('ai_analysis'):
-            try:
-                ai_analysis = json.loads(deal_data['ai_analysis'])
-            except:
-                ai_analysis = {}
+        ai_analysis = self._get_analysis(deal_data)
 
         # AI Score Section
         self._add_score_section(doc, deal_data)
@@ -92,8 +87,8 @@ class WordGenerator:
                               ai_analysis.get('unusual_patterns', []))
 
         # Key Reasoning
-        reasoning = []
-        if deal_data.get('ai_reasoning'):
+        reasoning = ai_analysis.get('reasoning', [])
+        if not reasoning and deal_data.get('ai_reasoning'):
             try:
                 reasoning = json.loads(deal_data['ai_reasoning']) if isinstance(deal_data['ai_reasoning'], str) else deal_data['ai_reasoning']
             except:
@@ -119,6 +114,17 @@ class WordGenerator:
 
         return doc
 
+    def _get_analysis(self, deal_data):
+        """Get the analysis dict loaded by the model, or parse the legacy JSON column"""
+        if isinstance(deal_data.get('analysis'), dict):
+            return deal_data['analysis']
+        if deal_data.get('ai_analysis'):
+            try:
+                return json.loads(deal_data['ai_analysis'])
+            except:
+                pass
+        return {}
+
     def _add_score_section(self, doc, deal_data):
         """Add the AI score section with styling"""
         heading = doc.add_heading('🤖 AI Assessment Score', level=1)
@@ -154,12 +160,7 @@ class WordGenerator:
         risk_run.font.color.rgb = color
 
         # Recommendation
-        ai_analysis = {}
-        if deal_data.get('ai_analysis'):
-            try:
-                ai_analysis = json.loads(deal_data['ai_analysis'])
-            except:
-                pass
+        ai_analysis = self._get_analysis(deal_data)
 
         recommendation = ai_analysis.get('recommendation', 'Review analysis carefully')
         if recommendation:
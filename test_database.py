@@ -2,9 +2,17 @@
 Test script to verify database operations work
 """
 
+import os
 import sqlite3
+import tempfile
 from datetime import date
 
+from database.init_db import create_schema
+from models.connection_pool import ConnectionPool
+from services.job_queue import JobQueue
+from services.pre_scorer import PreScorer, names_country
+from services.score_parser import parse_score_response
+
 conn = sqlite3.connect('database/deals.db')
 cursor = conn.cursor()
 
@@ -53,6 +61,78 @@ for deal in deals:
     print(f"  ID: {deal[0]} | {deal[1]} | Source: {deal[2]} | Status: {deal[3]}")
 
 conn.close()
+
+# TEST 4: Coalesced scoring jobs (on a scratch database, so no worker picks them up)
+print("\n🔁 TEST 4: Coalesce identical score requests")
+print("-" * 60)
+scratch_dir = tempfile.mkdtemp()
+scratch = sqlite3.connect(os.path.join(scratch_dir, 'deals.db'))
+create_schema(scratch)
+scratch.execute("INSERT INTO deals (commodity_type, source_name, date_received) VALUES ('Gold', 'Test', ?)",
+                (date.today(),))
+scratch.commit()
+scratch.close()
+
+pool = ConnectionPool(os.path.join(scratch_dir, 'deals.db'), pool_size=2)
+jobs = JobQueue(pool, lambda deal_id, progress=None, **options: {'score': 70})
+first, joined = jobs.enqueue_coalesced(1, 'hash-a')
+second, joined = jobs.enqueue_coalesced(1, 'hash-a')
+print(f"{'✅' if second == first and joined else '❌'} Same deal and inputs join job {first} (got {second})")
+other, joined = jobs.enqueue_coalesced(1, 'hash-b')
+print(f"{'✅' if other != first and not joined else '❌'} Changed inputs get their own job ({other})")
+forced, joined = jobs.enqueue_coalesced(1, 'hash-a', force=True)
+print(f"{'✅' if forced not in (first, other) and not joined else '❌'} Different options get their own job ({forced})")
+
+jobs.run_one()
+after, joined = jobs.enqueue_coalesced(1, 'hash-a')
+print(f"{'✅' if after != first and not joined else '❌'} A finished job is not joined (new job {after})")
+print(f"   Coalesced so far: {jobs.get_stats()['coalesced']}")
+pool.close_all()
+
+# TEST 5: Recovering scores from messy AI responses
+print("\n🧩 TEST 5: Parse score responses")
+print("-" * 60)
+responses = [
+    ("Plain JSON", '{"score": 72, "risk_level": "low"}', 72),
+    ("Fenced with a preamble", 'Here you go {as asked}:\n```json\n{"score": 65}\n```', 65),
+    ("Preamble with braces, no fence", 'Using the {score, risk_level} format: {"score": 58, "risk_level": "HIGH"}', 58),
+    ("Fenced snippet inside a value", '{"score": 70, "executive_summary": "use ```{x}``` here"}', 70),
+    ("Truncated after the score", '{"score": 81, "red_flags": ["Unverified seller", "No insp', 81),
+    ("No JSON at all", 'I cannot score this deal.', None),
+]
+for name, text, expected in responses:
+    fields, report = parse_score_response(text, 'max_tokens' if 'Truncated' in name else 'end_turn')
+    ok = fields.get('score') == expected
+    print(f"{'✅' if ok else '❌'} {name}: score {fields.get('score')} (recovered {', '.join(report['recovered']) or 'nothing'})")
+fields, report = parse_score_response('{"score": 81, "red_flags": ["Unverified seller", "No insp', 'max_tokens')
+ok = fields.get('red_flags') == ['Unverified seller'] and report['truncated']
+print(f"{'✅' if ok else '❌'} Cut-off list keeps its complete items: {fields.get('red_flags')}")
+
+# TEST 6: Origin countries are matched as whole names
+print("\n🌍 TEST 6: Match origin countries")
+print("-" * 60)
+origins = [
+    ("Niger", ('niger',), True),
+    ("Nigeria", ('niger',), False),
+    ("Lagos, Nigeria", ('niger',), False),
+    ("Republic of Niger", ('niger',), True),
+    ("Somalia", ('mali',), False),
+    ("Tirana, Albania", ('iran',), False),
+    ("Côte d'Ivoire", ("cote d'ivoire", "côte d'ivoire"), True),
+]
+for origin, countries, expected in origins:
+    ok = names_country(origin, countries) == expected
+    print(f"{'✅' if ok else '❌'} {origin!r} {'names' if expected else 'does not name'} {countries[0]}")
+
+pre_scorer = PreScorer()
+gold = {'commodity_type': 'Gold', 'price_type': 'lme_discount', 'gross_discount': -10, 'commission': 0}
+for origin, african, sanctioned in (("Mali", True, False), ("Somalia", False, False),
+                                     ("Russian Federation", False, True), ("Peru", False, False)):
+    result = pre_scorer.score({**gold, 'origin_country': origin})
+    ok = (any('African gold' in strength for strength in result['strengths']) == african and
+          any('Sanctioned' in flag for flag in result['critical_flags']) == sanctioned)
+    print(f"{'✅' if ok else '❌'} {origin}: African gold {african}, sanctioned {sanctioned}")
+
 print("\n" + "=" * 60)
 print("✅ ALL TESTS COMPLETE!")
 print("=" * 60)
\ No newline at end of file
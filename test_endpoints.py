@@ -23,6 +23,12 @@ def test_endpoint(name, url, method="GET", data=None, expected_status=200):
         print(f"ERROR: {str(e)}")
         return False
 
+def check(name, passed, detail=""):
+    print(f"Checking {name}...", "PASS" if passed else "FAIL")
+    if not passed and detail:
+        print(f"Details: {str(detail)[:200]}")
+    return passed
+
 print("=== Starting Verification ===")
 
 # 1. HTML Pages
@@ -55,4 +61,79 @@ if response:
     except:
         print("Could not extract deal_id from response")
 
+# 4. Bulk endpoints
+print("--- Bulk endpoints ---")
+bulk_deals = [dict(deal_data, source_name=f"Bulk Source {i}") for i in range(3)]
+response = requests.post(f"{BASE_URL}/api/deals/bulk", json={"deals": bulk_deals + [{"source_name": "No commodity"}]})
+body = response.json()
+check("Bulk create inserts the valid deals", response.status_code == 201 and body.get('created') == 3, response.text)
+check("Bulk create reports the invalid deal", body.get('failed') == 1 and not body['results'][3]['success'], response.text)
+bulk_ids = [result['deal_id'] for result in body.get('results', []) if result['success']]
+
+response = requests.patch(f"{BASE_URL}/api/deals/bulk", json={"updates": [
+    {"id": bulk_ids[0], "status": "reviewing"},
+    {"id": bulk_ids[1], "bogus_field": 1},
+    {"id": 999999999, "status": "reviewing"},
+]})
+body = response.json()
+check("Bulk update applies the valid item", body.get('updated') == 1 and body['results'][0]['success'], response.text)
+check("Bulk update reports the unknown field", 'bogus_field' in body['results'][1].get('error', ''), response.text)
+check("Bulk update reports the missing deal", body['results'][2].get('error') == 'Deal not found', response.text)
+deal = requests.get(f"{BASE_URL}/api/deals/{bulk_ids[0]}").json().get('deal', {})
+check("Bulk update was saved", deal.get('status') == 'reviewing', deal)
+
+response = requests.delete(f"{BASE_URL}/api/deals/bulk", json={"ids": bulk_ids + [999999999]})
+body = response.json()
+check("Bulk delete removes the deals", body.get('deleted') == len(bulk_ids) and body.get('failed') == 1, response.text)
+check("Deleted deal is gone", requests.get(f"{BASE_URL}/api/deals/{bulk_ids[0]}").status_code == 404)
+
+# 5. Cursor pagination
+print("--- Cursor pagination ---")
+page_deals = [dict(deal_data, commodity_type="Pagination Test", date_received=f"2023-10-{day:02d}")
+              for day in (1, 2, 2, 3, 4)]
+response = requests.post(f"{BASE_URL}/api/deals/bulk", json={"deals": page_deals})
+page_ids = [result['deal_id'] for result in response.json().get('results', [])]
+
+seen = []
+cursor = None
+for _ in range(10):
+    params = {"commodity_type": "Pagination Test", "limit": 2}
+    if cursor:
+        params["cursor"] = cursor
+    page = requests.get(f"{BASE_URL}/api/deals", params=params).json()
+    seen.extend(deal['id'] for deal in page.get('deals', []))
+    cursor = page.get('next_cursor')
+    if not cursor:
+        break
+check("Pages cover every deal exactly once", sorted(seen) == sorted(page_ids), seen)
+check("Pages are newest first", seen == sorted(seen, key=lambda deal_id: (page_deals[page_ids.index(deal_id)]['date_received'], deal_id), reverse=True), seen)
+check("Last page has no next_cursor", cursor is None)
+response = requests.get(f"{BASE_URL}/api/deals", params={"cursor": "not-a-cursor"})
+check("Malformed cursor is rejected", response.status_code == 400, response.text)
+requests.delete(f"{BASE_URL}/api/deals/bulk", json={"ids": page_ids})
+
+# 6. ETags and cached responses
+print("--- ETag invalidation ---")
+response = requests.post(f"{BASE_URL}/api/deals/bulk", json={"deals": [dict(deal_data, source_name="ETag Source")]})
+etag_id = response.json()['results'][0]['deal_id']
+first = requests.get(f"{BASE_URL}/api/deals/{etag_id}")
+etag = first.headers.get('ETag')
+check("Deal response has an ETag", bool(etag), first.headers)
+response = requests.get(f"{BASE_URL}/api/deals/{etag_id}", headers={"If-None-Match": etag})
+check("Unchanged deal returns 304", response.status_code == 304, response.status_code)
+
+stats = requests.get(f"{BASE_URL}/api/statistics")
+requests.put(f"{BASE_URL}/api/deals/{etag_id}", json={"source_name": "ETag Source (edited)"})
+response = requests.get(f"{BASE_URL}/api/deals/{etag_id}", headers={"If-None-Match": etag})
+check("Edited deal returns 200 for the old ETag", response.status_code == 200, response.status_code)
+check("Edited deal has a new ETag", response.headers.get('ETag') not in (None, etag), response.headers)
+check("Edited deal is not served from cache",
+      response.status_code == 200 and response.json()['deal']['source_name'] == "ETag Source (edited)", response.text)
+response = requests.get(f"{BASE_URL}/api/statistics", headers={"If-None-Match": stats.headers.get('ETag', '')})
+check("Statistics return 200 after a write", response.status_code == 200, response.status_code)
+
+requests.delete(f"{BASE_URL}/api/deals/{etag_id}")
+response = requests.get(f"{BASE_URL}/api/deals/{etag_id}")
+check("Deleted deal is not served from cache", response.status_code == 404, response.status_code)
+
 print("=== Verification Complete ===")